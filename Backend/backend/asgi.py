@@ -3,6 +3,14 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The async ticket API (tickets/async_views.py, routed under /api/tickets/)
+only avoids thread hops when served here, e.g.:
+
+    uvicorn backend.asgi:application --workers 4
+
+The ticket event stream (/api/tickets/events/) is only served here; with
+several workers, set TICKET_EVENTS to the shared-cache broker.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -1,3 +1,11 @@
 from django.urls import path
 
-urlpatterns = []
\ No newline at end of file
+from . import async_views
+
+# API tickets async (ASGI), voir backend/asgi.py
+urlpatterns = [
+    path('tickets/', async_views.ticket_list, name='async-ticket-list'),
+    path('tickets/events/', async_views.ticket_events, name='async-ticket-events'),
+    path('tickets/<int:pk>/', async_views.ticket_detail, name='async-ticket-detail'),
+    path('tickets/<int:pk>/status/', async_views.ticket_status, name='async-ticket-status'),
+]
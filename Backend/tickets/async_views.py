@@ -0,0 +1,236 @@
+"""
+API tickets native async (servie par backend/asgi.py).
+
+Mêmes règles que TicketViewSet (portée, filtres, recherche, pagination par
+curseur, ETag) mais les requêtes passent par l'ORM async de Django et la
+copie des pièces jointes en staging est exécutée dans un thread dédié ;
+l'upload lui-même est fait en arrière-plan (tickets/uploads.py).
+"""
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import exceptions, status
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from . import conditional, events, uploads
+from .authentication import StatelessJWTAuthentication
+from .models import Ticket, User
+from .serializers import (
+    TicketCreateSerializer,
+    TicketListSerializer,
+    TicketSerializer,
+    TicketUpdateSerializer,
+)
+from .views import TicketViewSet
+
+authenticator = StatelessJWTAuthentication()
+
+
+def render(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        JSONRenderer().render(data),
+        status=status_code,
+        content_type='application/json',
+    )
+
+
+def render_exception(exc):
+    """Même corps d'erreur que le gestionnaire d'exceptions de DRF"""
+    if isinstance(exc.detail, (list, dict)):
+        data = exc.detail
+    else:
+        data = {'detail': exc.detail}
+    response = render(data, exc.status_code)
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        response['WWW-Authenticate'] = authenticator.authenticate_header(None)
+    return response
+
+
+def async_api_view(methods, token_query_param=None):
+    """
+    Vue async authentifiée : enveloppe la requête dans un Request DRF (parsers,
+    query_params), authentifie par JWT et convertit les APIException en JSON.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = render_exception(exceptions.MethodNotAllowed(request.method))
+                response['Allow'] = ', '.join(methods)
+                return response
+
+            drf_request = Request(request, parsers=[MultiPartParser(), FormParser(), JSONParser()])
+            try:
+                result = await authenticator.aauthenticate(drf_request, token_query_param)
+                if result is None:
+                    raise exceptions.NotAuthenticated()
+                drf_request.user, drf_request.auth = result
+                return await view(drf_request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return render_exception(exc)
+
+        # Authentification par en-tête, pas par cookie : pas de CSRF (comme DRF)
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def ticket_view(request, action, **kwargs):
+    """TicketViewSet configuré pour réutiliser ses querysets (aucune requête SQL)"""
+    return TicketViewSet(request=request, action=action, format_kwarg=None, args=(), kwargs=kwargs)
+
+
+async def get_ticket(request, pk, action):
+    view = ticket_view(request, action, pk=pk)
+    try:
+        return await view.get_filtered_queryset().aget(pk=pk)
+    except Ticket.DoesNotExist:
+        raise exceptions.NotFound()
+
+
+# ============ LISTE / CRÉATION ============
+@async_api_view(['GET', 'POST'])
+async def ticket_list(request):
+    if request.method == 'POST':
+        return await create_ticket(request)
+
+    view = ticket_view(request, 'list')
+    # Filtres relatifs à l'heure : pas de validateurs (voir TicketViewSet.list)
+    time_filters = view.has_time_filters(request)
+    if not time_filters:
+        etag, last_modified = await conditional.alist_validators(view.get_filtered_queryset(), request)
+        not_modified = conditional.not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+    paginator = view.paginator
+    rows = await paginator.apaginate_queryset(view.get_queryset(), request, view)
+    data = paginator.get_paginated_response(TicketListSerializer(rows, many=True).data).data
+    if time_filters:
+        return conditional.set_private(render(data))
+    return conditional.set_validators(render(data), etag, last_modified)
+
+
+async def create_ticket(request):
+    serializer = TicketCreateSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+
+    data = dict(serializer.validated_data)
+    data.pop('attachment', None)
+    upload = request.FILES.get('attachment')
+    if upload is not None:
+        # Copie locale seulement : l'upload est fait en arrière-plan après le commit
+        data.update(await uploads.astage(upload))
+
+    # Chargé ici : TicketSerializer lit created_by (pas de lazy load en async)
+    data['created_by'] = await User.objects.aget(pk=request.user.id)
+    # Déduplication et création dans une même transaction (ORM synchrone)
+    ticket = await sync_to_async(uploads.create_ticket)(data)
+    return render(TicketSerializer(ticket).data, status.HTTP_201_CREATED)
+
+
+# ============ DÉTAIL / STATUT ============
+@async_api_view(['GET'])
+async def ticket_detail(request, pk):
+    ticket = await get_ticket(request, pk, 'retrieve')
+
+    etag, last_modified = conditional.detail_validators(ticket.pk, ticket.updated_at)
+    not_modified = conditional.not_modified_response(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    return conditional.set_validators(render(TicketSerializer(ticket).data), etag, last_modified)
+
+
+@async_api_view(['PATCH'])
+async def ticket_status(request, pk):
+    ticket = await get_ticket(request, pk, 'update_status')
+
+    if request.user.role != 'admin':
+        return render(
+            {'error': 'Only admin can update ticket status'},
+            status.HTTP_403_FORBIDDEN,
+        )
+
+    serializer = TicketUpdateSerializer(ticket, data=request.data, partial=True)
+    if not serializer.is_valid():
+        return render(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+    ticket.set_status(serializer.validated_data['status'], request.user)
+    await ticket.asave()
+    return render(TicketSerializer(ticket).data)
+
+
+# ============ FLUX D'ÉVÉNEMENTS (SSE) ============
+# Commentaire envoyé quand rien ne se passe (proxies, détection de déconnexion)
+EVENT_KEEPALIVE = 15
+# Délai de reconnexion conseillé au navigateur, en millisecondes
+EVENT_RETRY = 3000
+
+
+@async_api_view(['GET'], token_query_param='token')
+async def ticket_events(request):
+    """
+    Événements ticket.created / ticket.updated / ticket.deleted en SSE,
+    limités à la portée de l'utilisateur. Reprise avec l'en-tête Last-Event-ID
+    (ou ?last_event_id=). Jeton : en-tête Authorization ou ?token=.
+    """
+    if not isinstance(request._request, ASGIRequest):
+        # Sous WSGI, Django lirait le flux (infini) en entier avant de répondre
+        return render(
+            {'detail': 'The event stream requires the ASGI server (backend/asgi.py)'},
+            status.HTTP_501_NOT_IMPLEMENTED,
+        )
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.query_params.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        raise exceptions.ValidationError({'Last-Event-ID': ['Expected an integer event id']})
+
+    response = StreamingHttpResponse(
+        event_stream(request.user, request.auth, last_event_id),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+async def event_stream(user, token, last_event_id=None):
+    broker = events.get_broker()
+    # Abonnement avant la reprise : aucun événement ne tombe entre les deux
+    subscription = broker.subscribe(last_event_id)
+    try:
+        yield f'retry: {EVENT_RETRY}\n\n'
+
+        seen = 0
+        if last_event_id is not None:
+            for event in await broker.replay(last_event_id):
+                seen = event.id
+                if event.visible_to(user):
+                    yield event.encode()
+
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), EVENT_KEEPALIVE)
+            except asyncio.TimeoutError:
+                if not await authenticator.atoken_still_valid(user, token):
+                    return
+                yield ': keepalive\n\n'
+                continue
+            if event.id <= seen:
+                continue
+            if event.visible_to(user):
+                yield event.encode()
+    except ConnectionResetError:
+        # Abonné trop lent : le navigateur se reconnecte avec Last-Event-ID
+        return
+    finally:
+        subscription.close()
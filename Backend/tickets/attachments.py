@@ -0,0 +1,180 @@
+"""
+Service des pièces jointes stockées sur disque (stockage local, staging).
+
+Le fichier est envoyé par blocs (jamais lu en entier en mémoire), avec
+ETag / Last-Modified et requêtes conditionnelles, et les requêtes Range
+(une plage) reçoivent une réponse 206 : reprise de téléchargement et
+navigation dans les vidéos / PDF. Derrière nginx ou Apache, l'envoi peut
+être délégué au proxy (X-Accel-Redirect / X-Sendfile, TICKET_ATTACHMENT_SENDFILE).
+"""
+import mimetypes
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date, parse_http_date_safe, quote_etag
+
+from . import storage
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def local_file(ticket):
+    """
+    Fichier local à servir pour un ticket : copie en staging tant que l'upload
+    est en attente, sinon fichier du stockage local ; None si l'attachement
+    est servi par une URL (Cloudinary).
+    """
+    if ticket.attachment_state == 'pending' and ticket.attachment_staged_path:
+        path = Path(ticket.attachment_staged_path)
+    else:
+        path = storage.get_attachment_storage().local_path(ticket)
+    if path is None or not path.is_file():
+        return None
+    return path
+
+
+def get_chunk_size():
+    return getattr(settings, 'TICKET_ATTACHMENT_CHUNK_SIZE', 64 * 1024)
+
+
+class RangeFileWrapper:
+    """Itère sur `length` octets d'un fichier à partir de `offset`, par blocs"""
+
+    def __init__(self, file, offset, length, chunk_size):
+        self.file = file
+        self.remaining = length
+        self.chunk_size = chunk_size
+        file.seek(offset)
+
+    def __iter__(self):
+        while self.remaining > 0:
+            data = self.file.read(min(self.chunk_size, self.remaining))
+            if not data:
+                break
+            self.remaining -= len(data)
+            yield data
+
+    def close(self):
+        self.file.close()
+
+
+def file_validators(stat):
+    """ETag (mtime + taille) et date de modification d'un fichier"""
+    return quote_etag(f'{stat.st_mtime_ns:x}-{stat.st_size:x}'), int(stat.st_mtime)
+
+
+def parse_range(header, size):
+    """
+    (début, fin incluse) d'un en-tête Range à une seule plage, None s'il est
+    absent ou non géré (plusieurs plages : réponse complète), False s'il ne
+    peut pas être satisfait.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header else None
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffixe : les N derniers octets
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    """If-Range : la plage ne vaut que si le fichier n'a pas changé"""
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag
+    return parse_http_date_safe(value) == last_modified
+
+
+def sendfile_response(path):
+    """Réponse vide déléguant l'envoi au proxy, None si non configuré"""
+    mode = getattr(settings, 'TICKET_ATTACHMENT_SENDFILE', None)
+    if mode == 'x-sendfile':
+        response = HttpResponse()
+        response['X-Sendfile'] = str(path)
+        return response
+    if mode == 'x-accel-redirect':
+        # Répertoire local -> location interne nginx
+        for root, location in getattr(settings, 'TICKET_ATTACHMENT_ACCEL_LOCATIONS', {}).items():
+            try:
+                relative = Path(path).resolve().relative_to(Path(root).resolve())
+            except ValueError:
+                continue
+            response = HttpResponse()
+            response['X-Accel-Redirect'] = location.rstrip('/') + '/' + relative.as_posix()
+            return response
+    return None
+
+
+def serve_file(request, path, filename=None, as_attachment=False):
+    """Réponse (200, 206, 304, 412 ou 416) pour un fichier local"""
+    path = Path(path)
+    file = open(path, 'rb')
+    stat = os.fstat(file.fileno())
+    size = stat.st_size
+    etag, last_modified = file_validators(stat)
+    filename = filename or path.name
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    def finish(response):
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Accept-Ranges'] = 'bytes'
+        # Réponse propre à l'utilisateur authentifié
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    conditional = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if conditional is not None:
+        file.close()
+        return finish(conditional)
+
+    offload = sendfile_response(path)
+    if offload is not None:
+        # Le proxy gère lui-même Range et l'envoi
+        file.close()
+        offload['Content-Type'] = content_type
+        offload['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+        return finish(offload)
+
+    byte_range = parse_range(request.META.get('HTTP_RANGE'), size)
+    if byte_range is not None and not if_range_matches(request, etag, last_modified):
+        byte_range = None
+
+    if byte_range is False:
+        file.close()
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return finish(response)
+
+    if byte_range is None:
+        response = FileResponse(file, as_attachment=as_attachment, filename=filename, content_type=content_type)
+        response.block_size = get_chunk_size()
+        return finish(response)
+
+    start, end = byte_range
+    response = StreamingHttpResponse(
+        RangeFileWrapper(file, start, end - start + 1, get_chunk_size()),
+        status=206,
+        content_type=content_type,
+    )
+    response['Content-Length'] = str(end - start + 1)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    return finish(response)
@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import get_cache
+
+# Claims ajoutés par CustomTokenObtainPairSerializer.get_token
+VERSION_CLAIM = 'ver'
+TOKEN_CLAIMS = ('role', 'email', 'username', VERSION_CLAIM)
+
+# Version enregistrée pour un compte désactivé ou supprimé : aucun jeton ne la porte
+REVOKED_VERSION = 0
+
+
+# ============ VERSIONS DES JETONS ============
+def _version_key(user_id):
+    return f'auth:ver:{user_id}'
+
+
+def get_auth_version(user_id):
+    """
+    Version courante des jetons d'un utilisateur, lue depuis le cache.
+    En cas d'absence : une requête sur auth_user, puis mise en cache.
+    """
+    version = get_cache().get(_version_key(user_id))
+    if version is None:
+        version = _row_version(_version_row(user_id).first())
+        set_auth_version(user_id, version)
+    return version
+
+
+async def aget_auth_version(user_id):
+    version = await get_cache().aget(_version_key(user_id))
+    if version is None:
+        version = _row_version(await _version_row(user_id).afirst())
+        await get_cache().aset(_version_key(user_id), version, _version_timeout())
+    return version
+
+
+def set_auth_version(user_id, version):
+    get_cache().set(_version_key(user_id), version, _version_timeout())
+
+
+def forget_auth_version(user_id):
+    """Relue depuis auth_user à la prochaine requête"""
+    get_cache().delete(_version_key(user_id))
+
+
+def _version_row(user_id):
+    return get_user_model().objects.filter(pk=user_id).values_list('auth_version', 'is_active')
+
+
+def _row_version(row):
+    return row[0] if row and row[1] else REVOKED_VERSION
+
+
+def _version_timeout():
+    # Durée bornée : avec un cache local par processus, les autres workers
+    # voient la nouvelle version au plus tard après ce délai
+    return getattr(settings, 'AUTH_VERSION_CACHE_TIMEOUT', 60)
+
+
+# ============ UTILISATEUR DU JETON ============
+class TicketTokenUser(TokenUser):
+    """Utilisateur construit depuis les claims du jeton, sans requête"""
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', 'user')
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def auth_version(self):
+        return self.token.get(VERSION_CLAIM)
+
+    def is_admin(self):
+        return self.role == 'admin'
+
+    def __str__(self):
+        return f"{self.email} ({self.role})"
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    Authentification JWT sans chargement de l'utilisateur : request.user est
+    un TicketTokenUser. Le claim `ver` est comparé à la version courante
+    (cache) pour refuser les jetons émis avant une désactivation, un
+    changement de rôle ou de mot de passe.
+    """
+
+    def get_user(self, validated_token):
+        if any(claim not in validated_token for claim in TOKEN_CLAIMS):
+            # Jeton émis sans les claims (ancien format) : chargement classique
+            return super().get_user(validated_token)
+
+        user = TicketTokenUser(validated_token)
+        if user.auth_version != get_auth_version(user.id):
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return user
+
+    async def aauthenticate(self, request, query_param=None):
+        """
+        authenticate() pour les vues async : (user, token) ou None.
+        `query_param` autorise le jeton dans l'URL, pour les clients qui ne
+        peuvent pas envoyer d'en-tête (EventSource).
+        """
+        header = self.get_header(request)
+        if header is not None:
+            raw_token = self.get_raw_token(header)
+        elif query_param:
+            raw_token = request.query_params.get(query_param) or None
+        else:
+            raw_token = None
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        if any(claim not in validated_token for claim in TOKEN_CLAIMS):
+            user = await sync_to_async(super().get_user)(validated_token)
+            return user, validated_token
+
+        user = TicketTokenUser(validated_token)
+        if user.auth_version != await aget_auth_version(user.id):
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return user, validated_token
+
+    async def atoken_still_valid(self, user, validated_token):
+        """Pour les connexions longues : jeton non expiré et non révoqué"""
+        expires_at = validated_token.get('exp')
+        if expires_at is not None and expires_at <= time.time():
+            return False
+        if isinstance(user, TicketTokenUser):
+            return user.auth_version == await aget_auth_version(user.id)
+        return True
+
+
+# ============ CACHE DES UTILISATEURS COMPLETS ============
+class UserCache:
+    """
+    Cache LRU borné, avec expiration, des instances User indexées par
+    (id, version de jeton). Une nouvelle version ne retrouve donc jamais
+    l'instance d'avant. Les instances sont partagées : lecture seule.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, cached_version, expires_at = entry
+            if cached_version != version or expires_at <= now:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, version, user):
+        with self._lock:
+            self._entries[user_id] = (user, version, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(
+    max_size=getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'AUTH_USER_CACHE_TTL', 300),
+)
+
+
+def get_full_user(user):
+    """Instance User complète pour request.user (TicketTokenUser ou User)"""
+    if not isinstance(user, TokenUser):
+        return user
+
+    instance = user_cache.get(user.id, user.auth_version)
+    if instance is None:
+        instance = get_user_model().objects.get(**{api_settings.USER_ID_FIELD: user.id})
+        if instance.auth_version == user.auth_version:
+            user_cache.set(user.id, user.auth_version, instance)
+    return instance
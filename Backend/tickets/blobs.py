@@ -0,0 +1,132 @@
+"""
+Déduplication des pièces jointes par contenu.
+
+Chaque fichier uploadé est enregistré dans AttachmentBlob sous son SHA-256
+(calculé au staging). Une nouvelle pièce jointe au même contenu pointe vers
+ce blob : aucun transfert. `ref_count` compte les tickets qui le
+référencent ; le dernier ticket supprimé supprime le blob, puis le fichier
+stocké après le commit.
+"""
+import logging
+from collections import defaultdict
+
+from cloudinary import CloudinaryResource
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Greatest
+
+from . import storage
+from .models import AttachmentBlob, Ticket
+
+logger = logging.getLogger(__name__)
+
+
+def claim(sha256):
+    """Référence de plus sur le blob de ce contenu ; None s'il n'existe pas"""
+    blob = AttachmentBlob.objects.filter(sha256=sha256).first()
+    if blob is None:
+        return None
+    # 0 ligne : blob supprimé entre-temps par son dernier ticket
+    if not AttachmentBlob.objects.filter(pk=blob.pk).update(ref_count=models.F('ref_count') + 1):
+        return None
+    return blob
+
+
+def ticket_fields(blob):
+    """Champs attachment* d'un ticket qui pointe vers `blob`"""
+    return {**blob.fields, 'attachment_blob_id': blob.pk}
+
+
+def register(sha256, size, fields):
+    """
+    Blob d'un contenu qui vient d'être uploadé, avec une première référence :
+    (blob, True). Si un autre upload du même contenu l'a enregistré avant,
+    ce blob est réutilisé : (blob, False), la copie uploadée est en trop.
+    """
+    attachment = fields['attachment']
+    stored = {
+        **fields,
+        'attachment': attachment.get_prep_value() if isinstance(attachment, CloudinaryResource) else attachment,
+    }
+    while True:
+        try:
+            with transaction.atomic():
+                return AttachmentBlob.objects.create(sha256=sha256, size=size, fields=stored, ref_count=1), True
+        except IntegrityError:
+            blob = claim(sha256)
+            if blob is not None:
+                return blob, False
+
+
+def release(blob_id):
+    """Référence de moins ; au dernier ticket, suppression du blob et du fichier"""
+    AttachmentBlob.objects.filter(pk=blob_id, ref_count__gt=0).update(ref_count=models.F('ref_count') - 1)
+    collect(AttachmentBlob.objects.filter(pk=blob_id, ref_count=0))
+
+
+def release_many(counts):
+    """
+    Retire n références par blob ({blob_id: n}) en une requête par valeur de
+    n, puis supprime les blobs qui n'en ont plus. Retourne leurs champs : les
+    fichiers stockés sont à supprimer par l'appelant après le commit.
+    """
+    by_count = defaultdict(list)
+    for blob_id, count in counts.items():
+        by_count[count].append(blob_id)
+    for count, blob_ids in by_count.items():
+        AttachmentBlob.objects.filter(pk__in=blob_ids).update(
+            ref_count=Greatest(models.F('ref_count') - count, 0)
+        )
+    return remove(AttachmentBlob.objects.filter(pk__in=list(counts), ref_count=0))
+
+
+def remove(blobs):
+    """Supprime les lignes des blobs donnés, retourne leurs champs"""
+    removed = dict(blobs.select_for_update().values_list('id', 'fields'))
+    if removed:
+        AttachmentBlob.objects.filter(pk__in=list(removed)).delete()
+    return list(removed.values())
+
+
+def collect(blobs):
+    """Supprime les blobs donnés, puis leurs fichiers après le commit ; retourne leur nombre"""
+    removed = remove(blobs)
+    for fields in removed:
+        transaction.on_commit(lambda fields=fields: delete_stored(fields))
+    return len(removed)
+
+
+def delete_stored(fields):
+    try:
+        storage.get_attachment_storage().delete(fields)
+    except Exception:
+        # Fichier orphelin dans le stockage, sans effet sur les tickets
+        logger.exception("Could not delete stored attachment %s", fields.get('attachment_public_id'))
+
+
+def collect_garbage():
+    """
+    Recalcule les références depuis les tickets et supprime les blobs qui
+    n'en avaient déjà plus. Retourne (compteurs corrigés, blobs supprimés).
+
+    Les blobs sont verrouillés avant le recomptage : un claim() en cours
+    (ticket pas encore validé) est attendu au lieu d'être effacé. Un blob
+    ramené à 0 ici n'est supprimé qu'au passage suivant.
+    """
+    with transaction.atomic():
+        counts = dict(AttachmentBlob.objects.select_for_update().order_by('id').values_list('id', 'ref_count'))
+        actual = dict(
+            Ticket._base_manager.filter(attachment_blob__isnull=False)
+            .order_by()
+            .values_list('attachment_blob')
+            .annotate(n=models.Count('id'))
+        )
+        fixed = 0
+        unreferenced = []
+        for blob_id, ref_count in counts.items():
+            if actual.get(blob_id, 0) != ref_count:
+                AttachmentBlob.objects.filter(pk=blob_id).update(ref_count=actual.get(blob_id, 0))
+                fixed += 1
+            elif not ref_count:
+                unreferenced.append(blob_id)
+        deleted = collect(AttachmentBlob.objects.filter(pk__in=unreferenced, ref_count=0))
+    return fixed, deleted
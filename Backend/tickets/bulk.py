@@ -0,0 +1,129 @@
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache, counters, events, history
+from .models import Ticket, TicketChangeSequence, TicketStatusHistory
+from .search import search_tickets
+
+# Nombre maximal de tickets modifiés par une opération groupée
+MAX_TICKETS = 1000
+
+# Champs modifiables en masse -> colonne mise à jour
+CHANGE_FIELDS = {
+    'status': 'status',
+    'priority': 'priority',
+    'assigned_to': 'assigned_to_id',
+}
+
+# Colonnes lues avant la mise à jour (résultats, historique, compteurs, cache)
+SNAPSHOT_FIELDS = ('id', 'title', 'assigned_to_id') + counters.SCOPE_FIELDS
+
+
+class TooManyTickets(Exception):
+    pass
+
+
+def target_queryset(ids=None, filters=None):
+    """Tickets visés : liste d'ids ou expression de filtre (champ -> valeur)"""
+    if ids is not None:
+        return Ticket.objects.filter(id__in=ids)
+
+    filters = dict(filters or {})
+    search = filters.pop('search', None)
+    queryset = Ticket.objects.filter(**filters)
+    if search:
+        queryset = search_tickets(queryset, search)
+    return queryset
+
+
+def apply(user, changes, ids=None, filters=None, note=''):
+    """
+    Applique `changes` ({status, priority, assigned_to}) aux tickets visés par
+    au plus un UPDATE par champ, dans une seule transaction, avec
+    l'historique des statuts (un bulk_create dans la même transaction).
+
+    update() ne déclenche pas les signaux de Ticket : compteurs et
+    invalidation du cache sont donc mis à jour ici. Retourne un résultat par id.
+    """
+    columns = {CHANGE_FIELDS[name]: value for name, value in changes.items()}
+
+    with transaction.atomic():
+        queryset = target_queryset(ids, filters).order_by('id')
+        rows = list(queryset.select_for_update().values(*SNAPSHOT_FIELDS)[:MAX_TICKETS + 1])
+        if len(rows) > MAX_TICKETS:
+            raise TooManyTickets(f'At most {MAX_TICKETS} tickets can be changed at once')
+
+        # Ids à mettre à jour, par colonne
+        changed = {
+            column: [row['id'] for row in rows if row[column] != value]
+            for column, value in columns.items()
+        }
+
+        now = timezone.now()
+        # Un seul numéro de changement pour l'opération (curseur (change_seq, id))
+        change_seq = TicketChangeSequence.next_value() if any(changed.values()) else None
+        for column, ticket_ids in changed.items():
+            if not ticket_ids:
+                continue
+            fields = {column: columns[column], 'updated_at': now, 'change_seq': change_seq, 'changed_at': now}
+            if column == 'status' and columns[column] == 'Resolved':
+                fields.update(resolved_at=now, resolved_by_id=user.id)
+            Ticket.objects.filter(id__in=ticket_ids).update(**fields)
+
+        # Historique validé ou annulé avec les UPDATE
+        status_changed = set(changed.get('status', ()))
+        history.writer.record_many(
+            TicketStatusHistory(
+                ticket_id=row['id'],
+                old_status=row['status'],
+                new_status=columns['status'],
+                changed_by_id=user.id,
+                changed_at=now,
+                note=note,
+            )
+            for row in rows if row['id'] in status_changed
+        )
+
+        updated_ids = set().union(*changed.values()) if changed else set()
+        record_side_effects(
+            [row for row in rows if row['id'] in updated_ids], columns, now, change_seq
+        )
+
+    return build_results(rows, updated_ids, ids)
+
+
+def record_side_effects(rows, columns, updated_at=None, change_seq=None):
+    """Compteurs, cache et événements pour des lignes modifiées par update()"""
+    if not rows:
+        return
+
+    deltas = Counter()
+    for row in rows:
+        new_row = {**row, **columns}
+        deltas[counters.ticket_scope(row)] -= 1
+        deltas[counters.ticket_scope(new_row)] += 1
+    counters.apply_deltas(deltas)
+
+    owner_ids = {row['created_by_id'] for row in rows}
+    transaction.on_commit(lambda: cache.bump_generations(owner_ids))
+    events.publish_bulk_update(rows, columns, updated_at, change_seq)
+
+
+def build_results(rows, updated_ids, requested_ids=None):
+    results = [
+        {'id': row['id'], 'result': 'updated' if row['id'] in updated_ids else 'unchanged'}
+        for row in rows
+    ]
+    if requested_ids is not None:
+        found = {row['id'] for row in rows}
+        results.extend(
+            {'id': ticket_id, 'result': 'not_found'}
+            for ticket_id in sorted(set(requested_ids) - found)
+        )
+    return {
+        'matched': len(rows),
+        'updated': len(updated_ids),
+        'results': results,
+    }
@@ -0,0 +1,111 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .conditional import LIST_PARAMS, user_scope
+
+KEY_PREFIX = 'tickets'
+HITS_KEY = f'{KEY_PREFIX}:stats:hits'
+MISSES_KEY = f'{KEY_PREFIX}:stats:misses'
+
+
+def get_cache():
+    return caches[getattr(settings, 'TICKET_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'TICKET_CACHE_TIMEOUT', 300)
+
+
+# ============ GÉNÉRATIONS ============
+# Chaque portée (admin, owner:<id>) a un numéro de génération inclus dans les
+# clés de réponse. Invalider = incrémenter la génération : les anciennes
+# entrées ne sont plus jamais lues et expirent d'elles-mêmes.
+
+def _generation_key(scope):
+    return f'{KEY_PREFIX}:gen:{scope}'
+
+
+def _initial_generation():
+    # Après une éviction la génération repart d'une valeur jamais utilisée
+    return int(time.time() * 1000)
+
+
+def get_generation(scope):
+    cache = get_cache()
+    key = _generation_key(scope)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _initial_generation(), None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generations(owner_ids):
+    """Invalide les réponses de la vue admin et des propriétaires donnés"""
+    cache = get_cache()
+    scopes = ['admin'] + [f'owner:{owner_id}' for owner_id in set(owner_ids) if owner_id is not None]
+    for scope in scopes:
+        key = _generation_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_generation(), None)
+
+
+# ============ RÉPONSES ============
+def response_key(request, action, lookup=None):
+    scope = user_scope(request.user)
+    params = sorted(
+        (name, value)
+        for name in LIST_PARAMS
+        for value in request.query_params.getlist(name)
+    )
+    # L'hôte fait partie de la clé : les liens next/previous sont absolus
+    parts = (request.get_host(), action, lookup, params)
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return f'{KEY_PREFIX}:resp:{scope}:{get_generation(scope)}:{digest}'
+
+
+def get_response_data(key):
+    data = get_cache().get(key)
+    _count(HITS_KEY if data is not None else MISSES_KEY)
+    return data
+
+
+def set_response_data(key, data, timeout=None):
+    get_cache().set(key, _plain(data), timeout or get_timeout())
+
+
+def _plain(data):
+    """Retire les références au serializer (ReturnDict/ReturnList) avant pickle"""
+    if isinstance(data, dict):
+        return {key: _plain(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_plain(value) for value in data]
+    return data
+
+
+# ============ STATISTIQUES ============
+def _count(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def get_stats():
+    cache = get_cache()
+    values = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = values.get(HITS_KEY, 0)
+    misses = values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else None,
+    }
@@ -0,0 +1,104 @@
+import hashlib
+
+from django.db import models
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .models import Ticket
+
+# Paramètres qui changent le contenu d'une page de liste. Les filtres relatifs
+# à l'heure (overdue, min_age, max_age) n'ont pas de validateurs : leur
+# résultat change sans écriture, voir TicketViewSet.has_time_filters
+LIST_PARAMS = (
+    'category', 'status', 'sla', 'search', 'ordering', 'cursor', 'page_size',
+)
+
+LIST_AGGREGATES = {
+    'count': models.Count('id'),
+}
+SCOPE_AGGREGATES = {
+    'last_modified': models.Max('updated_at'),
+}
+
+
+def user_scope(user):
+    """Portée de visibilité : tous les tickets (admin) ou ceux du propriétaire"""
+    return 'admin' if user.role == 'admin' else f'owner:{user.id}'
+
+
+def scope_queryset(user):
+    """
+    Tickets de la portée, supprimés logiquement compris : une suppression ou
+    un ticket qui sort du filtre (updated_at avancé) change l'ETag.
+    """
+    queryset = Ticket._base_manager.all()
+    if user.role != 'admin':
+        queryset = queryset.filter(created_by_id=user.id)
+    return queryset
+
+
+def _etag(*parts):
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return quote_etag(digest)
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value else None
+
+
+def list_validators(queryset, request):
+    """
+    ETag d'une liste : dernier updated_at de la portée de l'utilisateur et
+    nombre de lignes du queryset filtré (deux agrégations indexées),
+    combinés à la portée et aux paramètres normalisés. Pas de Last-Modified :
+    le max des lignes visibles n'avance pas quand une ligne disparaît.
+    """
+    stats = queryset.order_by().aggregate(**LIST_AGGREGATES)
+    stats.update(scope_queryset(request.user).using(queryset.db).aggregate(**SCOPE_AGGREGATES))
+    return _list_validators(stats, request)
+
+
+async def alist_validators(queryset, request):
+    stats = await queryset.order_by().aaggregate(**LIST_AGGREGATES)
+    stats.update(await scope_queryset(request.user).using(queryset.db).aaggregate(**SCOPE_AGGREGATES))
+    return _list_validators(stats, request)
+
+
+def _list_validators(stats, request):
+    params = sorted(
+        (name, value)
+        for name in LIST_PARAMS
+        for value in request.query_params.getlist(name)
+    )
+    last_modified = stats['last_modified']
+    etag = _etag(
+        'list', user_scope(request.user), params,
+        last_modified.isoformat() if last_modified else '', stats['count'],
+    )
+    return etag, None
+
+
+def detail_validators(ticket_id, updated_at):
+    return _etag('detail', ticket_id, updated_at.isoformat()), _timestamp(updated_at)
+
+
+def not_modified_response(request, etag, last_modified):
+    """Réponse 304/412 si les en-têtes conditionnels correspondent, sinon None"""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return set_private(response)
+
+
+def set_private(response):
+    # Le navigateur garde la réponse mais revalide à chaque fois (requête conditionnelle)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ['Authorization'])
+    return response
@@ -0,0 +1,141 @@
+from collections import Counter
+
+from django.db import IntegrityError, models, transaction
+
+from .models import Ticket, TicketCounter
+
+# Champs d'un ticket qui déterminent sa ligne de compteur
+SCOPE_FIELDS = ('created_by_id', 'status', 'category', 'priority')
+
+HIGH_PRIORITIES = ('High', 'Urgent')
+
+
+def ticket_scope(values):
+    """Clé (owner_id, status, category, priority) depuis un ticket ou un dict"""
+    if isinstance(values, dict):
+        return tuple(values[name] for name in SCOPE_FIELDS)
+    return tuple(getattr(values, name) for name in SCOPE_FIELDS)
+
+
+def apply_deltas(deltas):
+    """
+    Applique des deltas {scope: n} aux compteurs du propriétaire et aux
+    compteurs globaux (owner=NULL), par UPDATE ... SET count = count + n.
+    """
+    rows = Counter()
+    for (owner_id, status, category, priority), delta in deltas.items():
+        if not delta:
+            continue
+        rows[(owner_id, status, category, priority)] += delta
+        rows[(None, status, category, priority)] += delta
+
+    with transaction.atomic():
+        for (owner_id, status, category, priority), delta in rows.items():
+            if delta:
+                _apply_row(owner_id, status, category, priority, delta)
+
+
+def _apply_row(owner_id, status, category, priority, delta):
+    lookup = {
+        'owner_id': owner_id,
+        'status': status,
+        'category': category,
+        'priority': priority,
+    }
+    counters = TicketCounter.objects.filter(**lookup)
+    if counters.update(count=models.F('count') + delta) or delta < 0:
+        # Rien à décrémenter si la ligne n'existe pas (propriétaire supprimé en cascade)
+        return
+
+    try:
+        with transaction.atomic():
+            TicketCounter.objects.create(count=delta, **lookup)
+    except IntegrityError:
+        # Ligne créée entre-temps par une autre requête
+        counters.update(count=models.F('count') + delta)
+
+
+def record_change(old_scope, new_scope):
+    """Déplace un ticket d'une ligne de compteur à une autre"""
+    if old_scope == new_scope:
+        return
+    deltas = Counter()
+    if old_scope is not None:
+        deltas[old_scope] -= 1
+    if new_scope is not None:
+        deltas[new_scope] += 1
+    apply_deltas(deltas)
+
+
+# ============ LECTURE ============
+def get_stats(owner_id=None):
+    """Statistiques du tableau de bord pour un propriétaire (ou globales)"""
+    counters = TicketCounter.objects.filter(owner_id=owner_id, count__gt=0)
+
+    by_status = {value: 0 for value, _ in Ticket.STATUS_CHOICES}
+    by_category = {value: 0 for value, _ in Ticket.CATEGORY_CHOICES}
+    by_priority = {value: 0 for value, _ in Ticket.PRIORITY_CHOICES}
+    total = 0
+
+    for status, category, priority, count in counters.values_list(
+            'status', 'category', 'priority', 'count'):
+        total += count
+        by_status[status] = by_status.get(status, 0) + count
+        by_category[category] = by_category.get(category, 0) + count
+        by_priority[priority] = by_priority.get(priority, 0) + count
+
+    return {
+        'total': total,
+        'by_status': by_status,
+        'by_category': by_category,
+        'by_priority': by_priority,
+        'high_priority': sum(by_priority.get(p, 0) for p in HIGH_PRIORITIES),
+    }
+
+
+# ============ RECONSTRUCTION ET VÉRIFICATION ============
+def _expected_counts():
+    """Comptes attendus, calculés depuis Ticket.objects"""
+    expected = Counter()
+    rows = (
+        Ticket.objects.order_by()
+        .values(*SCOPE_FIELDS)
+        .annotate(n=models.Count('id'))
+    )
+    for row in rows:
+        owner_id, status, category, priority = ticket_scope(row)
+        expected[(owner_id, status, category, priority)] += row['n']
+        expected[(None, status, category, priority)] += row['n']
+    return expected
+
+
+def _stored_counts():
+    stored = Counter()
+    rows = TicketCounter.objects.values_list('owner_id', 'status', 'category', 'priority', 'count')
+    for owner_id, status, category, priority, count in rows:
+        stored[(owner_id, status, category, priority)] += count
+    return stored
+
+
+def rebuild():
+    """Recalcule toute la table des compteurs, retourne le nombre de lignes"""
+    expected = _expected_counts()
+    with transaction.atomic():
+        TicketCounter.objects.all().delete()
+        TicketCounter.objects.bulk_create([
+            TicketCounter(owner_id=owner_id, status=status, category=category,
+                          priority=priority, count=count)
+            for (owner_id, status, category, priority), count in expected.items()
+        ], batch_size=500)
+    return len(expected)
+
+
+def check_consistency():
+    """Liste des écarts (scope, attendu, stocké) entre compteurs et tickets"""
+    expected = _expected_counts()
+    stored = _stored_counts()
+    mismatches = []
+    for scope in sorted(set(expected) | set(stored), key=str):
+        if expected.get(scope, 0) != stored.get(scope, 0):
+            mismatches.append((scope, expected.get(scope, 0), stored.get(scope, 0)))
+    return mismatches
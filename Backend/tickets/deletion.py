@@ -0,0 +1,163 @@
+"""
+Suppression des tickets en deux temps.
+
+DELETE /tickets/<id>/ ne fait qu'une suppression logique (deleted_at) : le
+ticket disparaît tout de suite de Ticket.objects, des compteurs et des
+listes, avec tombstone et événement ticket.deleted, sans appel au stockage
+distant dans la requête. `manage.py purge_deleted_tickets` supprime ensuite
+les lignes par lots bornés (historique en cascade), dans des transactions
+courtes, puis les fichiers devenus inutiles par appels groupés, avec
+nouvelles tentatives espacées.
+"""
+import logging
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import blobs, cache, counters, events, storage, sync
+from .models import Ticket
+
+logger = logging.getLogger(__name__)
+
+# Colonnes lues avant la suppression logique (compteurs, tombstones, cache)
+SNAPSHOT_FIELDS = ('id',) + counters.SCOPE_FIELDS
+# Champs lus par storage.delete_many() pour un fichier sans blob
+LEGACY_FILE_FIELDS = ('attachment', 'attachment_public_id', 'attachment_resource_type', 'attachment_url')
+
+
+# ============ SUPPRESSION LOGIQUE ============
+def soft_delete(ticket_ids):
+    """
+    Marque les tickets comme supprimés par un UPDATE, puis compteurs,
+    tombstones, cache et événements (update() ne déclenche pas les signaux).
+    Pièce jointe, historique et ligne restent jusqu'à la purge. Retourne les
+    ids supprimés (ceux qui ne l'étaient pas déjà).
+    """
+    with transaction.atomic():
+        rows = list(
+            Ticket.objects.filter(id__in=ticket_ids)
+            .order_by('id')
+            .select_for_update()
+            .values(*SNAPSHOT_FIELDS)
+        )
+        if not rows:
+            return []
+        deleted_ids = [row['id'] for row in rows]
+        now = timezone.now()
+        Ticket.objects.filter(id__in=deleted_ids).update(deleted_at=now, updated_at=now)
+        record_side_effects(rows)
+    return deleted_ids
+
+
+def record_side_effects(rows):
+    """Effets d'une suppression pour des lignes masquées par update()"""
+    deltas = Counter()
+    for row in rows:
+        deltas[counters.ticket_scope(row)] -= 1
+    counters.apply_deltas(deltas)
+    change_seq = sync.record_deletions([(row['id'], row['created_by_id']) for row in rows])
+
+    owner_ids = {row['created_by_id'] for row in rows}
+    transaction.on_commit(lambda: cache.bump_generations(owner_ids))
+    for row in rows:
+        events.publish_on_commit(
+            events.DELETED, row['created_by_id'],
+            events.ticket_payload({'id': row['id'], 'change_seq': change_seq}, deleted=True),
+        )
+
+
+# ============ PURGE ============
+def get_batch_size():
+    return getattr(settings, 'TICKET_PURGE_BATCH_SIZE', 200)
+
+
+def purge(batch_size=None, max_batches=None, pause=None):
+    """
+    Supprime définitivement les tickets supprimés logiquement, un lot par
+    transaction. Entre deux lots, `pause` secondes laissent passer les autres
+    écritures (SQLite n'a qu'un écrivain). Retourne (tickets, fichiers supprimés).
+    """
+    batch_size = batch_size or get_batch_size()
+    if pause is None:
+        pause = getattr(settings, 'TICKET_PURGE_PAUSE', 0.1)
+
+    purged = files = batches = 0
+    while max_batches is None or batches < max_batches:
+        count, removed = purge_batch(batch_size)
+        if not count:
+            break
+        purged += count
+        batches += 1
+        # Après le commit : le lot est supprimé même si le stockage est indisponible
+        files += delete_stored_files(removed)
+        if pause:
+            time.sleep(pause)
+    return purged, files
+
+
+def purge_batch(batch_size):
+    """
+    Supprime au plus `batch_size` tickets (les plus anciennement supprimés)
+    et rend leurs références de blobs en bloc. Retourne (nombre, champs des
+    fichiers stockés à supprimer).
+    """
+    with transaction.atomic():
+        rows = list(
+            Ticket._base_manager.filter(deleted_at__isnull=False)
+            .order_by('deleted_at', 'id')
+            .select_for_update()
+            .values('id', 'attachment_blob_id', 'attachment_staged_path', *LEGACY_FILE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0, []
+        ticket_ids = [row['id'] for row in rows]
+        tickets = Ticket._base_manager.filter(id__in=ticket_ids)
+        # Blobs et staging traités ici pour tout le lot : les signaux
+        # post_delete n'ont plus rien à libérer ticket par ticket
+        tickets.update(attachment_blob=None, attachment_staged_path='')
+        tickets.delete()
+        removed = blobs.release_many(Counter(row['attachment_blob_id'] for row in rows if row['attachment_blob_id']))
+        # Pièces jointes antérieures aux blobs : fichier propre au ticket
+        removed += [
+            {name: row[name] for name in LEGACY_FILE_FIELDS}
+            for row in rows
+            if not row['attachment_blob_id'] and row['attachment_public_id']
+        ]
+        for row in rows:
+            if row['attachment_staged_path']:
+                transaction.on_commit(lambda path=row['attachment_staged_path']: storage.discard_staged(path))
+    return len(rows), removed
+
+
+def delete_stored_files(removed):
+    """Supprime des fichiers stockés par appels groupés, retourne le nombre supprimé"""
+    store = storage.get_attachment_storage()
+    size = getattr(store, 'delete_batch_size', 100)
+    deleted = 0
+    for start in range(0, len(removed), size):
+        chunk = removed[start:start + size]
+        if _delete_with_retry(store, chunk):
+            deleted += len(chunk)
+    return deleted
+
+
+def _delete_with_retry(store, chunk):
+    attempts = getattr(settings, 'TICKET_PURGE_DELETE_ATTEMPTS', 5)
+    delay = getattr(settings, 'TICKET_PURGE_RETRY_DELAY', 2.0)
+    for attempt in range(1, attempts + 1):
+        try:
+            store.delete_many(chunk)
+            return True
+        except Exception:
+            if attempt == attempts:
+                # Fichiers orphelins dans le stockage, sans effet sur les tickets
+                logger.exception(
+                    "Could not delete %s stored attachment(s) after %s attempts: %s",
+                    len(chunk), attempt, [fields.get('attachment_public_id') for fields in chunk],
+                )
+                return False
+            logger.warning("Deleting stored attachments failed (attempt %s), retrying", attempt, exc_info=True)
+            time.sleep(delay * 2 ** (attempt - 1))
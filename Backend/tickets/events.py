@@ -0,0 +1,280 @@
+"""
+Événements tickets (créé / modifié / supprimé / en retard) diffusés en Server-Sent Events.
+
+Les signaux de Ticket publient après commit vers un broker. Le broker par
+défaut (LocalBroker) est en mémoire, pour un seul processus ; CacheBroker
+s'appuie sur le cache Django partagé (Redis, Memcached...) pour plusieurs
+processus. Le backend se choisit avec le réglage TICKET_EVENTS.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+CREATED = 'ticket.created'
+UPDATED = 'ticket.updated'
+DELETED = 'ticket.deleted'
+# Échéance dépassée (tickets/sla.py)
+OVERDUE = 'ticket.overdue'
+# Le client a manqué des événements (historique dépassé) : il doit recharger
+RESET = 'reset'
+
+# Champs du ticket transmis dans un événement
+PAYLOAD_FIELDS = (
+    'id', 'title', 'status', 'priority', 'category', 'created_by_id', 'assigned_to_id',
+    'updated_at', 'change_seq',
+)
+
+
+class Event:
+    __slots__ = ('id', 'type', 'owner_id', 'data')
+
+    def __init__(self, id, type, owner_id, data):
+        self.id = id
+        self.type = type
+        self.owner_id = owner_id
+        self.data = data
+
+    def visible_to(self, user):
+        return self.type == RESET or user.role == 'admin' or self.owner_id == user.id
+
+    def encode(self):
+        """Bloc SSE (id / event / data)"""
+        data = json.dumps(self.data, cls=DjangoJSONEncoder)
+        return f'id: {self.id}\nevent: {self.type}\ndata: {data}\n\n'
+
+    def as_dict(self):
+        return {'id': self.id, 'type': self.type, 'owner_id': self.owner_id, 'data': self.data}
+
+    @classmethod
+    def from_dict(cls, values):
+        return cls(**values)
+
+
+def ticket_payload(values, deleted=False):
+    """Données d'un événement depuis un ticket ou un dict de colonnes"""
+    if isinstance(values, dict) and deleted:
+        return {'id': values['id'], 'change_seq': values.get('change_seq')}
+    if deleted:
+        return {'id': values.id, 'change_seq': values.change_seq}
+    if isinstance(values, dict):
+        return {name: values.get(name) for name in PAYLOAD_FIELDS}
+    return {name: getattr(values, name) for name in PAYLOAD_FIELDS}
+
+
+# ============ BROKERS ============
+class BaseBroker:
+    """
+    Interface des brokers :
+    - publish() est synchrone, appelable depuis n'importe quel thread ;
+    - subscribe(after_id) retourne un abonnement dont get() attend l'événement
+      suivant (postérieur à after_id quand le broker sait relire son historique) ;
+    - replay() retourne les événements postérieurs à un id (Last-Event-ID),
+      précédés d'un événement RESET si une partie n'est plus disponible.
+    """
+
+    def publish(self, event_type, owner_id, data):
+        raise NotImplementedError
+
+    def subscribe(self, after_id=None):
+        raise NotImplementedError
+
+    async def replay(self, after_id):
+        raise NotImplementedError
+
+
+class LocalSubscription:
+    def __init__(self, broker, loop, queue_size):
+        self.broker = broker
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def deliver(self, event):
+        # Appelé depuis le thread qui publie
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Client trop lent : il se reconnectera avec Last-Event-ID
+            self.overflowed = True
+
+    async def get(self):
+        if self.overflowed:
+            raise ConnectionResetError('Subscriber queue overflowed')
+        return await self.queue.get()
+
+    def close(self):
+        self.broker._unsubscribe(self)
+
+
+class LocalBroker(BaseBroker):
+    """Broker en mémoire du processus, historique borné pour la reprise"""
+
+    def __init__(self, history_size=1000, queue_size=1000):
+        self.queue_size = queue_size
+        self._history = deque(maxlen=history_size)
+        self._sequence = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event_type, owner_id, data):
+        with self._lock:
+            self._sequence += 1
+            event = Event(self._sequence, event_type, owner_id, data)
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.deliver(event)
+            except RuntimeError:
+                # Boucle de l'abonné fermée
+                self._unsubscribe(subscription)
+        return event
+
+    def subscribe(self, after_id=None):
+        # Événements en direct uniquement ; l'historique passe par replay()
+        subscription = LocalSubscription(self, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    async def replay(self, after_id):
+        with self._lock:
+            history = list(self._history)
+            sequence = self._sequence
+        if after_id >= sequence:
+            return []
+        events = [event for event in history if event.id > after_id]
+        if not events or events[0].id > after_id + 1:
+            return [Event(sequence, RESET, None, {})]
+        return events
+
+
+class CacheSubscription:
+    def __init__(self, broker, after_id=None):
+        self.broker = broker
+        # Sans position, elle est lue au premier get() (subscribe() est synchrone)
+        self.last_id = after_id
+        self.pending = deque()
+
+    async def get(self):
+        if self.last_id is None:
+            self.last_id = await self.broker.current_id()
+        while not self.pending:
+            events = await self.broker.replay(self.last_id)
+            if events:
+                self.pending.extend(events)
+                self.last_id = events[-1].id
+            else:
+                await asyncio.sleep(self.broker.poll_interval)
+        return self.pending.popleft()
+
+    def close(self):
+        pass
+
+
+class CacheBroker(BaseBroker):
+    """
+    Broker multi-processus sur le cache Django partagé : un compteur
+    (incr) numérote les événements, chacun est stocké sous sa propre clé
+    avec une durée de vie ; les abonnés interrogent le compteur.
+    """
+    key_prefix = 'tickets:events'
+
+    def __init__(self, cache_alias='default', history_size=1000, timeout=3600, poll_interval=0.5):
+        self.cache_alias = cache_alias
+        self.history_size = history_size
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def _key(self, event_id):
+        return f'{self.key_prefix}:{event_id}'
+
+    def publish(self, event_type, owner_id, data):
+        sequence_key = f'{self.key_prefix}:seq'
+        self.cache.add(sequence_key, 0, None)
+        event_id = self.cache.incr(sequence_key)
+        event = Event(event_id, event_type, owner_id, data)
+        self.cache.set(self._key(event_id), event.as_dict(), self.timeout)
+        return event
+
+    async def current_id(self):
+        return await self.cache.aget(f'{self.key_prefix}:seq') or 0
+
+    def subscribe(self, after_id=None):
+        return CacheSubscription(self, after_id)
+
+    async def replay(self, after_id):
+        sequence = await self.current_id()
+        if after_id >= sequence:
+            return []
+        first = max(after_id + 1, sequence - self.history_size + 1)
+        keys = [self._key(event_id) for event_id in range(first, sequence + 1)]
+        found = await self.cache.aget_many(keys)
+        if first > after_id + 1 or (keys[0] not in found and any(key in found for key in keys)):
+            # Événements expirés ou hors de l'historique
+            return [Event(sequence, RESET, None, {})]
+
+        # Un id réservé par incr() peut ne pas encore être écrit : on s'arrête avant
+        events = []
+        for key in keys:
+            if key not in found:
+                break
+            events.append(Event.from_dict(found[key]))
+        return events
+
+
+# ============ ACCÈS ============
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            config = getattr(settings, 'TICKET_EVENTS', {})
+            backend = import_string(config.get('BACKEND', 'tickets.events.LocalBroker'))
+            _broker = backend(**config.get('OPTIONS', {}))
+    return _broker
+
+
+def publish(event_type, owner_id, data):
+    """Publie sans jamais faire échouer l'écriture qui a produit l'événement"""
+    try:
+        get_broker().publish(event_type, owner_id, data)
+    except Exception:
+        logger.exception("Could not publish ticket event %s", event_type)
+
+
+def publish_on_commit(event_type, owner_id, data):
+    transaction.on_commit(lambda: publish(event_type, owner_id, data))
+
+
+def publish_bulk_update(rows, columns, updated_at=None, change_seq=None):
+    """Événements UPDATED pour des lignes modifiées par QuerySet.update()"""
+    updated_at = updated_at or timezone.now()
+    for row in rows:
+        data = ticket_payload({**row, **columns, 'updated_at': updated_at, 'change_seq': change_seq})
+        publish_on_commit(UPDATED, row['created_by_id'], data)
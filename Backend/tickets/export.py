@@ -0,0 +1,151 @@
+"""
+Export complet des tickets en CSV ou NDJSON, en flux.
+
+Les lignes sont lues par un itérateur par blocs (curseur côté serveur sur
+PostgreSQL, pages par id derrière PgBouncer), projetées en `.values()` avec les utilisateurs joints à plat,
+puis encodées et regroupées en morceaux de quelques dizaines de Ko,
+éventuellement compressés en gzip au fil de l'eau. La mémoire reste
+constante quel que soit le nombre de tickets : ni instance Ticket ni liste
+complète. Utilisé par GET /tickets/export/ et `manage.py export_tickets`.
+"""
+import csv
+import json
+import zlib
+
+from django.conf import settings
+from django.db import connections, models
+from rest_framework import serializers
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+# Colonnes exportées, utilisateurs joints à plat
+COLUMNS = {
+    'id': 'id',
+    'title': 'title',
+    'description': 'description',
+    'category': 'category',
+    'status': 'status',
+    'priority': 'priority',
+    'created_by_id': 'created_by_id',
+    'created_by_username': 'created_by__username',
+    'created_by_email': 'created_by__email',
+    'assigned_to_id': 'assigned_to_id',
+    'assigned_to_email': 'assigned_to__email',
+    'resolved_by_id': 'resolved_by_id',
+    'resolved_by_email': 'resolved_by__email',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'resolved_at': 'resolved_at',
+    'due_date': 'due_date',
+    'attachment_name': 'attachment_name',
+    'attachment_size': 'attachment_size',
+    'attachment_url': 'attachment_url',
+}
+DATETIME_COLUMNS = ('created_at', 'updated_at', 'resolved_at', 'due_date')
+
+_datetime = serializers.DateTimeField()
+
+
+def get_chunk_size():
+    return getattr(settings, 'TICKET_EXPORT_CHUNK_SIZE', 2000)
+
+
+def get_buffer_size():
+    return getattr(settings, 'TICKET_EXPORT_BUFFER_SIZE', 64 * 1024)
+
+
+def content_type(fmt, compress=False):
+    return 'application/gzip' if compress else FORMATS[fmt][0]
+
+
+def filename(fmt, compress=False):
+    return f"tickets.{FORMATS[fmt][1]}" + ('.gz' if compress else '')
+
+
+# ============ LIGNES ============
+def rows(queryset, chunk_size=None):
+    """Dictionnaires des colonnes exportées, lus par blocs dans l'ordre des ids"""
+    projection = queryset.order_by('id').values(
+        *[name for name, path in COLUMNS.items() if name == path],
+        **{name: models.F(path) for name, path in COLUMNS.items() if name != path},
+    )
+    for values in _iterate(projection, chunk_size or get_chunk_size()):
+        # Ordre des colonnes de COLUMNS (values() place les jointures à la fin)
+        row = {name: values[name] for name in COLUMNS}
+        for name in DATETIME_COLUMNS:
+            if row[name] is not None:
+                row[name] = _datetime.to_representation(row[name])
+        yield row
+
+
+def _iterate(projection, chunk_size):
+    """
+    Lignes lues par blocs. Sans curseur côté serveur (pooler en mode
+    transaction, DISABLE_SERVER_SIDE_CURSORS), iterator() chargerait tout le
+    résultat : pages successives par id croissant à la place.
+    """
+    if not connections[projection.db].settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'):
+        yield from projection.iterator(chunk_size=chunk_size)
+        return
+    last_id = 0
+    while True:
+        page = list(projection.filter(id__gt=last_id)[:chunk_size])
+        yield from page
+        if len(page) < chunk_size:
+            return
+        last_id = page[-1]['id']
+
+
+# ============ ENCODAGE ============
+class _Echo:
+    """Pseudo-fichier pour csv.writer : write() renvoie la ligne encodée"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(list(COLUMNS))
+    for row in rows:
+        yield writer.writerow(['' if value is None else value for value in row.values()])
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def encode(lines, buffer_size=None):
+    """Regroupe les lignes en morceaux d'octets d'environ `buffer_size`"""
+    buffer_size = buffer_size or get_buffer_size()
+    pending, size = [], 0
+    for line in lines:
+        data = line.encode('utf-8')
+        pending.append(data)
+        size += len(data)
+        if size >= buffer_size:
+            yield b''.join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b''.join(pending)
+
+
+def gzip_chunks(chunks):
+    """Compression gzip en flux (en-tête et pied gzip inclus)"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream(queryset, fmt, compress=False, chunk_size=None):
+    """Morceaux d'octets de l'export de `queryset` au format `fmt`"""
+    lines = csv_lines if fmt == 'csv' else ndjson_lines
+    chunks = encode(lines(rows(queryset, chunk_size)))
+    return gzip_chunks(chunks) if compress else chunks
@@ -0,0 +1,57 @@
+from django.db import models
+from django.utils import timezone
+
+from .models import TicketStatusHistory
+
+
+class StatusHistoryWriter:
+    """
+    Écriture de l'historique des statuts, journal d'audit : les lignes sont
+    insérées dans la transaction du changement de statut, validées ou
+    annulées avec lui. Une opération groupée (tickets/bulk.py) écrit toutes
+    ses transitions par un seul bulk_create.
+    """
+    batch_size = 500
+
+    # ============ ENREGISTREMENT ============
+    def record(self, ticket_id, old_status, new_status, changed_by_id=None, note='', using=None):
+        self.record_many([
+            TicketStatusHistory(
+                ticket_id=ticket_id,
+                old_status=old_status,
+                new_status=new_status,
+                changed_by_id=changed_by_id,
+                changed_at=timezone.now(),
+                note=note,
+            )
+        ], using=using)
+
+    def record_many(self, entries, using=None):
+        """Insère les transitions dans la transaction en cours, retourne leur nombre"""
+        entries = list(entries)
+        if entries:
+            TicketStatusHistory.objects.db_manager(using).bulk_create(entries, batch_size=self.batch_size)
+        return len(entries)
+
+
+writer = StatusHistoryWriter()
+
+
+# ============ LECTURE ============
+def timelines(ticket_ids, owner_id=None):
+    """
+    Historique de plusieurs tickets en une requête (index ticket, -changed_at) :
+    {ticket_id: [transitions, de la plus récente à la plus ancienne]}.
+    Avec `owner_id`, seuls les tickets de ce propriétaire sont lus.
+    """
+    result = {ticket_id: [] for ticket_id in ticket_ids}
+    rows = TicketStatusHistory.objects.filter(ticket_id__in=ticket_ids)
+    if owner_id is not None:
+        rows = rows.filter(ticket__created_by_id=owner_id)
+    rows = rows.order_by('ticket_id', '-changed_at').values(
+        'ticket_id', 'old_status', 'new_status', 'changed_by_id', 'changed_at', 'note',
+        changed_by_username=models.F('changed_by__username'),
+    )
+    for row in rows:
+        result[row.pop('ticket_id')].append(row)
+    return result
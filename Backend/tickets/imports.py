@@ -0,0 +1,329 @@
+"""
+Import en masse de tickets (`manage.py import_tickets`).
+
+Les lignes (CSV ou JSONL, éventuellement gzip ; les colonnes de l'export
+sont acceptées) sont lues en flux et traitées par lots : validation colonne
+par colonne sur tout le lot, emails résolus par une table email -> id
+complétée en une requête par lot, puis bulk_create dans une transaction
+par lot.
+
+bulk_create ne passe ni par Ticket.save ni par les signaux : numéro de
+changement, compteurs et cache sont mis à jour ici, une fois par lot. Pas
+d'événement par ticket par défaut (un import de millions de lignes
+noierait le broker) : un seul événement RESET en fin d'import, les clients
+rechargent.
+
+Ces effets sont produits dans le processus de la commande : le serveur ne
+les voit qu'avec un cache et un broker partagés (Redis / Memcached,
+CacheBroker sur ce cache), voir process_local_backends.
+
+L'avancement (TicketImportCheckpoint) est écrit dans la même transaction,
+avec la taille du fichier des rejets après l'écriture (synchronisée sur
+disque) des rejets du lot : un import interrompu reprend après le dernier
+lot validé et tronque les rejets d'un lot non validé.
+"""
+import contextlib
+import csv
+import gzip
+import json
+import os
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.base_user import BaseUserManager
+from django.contrib.auth.hashers import make_password
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import cache, counters, events
+from .models import Ticket, TicketChangeSequence, TicketImportCheckpoint, User
+
+REQUIRED_COLUMNS = ('title', 'description', 'category', 'created_by_email')
+CHOICE_COLUMNS = {
+    'category': {value for value, _ in Ticket.CATEGORY_CHOICES},
+    'status': {value for value, _ in Ticket.STATUS_CHOICES},
+    'priority': {value for value, _ in Ticket.PRIORITY_CHOICES},
+}
+DEFAULTS = {'status': 'New', 'priority': 'Medium'}
+# Colonne d'email -> clé étrangère
+USER_COLUMNS = {
+    'created_by_email': 'created_by_id',
+    'assigned_to_email': 'assigned_to_id',
+    'resolved_by_email': 'resolved_by_id',
+}
+DATETIME_COLUMNS = ('created_at', 'updated_at', 'resolved_at', 'due_date')
+TITLE_MAX_LENGTH = Ticket._meta.get_field('title').max_length
+
+# Ligne illisible (JSON invalide) : message d'erreur à la place des colonnes
+INVALID = '_invalid'
+
+
+def get_chunk_size():
+    return getattr(settings, 'TICKET_IMPORT_CHUNK_SIZE', 5000)
+
+
+def get_batch_size():
+    return getattr(settings, 'TICKET_IMPORT_BATCH_SIZE', 500)
+
+
+# ============ LECTURE ============
+def detect_format(path):
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith('.csv'):
+        return 'csv'
+    if name.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    raise ValueError(f"Cannot guess the format of '{path}', expected .csv, .jsonl or .ndjson")
+
+
+def read_rows(path, fmt=None):
+    """Lignes du fichier (dicts), lues en flux"""
+    fmt = fmt or detect_format(path)
+    opener = gzip.open if path.endswith('.gz') else open
+    # utf-8-sig : BOM des CSV exportés par les tableurs
+    with opener(path, 'rt', encoding='utf-8-sig', newline='') as stream:
+        if fmt == 'csv':
+            yield from csv.DictReader(stream)
+            return
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row if isinstance(row, dict) else {INVALID: 'Invalid JSON object', 'line': line.rstrip('\n')}
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+# ============ UTILISATEURS ============
+class UserMap:
+    """
+    Table email -> id des utilisateurs, complétée par une requête par lot
+    pour les emails pas encore vus (absents mémorisés aussi). Avec
+    `create=True`, les emails valides inconnus deviennent des comptes sans
+    mot de passe utilisable.
+    """
+
+    def __init__(self, create=False):
+        self.create = create
+        self._ids = {}
+
+    def resolve(self, emails):
+        missing = {email for email in emails if email not in self._ids}
+        if not missing:
+            return
+        found = dict(User.objects.filter(email__in=missing).values_list('email', 'id'))
+        if self.create and len(found) < len(missing):
+            self._create(missing - set(found))
+            found = dict(User.objects.filter(email__in=missing).values_list('email', 'id'))
+        for email in missing:
+            self._ids[email] = found.get(email)
+
+    def _create(self, emails):
+        valid = []
+        for email in emails:
+            try:
+                validate_email(email)
+            except ValidationError:
+                continue
+            valid.append(email)
+        password = make_password(None)
+        # Conflit (email ou username déjà pris) : ignoré, l'email reste inconnu
+        User.objects.bulk_create(
+            [User(email=email, username=email[:150], password=password) for email in valid],
+            ignore_conflicts=True,
+        )
+
+    def get(self, email):
+        return self._ids.get(email)
+
+
+# ============ VALIDATION ============
+def validate(rows, users):
+    """
+    Valide un lot [(numéro, ligne)] colonne par colonne. Retourne
+    (tickets prêts pour bulk_create, rejets [(numéro, ligne, erreur)]).
+    """
+    errors = [row.get(INVALID) for _, row in rows]
+
+    def check(predicate, message):
+        for index, (_, row) in enumerate(rows):
+            if errors[index] is None:
+                error = predicate(row)
+                if error:
+                    errors[index] = error if isinstance(error, str) else message
+
+    for name in REQUIRED_COLUMNS:
+        check(lambda row: not _text(row.get(name)), f"{name} is required")
+    check(lambda row: len(_text(row.get('title'))) > TITLE_MAX_LENGTH,
+          f"title is longer than {TITLE_MAX_LENGTH} characters")
+    for name, allowed in CHOICE_COLUMNS.items():
+        check(lambda row: (_text(row.get(name)) or DEFAULTS.get(name)) not in allowed,
+              f"{name} must be one of: {', '.join(sorted(allowed))}")
+
+    # Emails du lot résolus en une requête
+    emails = [
+        {column: BaseUserManager.normalize_email(_text(row.get(column))) for column in USER_COLUMNS}
+        for _, row in rows
+    ]
+    users.resolve({email for row_emails in emails for email in row_emails.values() if email})
+    for index, row_emails in enumerate(emails):
+        for column, email in row_emails.items():
+            if errors[index] is None and email and users.get(email) is None:
+                errors[index] = f"{column}: unknown user '{email}'"
+
+    dates = [{} for _ in rows]
+    for name in DATETIME_COLUMNS:
+        for index, (_, row) in enumerate(rows):
+            value = _text(row.get(name))
+            if errors[index] is not None or not value:
+                continue
+            try:
+                parsed = parse_datetime(value)
+            except ValueError:
+                parsed = None
+            if parsed is None:
+                errors[index] = f"{name} is not a valid datetime"
+                continue
+            if timezone.is_naive(parsed):
+                parsed = timezone.make_aware(parsed)
+            dates[index][name] = parsed
+
+    now = timezone.now()
+    tickets, rejects = [], []
+    for index, (number, row) in enumerate(rows):
+        if errors[index] is not None:
+            rejects.append((number, row, errors[index]))
+            continue
+        created_at = dates[index].get('created_at', now)
+        tickets.append(Ticket(
+            title=_text(row['title']),
+            description=_text(row['description']),
+            category=_text(row['category']),
+            status=_text(row.get('status')) or DEFAULTS['status'],
+            priority=_text(row.get('priority')) or DEFAULTS['priority'],
+            created_at=created_at,
+            updated_at=dates[index].get('updated_at', created_at),
+            resolved_at=dates[index].get('resolved_at'),
+            due_date=dates[index].get('due_date'),
+            **{
+                field: users.get(emails[index][column]) if emails[index][column] else None
+                for column, field in USER_COLUMNS.items()
+            },
+        ))
+    return tickets, rejects
+
+
+# ============ ÉCRITURE ============
+@contextlib.contextmanager
+def keep_timestamps():
+    """
+    Garde created_at / updated_at lus dans le fichier : auto_now_add et
+    auto_now sont désactivés le temps de l'import (processus de la commande).
+    """
+    fields = [Ticket._meta.get_field('created_at'), Ticket._meta.get_field('updated_at')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def get_checkpoint(source, restart=False):
+    checkpoint, _ = TicketImportCheckpoint.objects.get_or_create(source=source)
+    if restart and checkpoint.rows_read:
+        checkpoint.rows_read = checkpoint.imported = checkpoint.rejected = checkpoint.rejects_offset = 0
+        checkpoint.save()
+    return checkpoint
+
+
+def open_rejects(path, checkpoint):
+    """
+    Fichier des rejets (binaire) positionné après les rejets des lots
+    validés : la fin écrite pour un lot non validé est supprimée.
+    """
+    if not checkpoint.rows_read or not os.path.exists(path):
+        return open(path, 'wb')
+    file = open(path, 'r+b')
+    file.truncate(min(checkpoint.rejects_offset, os.path.getsize(path)))
+    file.seek(0, os.SEEK_END)
+    return file
+
+
+def write_rejects(file, rejects):
+    """Écrit les rejets d'un lot sur disque (fsync), retourne la nouvelle taille du fichier"""
+    for row_number, row, error in rejects:
+        file.write(json.dumps({'row': row_number, 'error': error, 'data': row}, default=str).encode('utf-8') + b'\n')
+    file.flush()
+    if rejects:
+        os.fsync(file.fileno())
+    return file.tell()
+
+
+def save_chunk(checkpoint, tickets, rows_read, rejected, rejects_offset=None, publish_events=False, batch_size=None):
+    """
+    Insère un lot et avance le point de reprise, dans une seule transaction.
+    Un seul numéro de changement pour le lot (curseur (change_seq, id)).
+    `rejects_offset` : taille du fichier des rejets, rejets du lot compris.
+    """
+    with transaction.atomic():
+        if tickets:
+            change_seq = TicketChangeSequence.next_value()
+            changed_at = timezone.now()
+            for ticket in tickets:
+                ticket.change_seq = change_seq
+                ticket.changed_at = changed_at
+            Ticket.objects.bulk_create(tickets, batch_size=batch_size or get_batch_size())
+            record_side_effects(tickets, publish_events)
+
+        checkpoint.rows_read += rows_read
+        checkpoint.imported += len(tickets)
+        checkpoint.rejected += rejected
+        if rejects_offset is not None:
+            checkpoint.rejects_offset = rejects_offset
+        checkpoint.save()
+
+
+def record_side_effects(tickets, publish_events=False):
+    """Compteurs, cache et, si demandé, événements de tickets créés par bulk_create"""
+    counters.apply_deltas(Counter(counters.ticket_scope(ticket) for ticket in tickets))
+
+    owner_ids = {ticket.created_by_id for ticket in tickets}
+    transaction.on_commit(lambda: cache.bump_generations(owner_ids))
+    if publish_events:
+        for ticket in tickets:
+            events.publish_on_commit(events.CREATED, ticket.created_by_id, events.ticket_payload(ticket))
+
+
+def announce(imported):
+    """Un seul événement pour tout l'import : les clients abonnés rechargent"""
+    if imported:
+        events.publish(events.RESET, None, {'reason': 'import', 'imported': imported})
+
+
+def process_local_backends():
+    """
+    Cache des réponses et broker d'événements propres au processus de la
+    commande (LocMemCache, LocalBroker) : invalidation et événement RESET
+    n'atteignent alors pas le serveur. Retourne leurs descriptions.
+    """
+    found = []
+    if isinstance(cache.get_cache(), LocMemCache):
+        found.append(f"response cache '{getattr(settings, 'TICKET_CACHE_ALIAS', 'default')}' (LocMemCache)")
+    broker = events.get_broker()
+    if isinstance(broker, events.LocalBroker):
+        found.append('event broker (LocalBroker)')
+    elif isinstance(broker, events.CacheBroker) and isinstance(broker.cache, LocMemCache):
+        found.append(f"event broker (CacheBroker on LocMemCache '{broker.cache_alias}')")
+    return found
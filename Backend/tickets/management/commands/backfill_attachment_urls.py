@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Calcule les colonnes d'URL d'attachement des tickets existants (public_id, format, URLs)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help="Recalcule aussi les tickets dont les URLs sont déjà renseignées",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Ticket.objects.exclude(attachment__isnull=True)
+        if not options['all']:
+            queryset = queryset.filter(attachment_view_url='')
+
+        updated = 0
+        last_id = 0
+        while True:
+            # Parcours par id croissant : chaque lot est une lecture d'index
+            batch = list(
+                queryset.filter(id__gt=last_id)
+                .order_by('id')
+                .only('id', 'attachment', *Ticket.ATTACHMENT_URL_FIELDS)[:batch_size]
+            )
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            for ticket in batch:
+                if not ticket.attachment or not ticket.attachment.public_id:
+                    continue
+                for name, value in Ticket.build_attachment_fields(ticket.attachment).items():
+                    setattr(ticket, name, value)
+            Ticket.objects.bulk_update(batch, Ticket.ATTACHMENT_URL_FIELDS)
+            updated += len(batch)
+            self.stdout.write(f"{updated} ticket(s) updated")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled attachment URLs for {updated} ticket(s)"))
@@ -0,0 +1,248 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cloudinary
+from asgiref.sync import ThreadSensitiveContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from tickets.models import Ticket, User
+from tickets.serializers import CustomTokenObtainPairSerializer
+from tickets.uploads import uploader
+
+# Chemins comparés : DRF synchrone (WSGI) et vues async (ASGI)
+PATHS = {
+    'wsgi': {
+        'list': '/api/auth/tickets/',
+        'detail': '/api/auth/tickets/{id}/',
+        'status': '/api/auth/tickets/{id}/update_status/',
+    },
+    'asgi': {
+        'list': '/api/tickets/',
+        'detail': '/api/tickets/{id}/',
+        'status': '/api/tickets/{id}/status/',
+    },
+}
+
+# Répartition des requêtes d'une itération
+WORKLOAD = ('create', 'list', 'detail', 'status')
+
+ATTACHMENT = b'%PDF-1.4\n' + b'0' * 16 * 1024
+
+
+class StubStorageHandler(BaseHTTPRequestHandler):
+    """Imite l'API d'upload Cloudinary avec une latence fixe"""
+    counter = itertools.count(1)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        time.sleep(self.server.latency)
+
+        # /v1_1/<cloud>/<resource_type>/upload
+        parts = self.path.strip('/').split('/')
+        resource_type = parts[2] if len(parts) > 2 else 'image'
+        public_id = f'ticket_attachments/bench-{next(self.counter)}'
+        body = json.dumps({
+            'public_id': public_id,
+            'version': 1,
+            'format': 'pdf',
+            'type': 'upload',
+            'resource_type': resource_type,
+            'bytes': len(ATTACHMENT),
+            'secure_url': f'https://stub.local/{public_id}.pdf',
+        }).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare le débit de l'API tickets DRF (WSGI, threads) et de l'API async "
+        "(ASGI) sous concurrence, avec un service de stockage local simulé. "
+        "Utilise une base de test temporaire."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400, help="Requêtes par chemin")
+        parser.add_argument('--concurrency', type=int, default=16,
+                            help="Requêtes simultanées envoyées par les clients")
+        parser.add_argument('--wsgi-workers', type=int, default=None,
+                            help="Workers WSGI (threads) ; par défaut égal à --concurrency")
+        parser.add_argument('--storage-latency', type=float, default=0.2,
+                            help="Latence de l'upload simulé, en secondes")
+        parser.add_argument('--seed-tickets', type=int, default=200)
+
+    def handle(self, *args, **options):
+        # Une ligne de log par upload sinon (niveau DEBUG en développement)
+        for name in ('urllib3', 'asyncio'):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), StubStorageHandler)
+        server.latency = options['storage_latency']
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        connection = connections['default']
+        old_name = connection.settings_dict['NAME']
+        setup_test_environment()
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                if connection.vendor == 'sqlite':
+                    # Fichier plutôt que mémoire : plusieurs threads y écrivent
+                    connection.settings_dict.setdefault('TEST', {})['NAME'] = \
+                        os.path.join(directory, 'bench.sqlite3')
+                connection.creation.create_test_db(verbosity=0)
+                try:
+                    cloudinary.config(
+                        cloud_name='bench', api_key='bench', api_secret='bench',
+                        upload_prefix=f'http://127.0.0.1:{server.server_port}',
+                    )
+                    self.run(options)
+                finally:
+                    cloudinary.reset_config()
+                    connections.close_all()
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+        finally:
+            teardown_test_environment()
+            server.shutdown()
+
+    def run(self, options):
+        admin = User.objects.create_user(
+            email='bench-admin@example.com', username='bench-admin', password=None, role='admin'
+        )
+        owner = User.objects.create_user(
+            email='bench-owner@example.com', username='bench-owner', password=None
+        )
+        tickets = Ticket.objects.bulk_create([
+            Ticket(title=f'Bench ticket {i}', description='Lorem ipsum ' * 20,
+                   category='Technical', created_by=owner)
+            for i in range(options['seed_tickets'])
+        ])
+        self.ticket_ids = [ticket.id for ticket in tickets]
+        self.tokens = {
+            'admin': str(CustomTokenObtainPairSerializer.get_token(admin).access_token),
+            'owner': str(CustomTokenObtainPairSerializer.get_token(owner).access_token),
+        }
+
+        self.stdout.write(
+            f"{options['requests']} requests per path, concurrency {options['concurrency']} "
+            f"(WSGI workers {options['wsgi_workers'] or options['concurrency']}), "
+            f"storage latency {options['storage_latency'] * 1000:.0f} ms, "
+            f"workload {'/'.join(WORKLOAD)}"
+        )
+        results = {
+            'wsgi': self.run_wsgi(options['requests'], options['wsgi_workers'] or options['concurrency']),
+            'asgi': asyncio.run(self.run_asgi(options['requests'], options['concurrency'])),
+        }
+        for name, (elapsed, latencies, errors) in results.items():
+            self.report(name, elapsed, latencies, errors)
+
+        # Les pièces jointes sont uploadées après la réponse (tickets/uploads.py)
+        started = time.perf_counter()
+        uploader.wait()
+        self.stdout.write(
+            f"background uploads drained in {time.perf_counter() - started:.1f} s, "
+            f"{Ticket.objects.filter(attachment_state='ready').count()} ready, "
+            f"{Ticket.objects.filter(attachment_state='failed').count()} failed"
+        )
+
+        wsgi_rate = len(results['wsgi'][1]) / results['wsgi'][0]
+        asgi_rate = len(results['asgi'][1]) / results['asgi'][0]
+        self.stdout.write(self.style.SUCCESS(f"ASGI / WSGI throughput: x{asgi_rate / wsgi_rate:.2f}"))
+
+    # ============ REQUÊTES ============
+    def build_request(self, path_set, index):
+        """(méthode, chemin, kwargs, jeton) de la requête numéro `index`"""
+        kind = WORKLOAD[index % len(WORKLOAD)]
+        ticket_id = self.ticket_ids[index % len(self.ticket_ids)]
+        paths = PATHS[path_set]
+
+        if kind == 'create':
+            data = {
+                'title': f'Created {index}',
+                'description': 'Benchmark ticket',
+                'category': 'Technical',
+                'attachment': SimpleUploadedFile('bench.pdf', ATTACHMENT, 'application/pdf'),
+            }
+            return 'post', paths['list'], {'data': data}, 'owner'
+        if kind == 'list':
+            return 'get', paths['list'], {}, 'owner'
+        if kind == 'detail':
+            return 'get', paths['detail'].format(id=ticket_id), {}, 'owner'
+        status_value = 'Under Review' if (index // len(WORKLOAD)) % 2 else 'New'
+        return 'patch', paths['status'].format(id=ticket_id), {
+            'data': json.dumps({'status': status_value}),
+            'content_type': 'application/json',
+        }, 'admin'
+
+    def run_wsgi(self, total, concurrency):
+        local = threading.local()
+
+        def call(index):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            method, path, kwargs, token = self.build_request('wsgi', index)
+            started = time.perf_counter()
+            response = getattr(local.client, method)(
+                path, headers={'Authorization': f'Bearer {self.tokens[token]}'}, **kwargs
+            )
+            return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(call, range(total)))
+        return self.summarize(time.perf_counter() - started, outcomes)
+
+    async def run_asgi(self, total, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(index):
+            method, path, kwargs, token = self.build_request('asgi', index)
+            # Comme ASGIHandler : un thread ORM par requête, pas un seul pour toutes
+            async with semaphore, ThreadSensitiveContext():
+                started = time.perf_counter()
+                response = await getattr(client, method)(
+                    path, headers={'Authorization': f'Bearer {self.tokens[token]}'}, **kwargs
+                )
+                return time.perf_counter() - started, response.status_code
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(call(index) for index in range(total)))
+        return self.summarize(time.perf_counter() - started, outcomes)
+
+    @staticmethod
+    def summarize(elapsed, outcomes):
+        latencies = [latency for latency, code in outcomes if code < 400]
+        errors = [code for _, code in outcomes if code >= 400]
+        return elapsed, latencies, errors
+
+    def report(self, name, elapsed, latencies, errors):
+        if not latencies:
+            self.stdout.write(f"{name}: every request failed ({len(errors)} errors)")
+            return
+        ordered = sorted(latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        self.stdout.write(
+            f"{name}: {len(latencies) / elapsed:8.1f} req/s  "
+            f"p50 {statistics.median(ordered) * 1000:7.1f} ms  "
+            f"p95 {p95 * 1000:7.1f} ms  errors {len(errors)}"
+        )
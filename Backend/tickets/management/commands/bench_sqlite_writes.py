@@ -0,0 +1,179 @@
+import multiprocessing
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+# Modèles importés dans les fonctions : les processus écrivains (spawn)
+# importent ce module avant django.setup()
+PRIORITIES = ('Low', 'Medium', 'High', 'Urgent')
+ENGINES = {
+    False: 'django.db.backends.sqlite3',
+    True: 'tickets.sqlite_backend',
+}
+
+
+def write_worker(db_path, tuned, duration, update_ratio, owner_id, ticket_ids, barrier, results):
+    """
+    Processus écrivain : crée des tickets (Ticket.objects.create, signaux
+    compris) et, avec la probabilité `update_ratio`, modifie un ticket
+    existant dans une transaction qui lit puis écrit.
+    """
+    try:
+        import django
+        from django.conf import settings
+
+        django.setup()
+        # Avant la première connexion : moteur, base de test et profil du passage
+        database = settings.DATABASES['default']
+        database.update(ENGINE=ENGINES[tuned], NAME=db_path)
+        database['OPTIONS'] = {'transaction_mode': 'IMMEDIATE'} if tuned else {}
+        settings.TICKET_SQLITE_TUNING = tuned
+
+        from django.db import OperationalError, connection, connections, transaction
+        from tickets.models import Ticket
+
+        # Connexion recréée avec le moteur du passage
+        del connections['default']
+        connection.ensure_connection()
+        rng = random.Random(os.getpid())
+        created = updated = locked = 0
+        latencies = []
+        barrier.wait()
+
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                if rng.random() < update_ratio:
+                    with transaction.atomic():
+                        ticket = Ticket.objects.get(pk=rng.choice(ticket_ids))
+                        ticket.priority = rng.choice(PRIORITIES)
+                        ticket.save()
+                    updated += 1
+                else:
+                    Ticket.objects.create(
+                        title=f'Benchmark ticket {os.getpid()}-{created}',
+                        description='Concurrent write benchmark',
+                        category='Technical',
+                        priority=rng.choice(PRIORITIES),
+                        created_by_id=owner_id,
+                    )
+                    created += 1
+            except OperationalError as exc:
+                if 'locked' not in str(exc):
+                    raise
+                locked += 1
+            latencies.append(time.perf_counter() - started)
+
+        connection.close()
+        results.put((created, updated, locked, latencies))
+    except Exception as exc:
+        barrier.abort()
+        results.put(exc)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure le débit d'écriture de tickets par plusieurs processus sur une base SQLite "
+        "temporaire, sans puis avec le profil SQLite (WAL, pragmas, transactions IMMEDIATE) : "
+        "écritures/s, erreurs « database is locked » et latences."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5.0, help="Durée de chaque passage, en secondes")
+        parser.add_argument('--update-ratio', type=float, default=0.3,
+                            help="Part des opérations qui modifient un ticket existant (lecture puis écriture)")
+        parser.add_argument('--seed-tickets', type=int, default=500)
+        parser.add_argument('--profile', choices=['both', 'default', 'tuned'], default='both')
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"The default database is not SQLite ({connection.vendor})")
+
+        modes = {'both': (False, True), 'default': (False,), 'tuned': (True,)}[options['profile']]
+        self.stdout.write(
+            f"{options['processes']} writer process(es), {options['duration']:.0f}s per run, "
+            f"{options['update_ratio']:.0%} read-then-write updates"
+        )
+        rates = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for tuned in modes:
+                db_path = os.path.join(directory, f"bench-{'tuned' if tuned else 'default'}.sqlite3")
+                rates[tuned] = self.run(db_path, tuned, options)
+
+        if len(rates) == 2 and rates[False]:
+            self.stdout.write(self.style.SUCCESS(f"Tuned / default throughput: x{rates[True] / rates[False]:.2f}"))
+
+    def run(self, db_path, tuned, options):
+        owner_id, ticket_ids = self.create_database(db_path, tuned, options['seed_tickets'])
+
+        context = multiprocessing.get_context('spawn')
+        barrier = context.Barrier(options['processes'] + 1)
+        results = context.Queue()
+        workers = [
+            context.Process(target=write_worker, args=(
+                db_path, tuned, options['duration'], options['update_ratio'],
+                owner_id, ticket_ids, barrier, results,
+            ))
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            barrier.wait()
+        except Exception:
+            pass
+        started = time.perf_counter()
+        outcomes = [results.get() for _ in workers]
+        elapsed = time.perf_counter() - started
+        for worker in workers:
+            worker.join()
+
+        errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if errors:
+            raise CommandError(f"Writer process failed: {errors[0]!r}")
+
+        created = sum(outcome[0] for outcome in outcomes)
+        updated = sum(outcome[1] for outcome in outcomes)
+        locked = sum(outcome[2] for outcome in outcomes)
+        latencies = sorted(latency for outcome in outcomes for latency in outcome[3])
+        rate = (created + updated) / elapsed
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+        self.stdout.write(
+            f"{'tuned' if tuned else 'default':<8} {rate:>8.0f} writes/s  "
+            f"({created} created, {updated} updated)  {locked} locked error(s)  "
+            f"p50 {statistics.median(latencies) * 1000 if latencies else 0:.1f} ms  p95 {p95 * 1000:.1f} ms"
+        )
+        return rate
+
+    def create_database(self, db_path, tuned, seed_tickets):
+        """Base migrée dans un fichier, en journal WAL ou rollback selon le passage"""
+        from tickets.models import Ticket, User
+
+        connection = connections['default']
+        old_name = connection.settings_dict['NAME']
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = db_path
+        connection.creation.create_test_db(verbosity=0, serialize=False)
+        try:
+            owner = User.objects.create_user(
+                email='bench-writes@example.com', username='bench-writes', password=None
+            )
+            tickets = Ticket.objects.bulk_create([
+                Ticket(title=f'Seed ticket {i}', description='Seed', category='Technical', created_by=owner)
+                for i in range(seed_tickets)
+            ])
+            with connection.cursor() as cursor:
+                # Le mode de journal est enregistré dans le fichier
+                cursor.execute(f"PRAGMA journal_mode = {'WAL' if tuned else 'DELETE'}")
+            return owner.id, [ticket.id for ticket in tickets]
+        finally:
+            # Base gardée pour les écrivains, supprimée avec le dossier temporaire
+            connection.close()
+            connection.settings_dict['NAME'] = old_name
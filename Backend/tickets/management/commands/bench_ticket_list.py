@@ -0,0 +1,77 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tickets.models import Ticket, User
+from tickets.serializers import TicketListSerializer, TicketSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la sérialisation de la liste des tickets : TicketSerializer sur des "
+        "instances complètes vs projection TicketListSerializer (lignes/s et pic mémoire). "
+        "Les données de test sont créées dans une transaction annulée à la fin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--description-size', type=int, default=4000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options['rows'], options['description_size'])
+                self.run(options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, rows, description_size):
+        owner = User.objects.create_user(
+            email='bench-list@example.com', username='bench-list', password=None
+        )
+        description = ('lorem ipsum dolor sit amet ' * (description_size // 27 + 1))[:description_size]
+        Ticket.objects.bulk_create([
+            Ticket(
+                title=f'Benchmark ticket {i}',
+                description=description,
+                category=Ticket.CATEGORY_CHOICES[i % 3][0],
+                priority=Ticket.PRIORITY_CHOICES[i % 4][0],
+                created_by=owner,
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+
+    def run(self, repeat):
+        base = Ticket.objects.order_by('-created_at', '-id')
+        cases = [
+            ('TicketSerializer (instances)', lambda: TicketSerializer(
+                base.select_related('created_by'), many=True).data),
+            ('TicketListSerializer (projection)', lambda: TicketListSerializer(
+                TicketListSerializer.project(base), many=True).data),
+        ]
+
+        for label, build in cases:
+            best = None
+            for _ in range(repeat):
+                tracemalloc.start()
+                started = time.perf_counter()
+                rows = len(build())
+                elapsed = time.perf_counter() - started
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                if best is None or elapsed < best[1]:
+                    best = (rows, elapsed, peak)
+
+            rows, elapsed, peak = best
+            self.stdout.write(
+                f"{label:<36} {rows} rows  {rows / elapsed:>10.0f} rows/s  "
+                f"peak {peak / 1024 / 1024:>7.1f} MiB"
+            )
@@ -0,0 +1,142 @@
+import itertools
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from tickets.models import User
+from tickets.pagination import TicketCursorPagination
+from tickets.views import TicketViewSet
+
+# Combinaisons de filtres exposées par TicketViewSet.get_queryset
+FILTER_VALUES = {
+    'status': 'New',
+    'category': 'Technical',
+}
+
+SEARCH_QUERY = 'printer'
+
+# Motifs interdits dans le plan, par moteur
+PLAN_RULES = {
+    'sqlite': [
+        (re.compile(r'\bSCAN (tickets_ticket|auth_user)\b(?! USING)(?!_)'), 'full table scan'),
+        (re.compile(r'USE TEMP B-TREE FOR ORDER BY'), 'temp B-tree sort'),
+    ],
+    'postgresql': [
+        (re.compile(r'Seq Scan on (tickets_ticket|auth_user)\b'), 'full table scan'),
+        (re.compile(r'(?<![\w-])Sort(?: Key)?\b'), 'explicit sort'),
+    ],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Exécute EXPLAIN sur chaque combinaison liste/filtre/recherche de l'API tickets "
+        "et échoue si une requête retombe sur un scan complet ou un tri temporaire"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--verbose-plans', action='store_true', help="Affiche chaque plan")
+
+    def handle(self, *args, **options):
+        using = options['database']
+        connection = connections[using]
+        rules = PLAN_RULES.get(connection.vendor)
+        if rules is None:
+            raise CommandError(f"No plan rules for database vendor '{connection.vendor}'")
+
+        failures = []
+        checked = 0
+        with transaction.atomic(using=using):
+            if connection.vendor == 'postgresql':
+                # Sur une petite table le planificateur préfère toujours un Seq Scan
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for label, queryset, allow_sort in self.get_cases():
+                plan = queryset.using(using).explain()
+                checked += 1
+                if options['verbose_plans']:
+                    self.stdout.write(f"--- {label}\n{plan}")
+                for pattern, problem in rules:
+                    if allow_sort and problem != 'full table scan':
+                        continue
+                    if pattern.search(plan):
+                        failures.append((label, problem, plan))
+
+        for label, problem, plan in failures:
+            self.stderr.write(f"[{problem}] {label}\n{plan}\n")
+
+        if failures:
+            raise CommandError(f"{len(failures)} of {checked} query plan(s) regressed")
+        self.stdout.write(self.style.SUCCESS(f"{checked} query plans use indexes"))
+
+    # ============ CAS VÉRIFIÉS ============
+    def get_cases(self):
+        paginator = TicketCursorPagination()
+        scopes = {
+            'admin': User(pk=1, role='admin'),
+            'owner': User(pk=1, role='user'),
+        }
+        orderings = [key for key in paginator.orderings if key != paginator.relevance_ordering]
+        filter_sets = [
+            combo
+            for size in range(len(FILTER_VALUES) + 1)
+            for combo in itertools.combinations(FILTER_VALUES, size)
+        ]
+
+        for (scope, user), filters, ordering in itertools.product(scopes.items(), filter_sets, orderings):
+            params = {name: FILTER_VALUES[name] for name in filters}
+            params['ordering'] = ordering
+            if ordering.lstrip('-') == 'due_date':
+                # Tri par échéance adossé aux index partiels : file SLA (?sla=open)
+                params['sla'] = 'open'
+            yield from self.page_cases(paginator, scope, user, params)
+
+        # File SLA : tickets en retard, le plus ancien retard d'abord (index partiels)
+        for (scope, user), filters in itertools.product(scopes.items(), filter_sets):
+            params = {name: FILTER_VALUES[name] for name in filters}
+            params.update(overdue='true', ordering='due_date')
+            yield from self.page_cases(paginator, scope, user, params)
+
+        # Recherche : la requête part de l'index plein texte et trie les seules
+        # correspondances, un tri est donc attendu ; la table des tickets doit
+        # en revanche rester accédée par clé primaire
+        for (scope, user), filters in itertools.product(scopes.items(), filter_sets):
+            params = {name: FILTER_VALUES[name] for name in filters}
+            params['search'] = SEARCH_QUERY
+            yield from self.page_cases(paginator, scope, user, params, allow_sort=True)
+            params['ordering'] = paginator.default_ordering
+            yield from self.page_cases(paginator, scope, user, params, allow_sort=True)
+
+    def page_cases(self, paginator, scope, user, params, allow_sort=False):
+        """Première page et page suivante (prédicat keyset) pour un jeu de paramètres"""
+        request = Request(APIRequestFactory().get('/api/auth/tickets/', params))
+        request.user = user
+        view = TicketViewSet(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+
+        queryset = view.get_queryset()
+        ordering = paginator.get_ordering(request)
+        label = f"{scope} {params}"
+        size = paginator.page_size + 1
+
+        nullable = paginator.get_nullable_fields(view)
+        ordered = paginator.order_by(queryset, ordering, nullable=nullable)
+        yield f"{label} first page", ordered[:size], allow_sort
+
+        position = [self.sample_value(name) for name in ordering]
+        next_page = ordered.filter(paginator._after(ordering, position, nullable=nullable))
+        yield f"{label} next page", next_page[:size], allow_sort
+
+    @staticmethod
+    def sample_value(name):
+        name = name.lstrip('-')
+        if name.endswith('_at') or name == 'due_date':
+            return timezone.now()
+        if name == 'search_rank':
+            return 0.0
+        return 1
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from tickets import authentication
+from tickets.models import Ticket, User
+from tickets.serializers import CustomTokenObtainPairSerializer
+from tickets.views import TicketViewSet
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Vérifie les permissions de modification des tickets avec de vrais jetons JWT "
+        "(authentification sans requête utilisateur) : PATCH / PUT admin acceptés, "
+        "refusés aux autres, jeton révoqué quand is_staff change. Les données de test "
+        "sont créées dans une transaction annulée."
+    )
+
+    def handle(self, *args, **options):
+        self.user_ids = []
+        failures = []
+        try:
+            with transaction.atomic():
+                failures = self.run_checks()
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            # Versions des utilisateurs annulés : pas de reste dans le cache
+            for user_id in self.user_ids:
+                authentication.forget_auth_version(user_id)
+
+        for failure in failures:
+            self.stderr.write(f"FAIL {failure}")
+        if failures:
+            raise CommandError(f"{len(failures)} check(s) failed")
+        self.stdout.write(self.style.SUCCESS("Ticket update permissions match the token claims"))
+
+    def run_checks(self):
+        admin = User.objects.create_user(
+            email='permissions-admin@example.com', username='permissions-admin', password=None,
+            role='admin', is_staff=True, is_superuser=True,
+        )
+        owner = User.objects.create_user(
+            email='permissions-owner@example.com', username='permissions-owner', password=None,
+        )
+        ticket = Ticket.objects.create(
+            title='Permission check', description='permissions', category='Technical', created_by=owner,
+        )
+        self.user_ids = [admin.pk, owner.pk]
+        tokens = {user.pk: str(CustomTokenObtainPairSerializer.get_token(user).access_token) for user in (admin, owner)}
+
+        failures = []
+        cases = [
+            ('admin PATCH', admin, 'patch', {'status': 'Under Review'}, 200),
+            ('admin PUT', admin, 'put', {'status': 'Resolved'}, 200),
+            ('owner PATCH', owner, 'patch', {'status': 'Resolved'}, 403),
+        ]
+        for label, user, method, data, expected in cases:
+            status_code = self.update(method, ticket, tokens[user.pk], data)
+            self.stdout.write(f"{label:<12} {status_code}")
+            if status_code != expected:
+                failures.append(f"{label}: expected {expected}, got {status_code}")
+
+        # is_staff retiré : le jeton émis avant ne donne plus accès
+        admin.is_staff = False
+        admin.save()
+        # La nouvelle version est publiée au commit, jamais atteint ici
+        authentication.forget_auth_version(admin.pk)
+        status_code = self.update('patch', ticket, tokens[admin.pk], {'status': 'New'})
+        self.stdout.write(f"{'demoted':<12} {status_code}")
+        if status_code != 401:
+            failures.append(f"demoted admin: expected 401, got {status_code}")
+        return failures
+
+    def update(self, method, ticket, token, data):
+        request = getattr(APIRequestFactory(), method)(
+            f'/api/auth/tickets/{ticket.pk}/', data, format='json', HTTP_AUTHORIZATION=f'Bearer {token}',
+        )
+        action = 'partial_update' if method == 'patch' else 'update'
+        view = TicketViewSet.as_view({method: action})
+        return view(request, pk=ticket.pk).status_code
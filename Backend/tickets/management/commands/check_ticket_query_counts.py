@@ -0,0 +1,106 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from tickets.models import Ticket, User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Vérifie que Ticket.to_dict() sur Ticket.objects.with_api_fields(user) fait le même "
+        "nombre de requêtes quel que soit le nombre de lignes, et donne le même résultat "
+        "que le calcul Python. Les données de test sont créées dans une transaction annulée."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20, help="Petit jeu (le grand en a 10 fois plus)")
+
+    def handle(self, *args, **options):
+        small = options['rows']
+        failures = []
+        try:
+            with transaction.atomic():
+                users = self.seed(small * 10)
+                ordered = Ticket.objects.order_by('-created_at', '-id')
+                for user in users:
+                    now = timezone.now()
+                    counts = [self.count_queries(ordered.with_api_fields(user, now)[:n], user) for n in (small, small * 10)]
+                    naive = self.count_queries(ordered[:small * 10], user)
+                    self.stdout.write(
+                        f"{user.role:<6} with_api_fields: {counts[0]} queries for {small} rows, "
+                        f"{counts[1]} for {small * 10} rows (without: {naive})"
+                    )
+                    if counts[0] != counts[1]:
+                        failures.append(f"{user.role}: query count grows with rows ({counts[0]} -> {counts[1]})")
+                    failures.extend(self.compare(ordered, user, now))
+                raise Rollback
+        except Rollback:
+            pass
+
+        for failure in failures:
+            self.stderr.write(f"FAIL {failure}")
+        if failures:
+            raise CommandError(f"{len(failures)} check(s) failed")
+        self.stdout.write(self.style.SUCCESS("Ticket.to_dict() runs in a constant number of queries"))
+
+    def seed(self, rows):
+        owner, other, admin = (
+            User.objects.create_user(email=f'query-count-{name}@example.com', username=f'query-count-{name}',
+                                     password=None, role=role)
+            for name, role in (('owner', 'user'), ('other', 'user'), ('admin', 'admin'))
+        )
+        now = timezone.now()
+        names = ['report.pdf', 'photo.JPG', 'sheet.xlsx', 'notes.txt', '']
+        Ticket.objects.bulk_create([
+            Ticket(
+                title=f'Query count ticket {i}',
+                description='query count',
+                category=Ticket.CATEGORY_CHOICES[i % 3][0],
+                status=Ticket.STATUS_CHOICES[i % 3][0],
+                priority=Ticket.PRIORITY_CHOICES[i % 4][0],
+                created_by=owner if i % 2 else other,
+                assigned_to=admin if i % 3 else None,
+                resolved_by=admin if i % 3 == 2 else None,
+                due_date=now + timedelta(hours=i % 5 - 2),
+                attachment=f'tickets/query-count-{i}' if names[i % 5] else None,
+                attachment_name=names[i % 5],
+                attachment_url=f'https://example.com/query-count-{i}' if names[i % 5] else '',
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+        return owner, admin
+
+    def count_queries(self, queryset, user):
+        with CaptureQueriesContext(connection) as context:
+            for ticket in queryset:
+                ticket.to_dict(user)
+        return len(context.captured_queries)
+
+    def compare(self, ordered, user, now):
+        """Annotations SQL contre le calcul Python du même ticket"""
+        failures = []
+        plain = {ticket.id: ticket for ticket in ordered}
+        for ticket in ordered.with_api_fields(user, now):
+            reference = plain[ticket.id]
+            expected = {
+                'can_edit': reference.can_user_edit(user),
+                'can_delete': reference.can_user_delete(user),
+                'is_overdue': bool(reference.due_date and reference.status != 'Resolved' and now > reference.due_date),
+                'type': reference.get_file_type(),
+            }
+            actual = {
+                'can_edit': ticket.api_can_edit,
+                'can_delete': ticket.api_can_delete,
+                'is_overdue': ticket.is_overdue(),
+                'type': ticket.get_file_type(),
+            }
+            if actual != expected:
+                failures.append(f"{user.role}: ticket {ticket.id} {actual} != {expected}")
+        return failures
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from tickets import blobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule le nombre de références des pièces jointes dédupliquées depuis "
+        "les tickets et supprime les blobs (et fichiers stockés) qui n'en avaient déjà plus "
+        "(un compteur ramené à 0 est traité au passage suivant)"
+    )
+
+    def handle(self, *args, **options):
+        fixed, deleted = blobs.collect_garbage()
+        self.stdout.write(self.style.SUCCESS(
+            f"Fixed {fixed} reference count(s), deleted {deleted} unreferenced blob(s)"
+        ))
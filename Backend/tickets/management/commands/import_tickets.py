@@ -0,0 +1,103 @@
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets import imports
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe des tickets depuis un fichier CSV ou JSONL (gzip accepté), par lots : "
+        "validation groupée, bulk_create dans une transaction par lot, reprise après "
+        "le dernier lot validé, lignes rejetées écrites dans un fichier à part. Un seul "
+        "événement (reset) en fin d'import, sauf --publish-events. Invalidation du cache "
+        "et événements n'atteignent le serveur qu'avec un cache et un broker partagés "
+        "(Redis / Memcached, tickets.events.CacheBroker) : avertissement sinon."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier .csv, .jsonl ou .ndjson (éventuellement .gz)")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], default=None,
+                            help="Format du fichier (par défaut d'après l'extension)")
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=None,
+            help="Lignes par lot et par transaction (par défaut TICKET_IMPORT_CHUNK_SIZE)",
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help="Lignes par INSERT (par défaut TICKET_IMPORT_BATCH_SIZE)",
+        )
+        parser.add_argument('--rejects', default=None,
+                            help="Fichier JSONL des lignes rejetées (par défaut <path>.rejects.jsonl)")
+        parser.add_argument('--checkpoint', default=None,
+                            help="Nom du point de reprise (par défaut le chemin absolu du fichier)")
+        parser.add_argument('--restart', action='store_true',
+                            help="Ignore le point de reprise et reprend au début du fichier")
+        parser.add_argument('--create-users', action='store_true',
+                            help="Crée les utilisateurs inconnus (sans mot de passe utilisable)")
+        parser.add_argument('--publish-events', action='store_true',
+                            help="Publie un événement ticket.created par ticket importé (petits imports)")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"File '{path}' does not exist")
+        try:
+            fmt = options['format'] or imports.detect_format(path)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for backend in imports.process_local_backends():
+            self.stderr.write(self.style.WARNING(
+                f"Warning: {backend} is local to this process, the server will not "
+                "receive this import's updates to it"
+            ))
+
+        checkpoint = imports.get_checkpoint(options['checkpoint'] or os.path.abspath(path), options['restart'])
+        skipped = checkpoint.rows_read
+        if skipped:
+            self.stdout.write(f"Resuming after row {skipped} ({checkpoint.imported} imported so far)")
+
+        chunk_size = options['chunk_size'] or imports.get_chunk_size()
+        users = imports.UserMap(create=options['create_users'])
+        rows = islice(imports.read_rows(path, fmt), skipped, None)
+        number = skipped
+        started = time.perf_counter()
+
+        rejects_path = options['rejects'] or f"{path}.rejects.jsonl"
+        imported = checkpoint.imported
+        with imports.keep_timestamps(), imports.open_rejects(rejects_path, checkpoint) as rejects_file:
+            while True:
+                chunk = list(enumerate(islice(rows, chunk_size), start=number + 1))
+                if not chunk:
+                    break
+                number += len(chunk)
+
+                tickets, rejects = imports.validate(chunk, users)
+                # Rejets sur disque avant le commit du lot
+                rejects_offset = imports.write_rejects(rejects_file, rejects)
+                imports.save_chunk(
+                    checkpoint, tickets, len(chunk), len(rejects), rejects_offset,
+                    publish_events=options['publish_events'], batch_size=options['batch_size'],
+                )
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{checkpoint.rows_read} rows read, {checkpoint.imported} imported, "
+                    f"{checkpoint.rejected} rejected ({(number - skipped) / elapsed:.0f} rows/s)"
+                )
+
+        if not options['publish_events']:
+            imports.announce(checkpoint.imported - imported)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {checkpoint.imported} ticket(s), rejected {checkpoint.rejected} "
+            f"(see {rejects_path}) in {elapsed:.2f}s, {(number - skipped) / max(elapsed, 1e-9):.0f} rows/s"
+        ))
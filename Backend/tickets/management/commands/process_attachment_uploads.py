@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets.models import Ticket
+from tickets.uploads import uploader
+
+
+class Command(BaseCommand):
+    help = (
+        "Reprend les uploads de pièces jointes restés en attente (processus arrêté "
+        "pendant l'upload) et attend leur fin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry-failed',
+            action='store_true',
+            help="Relance aussi les uploads en échec dont le fichier est encore en staging",
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=None,
+            help="Durée maximale d'attente, en secondes",
+        )
+
+    def handle(self, *args, **options):
+        states = ('pending', 'failed') if options['retry_failed'] else ('pending',)
+        queued = uploader.requeue(states)
+        self.stdout.write(f"Queued {queued} attachment upload(s)")
+        if not uploader.wait(options['timeout']):
+            raise CommandError("Timed out while uploads were still running")
+
+        remaining = {
+            state: Ticket.objects.filter(attachment_state=state).count()
+            for state in ('pending', 'failed')
+        }
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {remaining['pending']} pending, {remaining['failed']} failed"
+        ))
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from tickets import sync
+
+
+class Command(BaseCommand):
+    help = (
+        "Purge les tombstones des tickets supprimés plus anciennes que la rétention "
+        "(TICKET_TOMBSTONE_RETENTION_DAYS). Les clients dont le curseur est antérieur "
+        "devront se resynchroniser entièrement."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help="Rétention en jours (par défaut TICKET_TOMBSTONE_RETENTION_DAYS)",
+        )
+
+    def handle(self, *args, **options):
+        older_than = timedelta(days=options['days']) if options['days'] is not None else None
+        deleted = sync.prune_tombstones(older_than)
+        self.stdout.write(self.style.SUCCESS(
+            f"Pruned {deleted} tombstone(s), cursors before change {sync.pruned_through()} have expired"
+        ))
@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tickets import deletion
+
+
+class Command(BaseCommand):
+    help = (
+        "Supprime définitivement les tickets supprimés logiquement, par lots bornés "
+        "(une transaction courte par lot), puis leurs fichiers stockés devenus inutiles "
+        "par appels groupés avec nouvelles tentatives."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help="Tickets par lot (par défaut TICKET_PURGE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            default=None,
+            help="Nombre maximal de lots pour cette exécution",
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=None,
+            help="Pause entre deux lots, en secondes (par défaut TICKET_PURGE_PAUSE)",
+        )
+        parser.add_argument(
+            '--watch',
+            type=float,
+            default=None,
+            metavar='SECONDS',
+            help="Worker : recommence toutes les SECONDS secondes au lieu de s'arrêter",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            purged, files = deletion.purge(
+                batch_size=options['batch_size'],
+                max_batches=options['max_batches'],
+                pause=options['pause'],
+            )
+            if purged or options['watch'] is None:
+                self.stdout.write(self.style.SUCCESS(
+                    f"Purged {purged} ticket(s) and {files} stored file(s) "
+                    f"in {time.perf_counter() - started:.2f}s"
+                ))
+            if options['watch'] is None:
+                return
+            time.sleep(options['watch'])
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tickets.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index de recherche plein texte des tickets"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help="Alias de la base à réindexer")
+
+    def handle(self, *args, **options):
+        using = options['database']
+        backend = get_search_backend(using)
+        backend.rebuild(connections[using])
+        self.stdout.write(self.style.SUCCESS(
+            f"Search index rebuilt ({connections[using].vendor})"
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from tickets import counters
+
+
+class Command(BaseCommand):
+    help = "Recalcule les compteurs de tickets (statistiques du tableau de bord) depuis la table des tickets"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help="Vérifie seulement la cohérence des compteurs sans les modifier",
+        )
+
+    def handle(self, *args, **options):
+        if options['check']:
+            mismatches = counters.check_consistency()
+            for (owner_id, status, category, priority), expected, stored in mismatches:
+                scope = owner_id if owner_id is not None else 'all'
+                self.stdout.write(
+                    f"{scope} / {status} / {category} / {priority}: expected {expected}, stored {stored}"
+                )
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} counter(s) out of sync, run without --check to rebuild")
+            self.stdout.write(self.style.SUCCESS("Ticket counters are consistent"))
+            return
+
+        rows = counters.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} ticket counter row(s)"))
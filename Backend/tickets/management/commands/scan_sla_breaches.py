@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tickets import sla
+
+
+class Command(BaseCommand):
+    help = (
+        "Signale les tickets devenus en retard depuis le passage précédent "
+        "(événement ticket.overdue), par lecture de la plage d'échéances écoulée."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch',
+            type=float,
+            default=None,
+            metavar='SECONDS',
+            help="Worker : recommence toutes les SECONDS secondes au lieu de s'arrêter",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            rows = sla.scan_breaches()
+            for row in rows:
+                self.stdout.write(f"Ticket #{row['id']} overdue since {row['due_date'].isoformat()}")
+            if rows or options['watch'] is None:
+                self.stdout.write(self.style.SUCCESS(f"{len(rows)} newly overdue ticket(s)"))
+            if options['watch'] is None:
+                return
+            time.sleep(options['watch'])
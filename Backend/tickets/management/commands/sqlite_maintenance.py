@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from tickets import sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintenance d'une base SQLite en WAL : checkpoint (recopie et vide le fichier WAL) "
+        "puis PRAGMA optimize (statistiques du planificateur). À lancer périodiquement."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--mode',
+            choices=sqlite.CHECKPOINT_MODES,
+            default='TRUNCATE',
+            help="Mode du checkpoint (TRUNCATE remet le WAL à zéro)",
+        )
+        parser.add_argument(
+            '--watch',
+            type=float,
+            default=None,
+            metavar='SECONDS',
+            help="Worker : recommence toutes les SECONDS secondes au lieu de s'arrêter",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"Database '{options['database']}' is not SQLite ({connection.vendor})")
+
+        while True:
+            started = time.perf_counter()
+            busy, wal_pages, checkpointed = sqlite.checkpoint(connection, options['mode'])
+            sqlite.optimize(connection)
+            if wal_pages < 0:
+                message = "Database is not in WAL mode, optimized only"
+            else:
+                message = (
+                    f"Checkpoint {options['mode']}: {checkpointed}/{wal_pages} WAL page(s) copied"
+                    + (" (blocked by a reader or writer)" if busy else "")
+                )
+            self.stdout.write(self.style.SUCCESS(f"{message} in {time.perf_counter() - started:.2f}s"))
+            if options['watch'] is None:
+                return
+            # Pas de connexion gardée ouverte entre deux passages
+            connection.close()
+            time.sleep(options['watch'])
@@ -0,0 +1,49 @@
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from tickets import routing
+
+
+class Command(BaseCommand):
+    help = (
+        "Développement : recopie la base SQLite principale dans les réplicas SQLite "
+        "(DATABASE_REPLICA_URLS=sqlite:///...) par l'API de sauvegarde, une fois ou "
+        "toutes les --watch secondes (retard de réplication simulé)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch',
+            type=float,
+            default=None,
+            metavar='SECONDS',
+            help="Worker : recommence toutes les SECONDS secondes au lieu de s'arrêter",
+        )
+
+    def handle(self, *args, **options):
+        primary = connections[routing.PRIMARY]
+        replicas = [connections[alias] for alias in routing.get_replicas()]
+        if primary.vendor != 'sqlite' or not replicas or any(replica.vendor != 'sqlite' for replica in replicas):
+            raise CommandError("Needs a SQLite primary database and SQLite replicas (DATABASE_REPLICA_URLS)")
+
+        while True:
+            started = time.perf_counter()
+            primary.ensure_connection()
+            for replica in replicas:
+                replica.close()
+                target = sqlite3.connect(replica.settings_dict['NAME'])
+                try:
+                    primary.connection.backup(target)
+                finally:
+                    target.close()
+            self.stdout.write(self.style.SUCCESS(
+                f"Copied {primary.settings_dict['NAME']} to {len(replicas)} replica(s) "
+                f"in {time.perf_counter() - started:.2f}s"
+            ))
+            if options['watch'] is None:
+                return
+            primary.close()
+            time.sleep(options['watch'])
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_counters(apps, schema_editor):
+    Ticket = apps.get_model('tickets', 'Ticket')
+    TicketCounter = apps.get_model('tickets', 'TicketCounter')
+    counts = {}
+    rows = (
+        Ticket.objects.order_by()
+        .values('created_by_id', 'status', 'category', 'priority')
+        .annotate(n=models.Count('id'))
+    )
+    for row in rows:
+        scope = (row['status'], row['category'], row['priority'])
+        for owner_id in (row['created_by_id'], None):
+            counts[(owner_id,) + scope] = counts.get((owner_id,) + scope, 0) + row['n']
+    TicketCounter.objects.bulk_create([
+        TicketCounter(owner_id=owner_id, status=status, category=category, priority=priority, count=n)
+        for (owner_id, status, category, priority), n in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0003_ticket_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('New', 'New'), ('Under Review', 'Under Review'), ('Resolved', 'Resolved')], max_length=20)),
+                ('category', models.CharField(choices=[('Technical', 'Technical'), ('Financial', 'Financial'), ('Product', 'Product')], max_length=20)),
+                ('priority', models.CharField(choices=[('Low', 'Low'), ('Medium', 'Medium'), ('High', 'High'), ('Urgent', 'Urgent')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ticket_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ticket Counter',
+                'verbose_name_plural': 'Ticket Counters',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='ticketcounter',
+            constraint=models.UniqueConstraint(fields=('owner', 'status', 'category', 'priority'), name='unique_ticket_counter_scope'),
+        ),
+        migrations.AddConstraint(
+            model_name='ticketcounter',
+            constraint=models.UniqueConstraint(condition=models.Q(('owner__isnull', True)), fields=('status', 'category', 'priority'), name='unique_ticket_counter_global'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-17 06:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0006_composite_ticket_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='attachment_download_url',
+            field=models.URLField(blank=True, max_length=500, verbose_name='Attachment Download URL'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='attachment_format',
+            field=models.CharField(blank=True, max_length=20, verbose_name='Attachment Format'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='attachment_public_id',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Attachment Public ID'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='attachment_resource_type',
+            field=models.CharField(blank=True, max_length=20, verbose_name='Attachment Resource Type'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='attachment_url',
+            field=models.URLField(blank=True, max_length=500, verbose_name='Attachment URL'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='attachment_view_url',
+            field=models.URLField(blank=True, max_length=500, verbose_name='Attachment View URL'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0008_user_auth_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticketstatushistory',
+            name='changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='ticketstatushistory',
+            name='ticket',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='status_history', to='tickets.ticket'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketstatushistory',
+            index=models.Index(fields=['ticket', '-changed_at'], name='tickets_history_timeline_idx'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:13
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_status_history_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+                ('pruned_through', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Ticket Change Sequence',
+            },
+        ),
+        migrations.CreateModel(
+            name='TicketTombstone',
+            fields=[
+                ('ticket_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('owner_id', models.BigIntegerField(null=True)),
+                ('change_seq', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Ticket Tombstone',
+                'verbose_name_plural': 'Ticket Tombstones',
+            },
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='change_seq',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Change Sequence'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['change_seq', 'id'], name='tickets_tic_change__da8428_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['created_by', 'change_seq', 'id'], name='tickets_tic_created_b19053_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tickettombstone',
+            index=models.Index(fields=['change_seq', 'ticket_id'], name='tickets_tic_change__6b3393_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tickettombstone',
+            index=models.Index(fields=['owner_id', 'change_seq', 'ticket_id'], name='tickets_tic_owner_i_fd916d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tickettombstone',
+            index=models.Index(fields=['deleted_at'], name='tickets_tic_deleted_e75c9b_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:15
+
+from django.db import migrations, models
+
+
+def mark_existing_attachments(apps, schema_editor):
+    """Les pièces jointes existantes ont été uploadées pendant la requête"""
+    Ticket = apps.get_model('tickets', 'Ticket')
+    Ticket.objects.exclude(attachment__isnull=True).exclude(attachment='').update(attachment_state='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0010_ticket_change_sync'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='attachment_staged_path',
+            field=models.CharField(blank=True, editable=False, max_length=500, verbose_name='Staged Attachment Path'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='attachment_state',
+            field=models.CharField(choices=[('none', 'No Attachment'), ('pending', 'Upload Pending'), ('ready', 'Ready'), ('failed', 'Upload Failed')], default='none', max_length=10, verbose_name='Attachment State'),
+        ),
+        migrations.RunPython(mark_existing_attachments, migrations.RunPython.noop),
+    ]
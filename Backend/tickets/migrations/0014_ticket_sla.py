@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-17 07:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0013_ticket_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSlaScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scanned_through', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Ticket SLA Scan',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), models.Q(('status', 'Resolved'), _negated=True), ('deleted_at__isnull', True)), fields=['due_date', 'id'], name='tickets_ticket_sla_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), models.Q(('status', 'Resolved'), _negated=True), ('deleted_at__isnull', True)), fields=['created_by', 'due_date', 'id'], name='tickets_ticket_sla_owner_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), models.Q(('status', 'Resolved'), _negated=True), ('deleted_at__isnull', True)), fields=['status', 'due_date', 'id'], name='tickets_ticket_sla_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), models.Q(('status', 'Resolved'), _negated=True), ('deleted_at__isnull', True)), fields=['category', 'due_date', 'id'], name='tickets_ticket_sla_cat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('due_date__isnull', False), models.Q(('status', 'Resolved'), _negated=True), ('deleted_at__isnull', True)), fields=['status', 'category', 'due_date', 'id'], name='tickets_ticket_sla_st_cat_idx'),
+        ),
+    ]
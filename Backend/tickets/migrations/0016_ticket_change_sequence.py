@@ -0,0 +1,58 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:04
+
+from django.db import migrations, models
+import django.utils.timezone
+
+SEQUENCE = 'tickets_change_seq'
+
+# PostgreSQL : séquence sans verrou (TicketChangeSequence.next_value), reprise
+# après le plus grand numéro déjà donné
+POSTGRES_FORWARD = [
+    f"CREATE SEQUENCE IF NOT EXISTS {SEQUENCE} AS bigint",
+    f"""
+    SELECT setval('{SEQUENCE}', GREATEST(
+        (SELECT COALESCE(MAX(value), 0) FROM tickets_ticketchangesequence),
+        (SELECT COALESCE(MAX(change_seq), 0) FROM tickets_ticket),
+        (SELECT COALESCE(MAX(change_seq), 0) FROM tickets_tickettombstone)
+    ) + 1, false)
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    f"""
+    INSERT INTO tickets_ticketchangesequence (id, value, pruned_through)
+    SELECT 1, CASE WHEN is_called THEN last_value ELSE last_value - 1 END, 0 FROM {SEQUENCE}
+    ON CONFLICT (id) DO UPDATE SET value = EXCLUDED.value
+    """,
+    f"DROP SEQUENCE IF EXISTS {SEQUENCE}",
+]
+
+
+def _run(statements_by_vendor):
+    def run(apps, schema_editor):
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0015_ticket_import_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Changed At'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['changed_at'], name='tickets_tic_changed_a4a3df_idx'),
+        ),
+        migrations.RunPython(
+            _run({'postgresql': POSTGRES_FORWARD}),
+            _run({'postgresql': POSTGRES_BACKWARD}),
+        ),
+    ]
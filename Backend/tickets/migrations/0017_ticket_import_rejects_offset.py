@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 08:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0016_ticket_change_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketimportcheckpoint',
+            name='rejects_offset',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
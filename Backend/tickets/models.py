@@ -1,8 +1,13 @@
-from django.db import models
+from django.db import connections, models, router, transaction
 from django.contrib.auth.models import AbstractUser
 from django.conf import settings
+from django.utils import timezone
+from cloudinary import CloudinaryResource
 from cloudinary.models import CloudinaryField
 import cloudinary
+import logging
+
+logger = logging.getLogger(__name__)
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -10,8 +15,14 @@ class User(AbstractUser):
         ('user', 'User'),
     )
     
+    # Champs recopiés dans les jetons JWT (ou qui les rendent invalides)
+    TOKEN_FIELDS = ('role', 'email', 'username', 'is_active', 'is_staff', 'is_superuser', 'password')
+    
     role = models.CharField(max_length=10, choices=ROLE_CHOICES, default='user')
     email = models.EmailField(unique=True)
+    # Version des jetons : incrémentée quand un champ de TOKEN_FIELDS change,
+    # ce qui révoque les jetons émis avant (voir tickets/authentication.py)
+    auth_version = models.PositiveIntegerField(default=1)
     
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
@@ -22,9 +33,141 @@ class User(AbstractUser):
     def is_admin(self):
         return self.role == 'admin'
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Garde les valeurs chargées pour détecter les changements au save"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        if self.token_fields_changed(kwargs.get('update_fields')):
+            self.auth_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'auth_version'}
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields
+        }
+    
+    def token_fields_changed(self, update_fields=None):
+        if self._state.adding or self.pk is None:
+            return False
+        fields = self.TOKEN_FIELDS
+        if update_fields is not None:
+            fields = [name for name in fields if name in update_fields]
+            if not fields:
+                # Ex. save(update_fields=['last_login']) à chaque connexion
+                return False
+        
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None or any(name not in loaded for name in fields):
+            loaded = type(self).objects.filter(pk=self.pk).values(*fields).first()
+            if loaded is None:
+                return False
+        return any(getattr(self, name) != loaded[name] for name in fields)
+    
     class Meta:
         db_table = 'auth_user'
 
+# Tickets suivis par le SLA : non résolus, avec une échéance (index partiel)
+SLA_OPEN_CONDITION = (
+    models.Q(due_date__isnull=False)
+    & ~models.Q(status='Resolved')
+    & models.Q(deleted_at__isnull=True)
+)
+
+# Type de fichier par extension (Ticket.get_file_type et annotation api_file_type)
+FILE_TYPES = {
+    'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image', 'webp': 'image', 'bmp': 'image',
+    'pdf': 'pdf',
+    'doc': 'word', 'docx': 'word',
+    'xls': 'excel', 'xlsx': 'excel',
+}
+
+class TicketQuerySet(models.QuerySet):
+    """Retard et âge des tickets calculés en SQL (filtres, tris, annotations)"""
+    
+    def sla_open(self):
+        """Tickets non résolus avec échéance : lus par l'index partiel sur due_date"""
+        return self.filter(SLA_OPEN_CONDITION)
+    
+    def overdue(self, now=None):
+        return self.sla_open().filter(due_date__lt=now or timezone.now())
+    
+    def not_overdue(self, now=None):
+        return self.filter(
+            models.Q(due_date__isnull=True)
+            | models.Q(status='Resolved')
+            | models.Q(due_date__gte=now or timezone.now())
+        )
+    
+    def aged(self, min_age=None, max_age=None, now=None):
+        """Tickets créés il y a au moins `min_age` / au plus `max_age` (timedelta)"""
+        now = now or timezone.now()
+        queryset = self
+        if min_age is not None:
+            queryset = queryset.filter(created_at__lte=now - min_age)
+        if max_age is not None:
+            queryset = queryset.filter(created_at__gte=now - max_age)
+        return queryset
+    
+    def with_sla(self, now=None):
+        """Annotations `overdue` (booléen) et `age` (durée depuis la création)"""
+        now = now or timezone.now()
+        return self.annotate(
+            overdue=models.Case(
+                models.When(
+                    models.Q(due_date__lt=now) & ~models.Q(status='Resolved'),
+                    then=models.Value(True),
+                ),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            ),
+            age=models.ExpressionWrapper(
+                models.Value(now, output_field=models.DateTimeField()) - models.F('created_at'),
+                output_field=models.DurationField(),
+            ),
+        )
+
+    def with_api_fields(self, user, now=None):
+        """
+        Tout ce que Ticket.to_dict(user) lit, en une requête : les trois
+        utilisateurs joints, droits de `user` (api_can_edit / api_can_delete),
+        retard et âge (with_sla) et type de fichier (api_file_type). Les URLs
+        de la pièce jointe sont les colonnes précalculées à l'upload.
+        """
+        if user.role == 'admin':
+            allowed = models.Value(True)
+        else:
+            allowed = models.Case(
+                models.When(created_by_id=user.id, status='New', then=models.Value(True)),
+                default=models.Value(False),
+                output_field=models.BooleanField(),
+            )
+        return self.select_related('created_by', 'assigned_to', 'resolved_by').with_sla(now).annotate(
+            api_can_edit=allowed,
+            api_can_delete=allowed,
+            api_file_type=models.Case(
+                *[
+                    models.When(
+                        models.Q(attachment_name__iendswith=f'.{ext}') | models.Q(attachment_name__iexact=ext),
+                        then=models.Value(file_type),
+                    )
+                    for ext, file_type in FILE_TYPES.items()
+                ],
+                models.When(attachment_name='', then=models.Value(None)),
+                default=models.Value('other'),
+                output_field=models.CharField(),
+            ),
+        )
+
+class TicketManager(models.Manager.from_queryset(TicketQuerySet)):
+    """Manager par défaut : les tickets supprimés (deleted_at) sont masqués"""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 class Ticket(models.Model):
     # ============ CATÉGORIES ET STATUTS ============
     CATEGORY_CHOICES = [
@@ -39,6 +182,13 @@ class Ticket(models.Model):
         ('Resolved', 'Resolved'),
     ]
     
+    ATTACHMENT_STATE_CHOICES = [
+        ('none', 'No Attachment'),
+        ('pending', 'Upload Pending'),
+        ('ready', 'Ready'),
+        ('failed', 'Upload Failed'),
+    ]
+    
     PRIORITY_CHOICES = [
         ('Low', 'Low'),
         ('Medium', 'Medium'),
@@ -100,12 +250,84 @@ class Ticket(models.Model):
         verbose_name="File Size (bytes)"
     )
     
+    # Métadonnées et URLs calculées une seule fois, à l'upload
+    # (voir refresh_attachment_fields / backfill_attachment_urls)
+    attachment_public_id = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name="Attachment Public ID"
+    )
+    
+    attachment_format = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name="Attachment Format"
+    )
+    
+    attachment_resource_type = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name="Attachment Resource Type"
+    )
+    
+    attachment_url = models.URLField(
+        max_length=500,
+        blank=True,
+        verbose_name="Attachment URL"
+    )
+    
+    attachment_view_url = models.URLField(
+        max_length=500,
+        blank=True,
+        verbose_name="Attachment View URL"
+    )
+    
+    attachment_download_url = models.URLField(
+        max_length=500,
+        blank=True,
+        verbose_name="Attachment Download URL"
+    )
+    
+    # Upload en arrière-plan (tickets/uploads.py) : fichier d'abord copié en staging local
+    attachment_state = models.CharField(
+        max_length=10,
+        choices=ATTACHMENT_STATE_CHOICES,
+        default='none',
+        verbose_name="Attachment State"
+    )
+    
+    attachment_staged_path = models.CharField(
+        max_length=500,
+        blank=True,
+        editable=False,
+        verbose_name="Staged Attachment Path"
+    )
+    
+    # Déduplication par contenu (tickets/blobs.py) : SHA-256 calculé au staging
+    attachment_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        verbose_name="Attachment SHA-256"
+    )
+    
+    attachment_blob = models.ForeignKey(
+        'AttachmentBlob',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='tickets',
+        verbose_name="Attachment Blob"
+    )
+    
     # ============ RELATIONS ET TIMESTAMPS ============
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name='tickets_created',
-        verbose_name="Created By"
+        verbose_name="Created By",
+        db_index=False  # couvert par les index composites (created_by, ...)
     )
     
     assigned_to = models.ForeignKey(
@@ -148,70 +370,194 @@ class Ticket(models.Model):
         verbose_name="Due Date"
     )
     
+    # Numéro du dernier changement (TicketChangeSequence), pour la synchronisation incrémentale
+    change_seq = models.BigIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Change Sequence"
+    )
+    # Heure de prise du numéro (updated_at peut venir d'un import) : horizon de sync.changes()
+    changed_at = models.DateTimeField(
+        default=timezone.now,
+        editable=False,
+        verbose_name="Changed At"
+    )
+    
+    # Suppression logique (tickets/deletion.py) : ligne purgée plus tard par lots
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name="Deleted At"
+    )
+    
+    # Tickets supprimés : Ticket.objects ne les voit pas, voir Ticket._base_manager
+    objects = TicketManager()
+    
     # ============ META ============
     class Meta:
         ordering = ['-created_at']
         verbose_name = 'Support Ticket'
         verbose_name_plural = 'Support Tickets'
+        # Index composites alignés sur TicketViewSet.get_queryset : colonnes
+        # d'égalité (propriétaire, statut, catégorie) puis colonne de tri et `id`,
+        # pour que chaque page soit lue dans l'ordre de l'index, sans tri.
+        # Vérifiés par `manage.py check_query_plans`.
         indexes = [
-            models.Index(fields=['status']),
-            models.Index(fields=['category']),
             models.Index(fields=['priority']),
-            models.Index(fields=['created_by']),
-            models.Index(fields=['created_at']),
+            # Admin, sans filtre
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['updated_at', 'id']),
+            # Utilisateur : ses propres tickets (sert aussi l'index de la FK)
+            models.Index(fields=['created_by', 'created_at', 'id']),
+            models.Index(fields=['created_by', 'updated_at', 'id']),
+            # Admin, filtré par statut et/ou catégorie
+            models.Index(fields=['status', 'created_at', 'id']),
+            models.Index(fields=['status', 'updated_at', 'id']),
+            models.Index(fields=['category', 'created_at', 'id']),
+            models.Index(fields=['category', 'updated_at', 'id']),
+            models.Index(fields=['status', 'category', 'created_at', 'id']),
+            models.Index(fields=['status', 'category', 'updated_at', 'id']),
+            # Synchronisation incrémentale (tickets/sync.py)
+            models.Index(fields=['change_seq', 'id']),
+            models.Index(fields=['created_by', 'change_seq', 'id']),
+            models.Index(fields=['changed_at']),
+            # File SLA (retards, tri par échéance), index partiels : tickets ouverts
+            # avec échéance uniquement, voir TicketQuerySet.sla_open
+            models.Index(
+                fields=['due_date', 'id'],
+                name='tickets_ticket_sla_due_idx',
+                condition=SLA_OPEN_CONDITION,
+            ),
+            models.Index(
+                fields=['created_by', 'due_date', 'id'],
+                name='tickets_ticket_sla_owner_idx',
+                condition=SLA_OPEN_CONDITION,
+            ),
+            models.Index(
+                fields=['status', 'due_date', 'id'],
+                name='tickets_ticket_sla_status_idx',
+                condition=SLA_OPEN_CONDITION,
+            ),
+            models.Index(
+                fields=['category', 'due_date', 'id'],
+                name='tickets_ticket_sla_cat_idx',
+                condition=SLA_OPEN_CONDITION,
+            ),
+            models.Index(
+                fields=['status', 'category', 'due_date', 'id'],
+                name='tickets_ticket_sla_st_cat_idx',
+                condition=SLA_OPEN_CONDITION,
+            ),
+            # Purge des tickets supprimés, index partiel : seules ces lignes y sont
+            models.Index(
+                fields=['deleted_at', 'id'],
+                name='tickets_ticket_deleted_idx',
+                condition=models.Q(deleted_at__isnull=False),
+            ),
         ]
     
     def __str__(self):
         return f"#{self.id}: {self.title}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Garde les valeurs chargées pour détecter les changements au save"""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+    
+    def save(self, *args, **kwargs):
+        # L'upload (CloudinaryField.pre_save) est fait avant l'écriture pour
+        # enregistrer les URLs de l'attachement dans le même INSERT/UPDATE
+        if 'attachment' not in self.get_deferred_fields():
+            self._meta.get_field('attachment').pre_save(self, self._state.adding)
+        if 'attachment' not in self.get_deferred_fields() and self.refresh_attachment_fields() \
+                and kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | set(self.ATTACHMENT_URL_FIELDS)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'change_seq', 'changed_at'}
+        # Numéro et écriture dans la même transaction : voir TicketChangeSequence
+        with transaction.atomic(using=kwargs.get('using')):
+            self.change_seq = TicketChangeSequence.next_value(kwargs.get('using'))
+            self.changed_at = timezone.now()
+            super().save(*args, **kwargs)
+    
     # ============ MÉTHODES POUR ATTACHMENTS ============
-    def get_attachment_download_url(self):
-        """Retourne l'URL de téléchargement Cloudinary avec flag d'attachement"""
-        if not self.attachment:
-            return None
+    ATTACHMENT_URL_FIELDS = (
+        'attachment_public_id', 'attachment_format', 'attachment_resource_type',
+        'attachment_url', 'attachment_view_url', 'attachment_download_url',
+    )
+    
+    def refresh_attachment_fields(self):
+        """Met à jour les colonnes d'URL si l'attachement a changé, retourne True si modifié"""
+        resource = self.attachment
+        if isinstance(resource, str) and resource:
+            resource = self._meta.get_field('attachment').to_python(resource)
+        if not isinstance(resource, CloudinaryResource) or not resource.public_id:
+            if not any(getattr(self, name) for name in self.ATTACHMENT_URL_FIELDS):
+                return False
+            for name in self.ATTACHMENT_URL_FIELDS:
+                setattr(self, name, '')
+            return True
+        
+        if resource.public_id == self.attachment_public_id and self.attachment_view_url:
+            return False
         
+        for name, value in self.build_attachment_fields(resource).items():
+            setattr(self, name, value)
+        return True
+    
+    @staticmethod
+    def build_attachment_fields(resource):
+        """Calcule public_id/format/type et les URLs Cloudinary d'une ressource"""
+        from cloudinary.utils import cloudinary_url
+        
+        fmt = resource.format or ''
+        # Les PDF sont servis en raw
+        resource_type = 'raw' if fmt == 'pdf' else (resource.resource_type or 'image')
+        if resource_type == 'auto':
+            resource_type = 'image'
+        fields = {
+            'attachment_public_id': resource.public_id,
+            'attachment_format': fmt,
+            'attachment_resource_type': resource_type,
+            'attachment_url': '',
+            'attachment_view_url': '',
+            'attachment_download_url': '',
+        }
+        
+        options = {
+            'format': fmt or None,
+            'resource_type': resource_type,
+            'type': resource.type or 'upload',
+            'version': resource.version,
+        }
         try:
-            import cloudinary
-            from cloudinary.utils import cloudinary_url
-            
-            public_id = self.attachment.public_id
-            format = self.attachment.format
-            
-            if format == "pdf":
-                resource_type = "raw"
-            else:
-                resource_type = self.attachment.resource_type or "image"
-            
-            url, options = cloudinary_url(
-                public_id,
-                format=format,
-                resource_type=resource_type,
-                flags=['attachment'],  
-                type='upload'
+            fields['attachment_url'] = resource.url
+            fields['attachment_view_url'], _ = cloudinary_url(resource.public_id, **options)
+            fields['attachment_download_url'], _ = cloudinary_url(
+                resource.public_id, flags=['attachment'], **options
             )
-            
-            return url
-            
-        except Exception as e:
-            print(f"Error generating download URL: {e}")
-            try:
-                url = str(self.attachment.url)
-                if 'cloudinary.com' in url and 'fl_attachment' not in url:
-                    if '/upload/' in url:
-                        url = url.replace('/upload/', '/upload/fl_attachment/')
-                    elif '/image/' in url:
-                        url = url.replace('/image/', '/image/upload/fl_attachment/')
-                    elif '/raw/' in url:
-                        url = url.replace('/raw/', '/raw/upload/fl_attachment/')
-                return url
-            except:
-                return None
+        except Exception:
+            logger.exception("Error building attachment URLs for %s", resource.public_id)
+        return fields
+    
+    def get_attachment_download_url(self):
+        """URL de téléchargement Cloudinary avec flag d'attachement"""
+        if not self.attachment:
+            return None
+        if not self.attachment_download_url:
+            self.refresh_attachment_fields()
+        return self.attachment_download_url or None
     
     def get_attachment_view_url(self):
         """URL pour visualiser le fichier (sans téléchargement forcé)"""
         if not self.attachment:
             return None
-        return self.attachment.url
+        if not self.attachment_view_url:
+            self.refresh_attachment_fields()
+        return self.attachment_view_url or None
     
     # ============ MÉTHODES POUR ADMIN ============
     def assign_to_user(self, user):
@@ -222,54 +568,82 @@ class Ticket(models.Model):
             return True
         return False
     
-    def update_status(self, new_status, user=None):
-        """Changer le statut (admin seulement pour certains statuts)"""
+    def set_status(self, new_status, user=None):
+        """
+        Changer le statut sans sauvegarder. La transition est insérée dans
+        l'historique par save(), dans sa transaction (signal post_save, voir
+        tickets/history.py).
+        """
         old_status = self.status
         self.status = new_status
         
-        if new_status == 'Resolved':
-            self.resolved_at = models.DateTimeField(auto_now=True)
+        if new_status == 'Resolved' and old_status != 'Resolved':
+            self.resolved_at = timezone.now()
             if user:
-                self.resolved_by = user
+                self.resolved_by_id = user.id
         
+        # Auteur de la transition, lu par le signal
+        self._status_changed_by_id = user.id if user else None
+        return old_status, new_status
+    
+    def update_status(self, new_status, user=None):
+        """Changer le statut (admin seulement pour certains statuts)"""
+        old_status, new_status = self.set_status(new_status, user)
         self.save()
         return old_status, new_status
     
     def get_status_history(self):
-        """Historique des statuts (à implémenter avec un modèle séparé si besoin)"""
-        return [
-            {'status': self.status, 'changed_at': self.updated_at}
-        ]
+        """Historique des statuts, du plus récent au plus ancien"""
+        return list(
+            self.status_history.order_by('-changed_at').values(
+                'old_status', 'new_status', 'changed_by_id', 'changed_at', 'note'
+            )
+        )
     
     # ============ MÉTHODES POUR USER ============
     def can_user_view(self, user):
         """Vérifie si l'utilisateur peut voir ce ticket"""
         if user.role == 'admin':
             return True
-        return self.created_by == user or self.assigned_to == user
+        return user.id in (self.created_by_id, self.assigned_to_id)
     
     def can_user_edit(self, user):
         """Vérifie si l'utilisateur peut éditer ce ticket"""
         if user.role == 'admin':
             return True
-        return self.created_by == user and self.status == 'New'
+        return self.created_by_id == user.id and self.status == 'New'
     
     def can_user_delete(self, user):
         """Vérifie si l'utilisateur peut supprimer ce ticket"""
         if user.role == 'admin':
             return True
-        return self.created_by == user and self.status == 'New'
+        return self.created_by_id == user.id and self.status == 'New'
     
     # ============ MÉTHODES UTILITAIRES ============
     def get_attachment_url(self):
         """URL Cloudinary du fichier"""
-        return self.attachment.url if self.attachment else None
+        if not self.attachment:
+            return None
+        if not self.attachment_url:
+            self.refresh_attachment_fields()
+        return self.attachment_url or None
     
     def get_file_info(self):
         """Informations sur le fichier attaché"""
         if not self.attachment:
             return None
         
+        if 'api_file_type' in self.__dict__:
+            # Lu par with_api_fields() : colonnes précalculées, sans recalcul d'URL
+            return {
+                'name': self.attachment_name,
+                'size': self.attachment_size,
+                'url': self.attachment_url or None,
+                'download_url': self.attachment_download_url or None,
+                'view_url': self.attachment_view_url or None,
+                'type': self.get_file_type(),
+            }
+        
         return {
             'name': self.attachment_name,
             'size': self.attachment_size,
@@ -284,33 +658,23 @@ class Ticket(models.Model):
         if not self.attachment_name:
             return None
         
-        ext = self.attachment_name.split('.')[-1].lower()
+        if 'api_file_type' in self.__dict__:
+            return self.__dict__['api_file_type']
         
-        if ext in ['jpg', 'jpeg', 'png', 'gif', 'webp', 'bmp']:
-            return 'image'
-        elif ext in ['pdf']:
-            return 'pdf'
-        elif ext in ['doc', 'docx']:
-            return 'word'
-        elif ext in ['xls', 'xlsx']:
-            return 'excel'
-        else:
-            return 'other'
+        ext = self.attachment_name.split('.')[-1].lower()
+        return FILE_TYPES.get(ext, 'other')
     
     def is_overdue(self):
-        """Vérifie si le ticket est en retard"""
+        """Vérifie si le ticket est en retard (annotation de with_sla() si présente)"""
+        if 'overdue' in self.__dict__:
+            return self.__dict__['overdue']
         if self.due_date and self.status != 'Resolved':
-            from django.utils import timezone
             return timezone.now() > self.due_date
         return False
     
     def get_time_elapsed(self):
-        """Temps écoulé depuis la création"""
-        from django.utils import timezone
-        from datetime import datetime
-        
-        now = timezone.now()
-        delta = now - self.created_at
+        """Temps écoulé depuis la création (annotation de with_sla() si présente)"""
+        delta = self.__dict__.get('age') or timezone.now() - self.created_at
         
         if delta.days > 0:
             return f"{delta.days} days"
@@ -320,7 +684,17 @@ class Ticket(models.Model):
             return f"{delta.seconds // 60} minutes"
     
     def to_dict(self, user=None):
-        """Convertir en dictionnaire pour l'API"""
+        """
+        Convertir en dictionnaire pour l'API. Sur Ticket.objects.with_api_fields(user),
+        aucune requête supplémentaire : utilisateurs joints et champs calculés en SQL.
+        """
+        if 'api_can_edit' in self.__dict__:
+            can_edit = self.api_can_edit if user else False
+            can_delete = self.api_can_delete if user else False
+        else:
+            can_edit = self.can_user_edit(user) if user else False
+            can_delete = self.can_user_delete(user) if user else False
+        
         data = {
             'id': self.id,
             'title': self.title,
@@ -337,8 +711,8 @@ class Ticket(models.Model):
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat(),
             'attachment': self.get_file_info(),
-            'can_edit': self.can_user_edit(user) if user else False,
-            'can_delete': self.can_user_delete(user) if user else False,
+            'can_edit': can_edit,
+            'can_delete': can_delete,
             'time_elapsed': self.get_time_elapsed(),
             'is_overdue': self.is_overdue(),
         }
@@ -367,10 +741,12 @@ class Ticket(models.Model):
 
 # ============ MODÈLE POUR HISTORIQUE DES STATUTS ============
 class TicketStatusHistory(models.Model):
+    """Journal append-only des transitions de statut (écrit par tickets/history.py)"""
     ticket = models.ForeignKey(
         Ticket,
         on_delete=models.CASCADE,
-        related_name='status_history'
+        related_name='status_history',
+        db_index=False  # couvert par l'index (ticket, -changed_at)
     )
     
     old_status = models.CharField(max_length=20)
@@ -382,13 +758,202 @@ class TicketStatusHistory(models.Model):
         null=True
     )
     
-    changed_at = models.DateTimeField(auto_now_add=True)
+    # Heure de la transition, pas de l'écriture (les lignes sont insérées par lots)
+    changed_at = models.DateTimeField(default=timezone.now)
     note = models.TextField(blank=True)
     
     class Meta:
         ordering = ['-changed_at']
         verbose_name = 'Status History'
         verbose_name_plural = 'Status Histories'
+        indexes = [
+            # Chronologie d'un ou plusieurs tickets (endpoint history)
+            models.Index(fields=['ticket', '-changed_at'], name='tickets_history_timeline_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Ticket #{self.ticket.id}: {self.old_status} → {self.new_status}"
+
+# ============ COMPTEURS MATÉRIALISÉS POUR LES STATISTIQUES ============
+class TicketCounter(models.Model):
+    """
+    Nombre de tickets par (propriétaire, statut, catégorie, priorité).
+    Les lignes avec owner=NULL portent les totaux globaux (vue admin).
+    Maintenu incrémentalement par les signaux de Ticket (voir counters.py).
+    """
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='ticket_counters'
+    )
+    
+    status = models.CharField(max_length=20, choices=Ticket.STATUS_CHOICES)
+    category = models.CharField(max_length=20, choices=Ticket.CATEGORY_CHOICES)
+    priority = models.CharField(max_length=20, choices=Ticket.PRIORITY_CHOICES)
+    count = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Ticket Counter'
+        verbose_name_plural = 'Ticket Counters'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner', 'status', 'category', 'priority'],
+                name='unique_ticket_counter_scope'
+            ),
+            models.UniqueConstraint(
+                fields=['status', 'category', 'priority'],
+                condition=models.Q(owner__isnull=True),
+                name='unique_ticket_counter_global'
+            ),
+        ]
+    
+    def __str__(self):
+        scope = self.owner_id or 'all'
+        return f"{scope} / {self.status} / {self.category} / {self.priority}: {self.count}"
+
+
+# ============ SYNCHRONISATION INCRÉMENTALE ============
+class TicketChangeSequence(models.Model):
+    """
+    Numéros des changements de tickets : chaque écriture de ticket et chaque
+    suppression prend le numéro suivant, dans sa transaction.
+
+    PostgreSQL : séquence `tickets_change_seq` (nextval), sans verrou, les
+    écrivains ne s'attendent pas. Un numéro peut alors devenir visible après
+    un numéro plus grand : sync.changes() s'arrête avant les changements de
+    moins de TICKET_SYNC_HORIZON_SECONDS (voir commits_in_order()).
+
+    Autres moteurs : la ligne unique `value` (UPDATE ... RETURNING sous
+    SQLite). Sa ligne reste verrouillée jusqu'au commit, ce qui ne coûte rien
+    sous SQLite (un seul écrivain) : les numéros y deviennent visibles dans
+    l'ordre.
+    """
+    value = models.BigIntegerField(default=0)
+    # Plus grand numéro des tombstones purgées : curseurs plus anciens expirés
+    pruned_through = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Ticket Change Sequence'
+    
+    SINGLETON_ID = 1
+    SEQUENCE_NAME = 'tickets_change_seq'
+    
+    @classmethod
+    def commits_in_order(cls, using=None):
+        """False si un numéro peut être validé après un numéro plus grand"""
+        return connections[using or router.db_for_write(cls)].vendor != 'postgresql'
+    
+    @classmethod
+    def next_value(cls, using=None):
+        using = using or router.db_for_write(cls)
+        connection = connections[using]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT nextval(%s)', [cls.SEQUENCE_NAME])
+                return cursor.fetchone()[0]
+        
+        manager = cls.objects.db_manager(using)
+        with transaction.atomic(using=using):
+            if connection.vendor == 'sqlite' and connection.features.can_return_columns_from_insert:
+                # SQLite >= 3.35 : incrément et lecture en une requête
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'UPDATE {cls._meta.db_table} SET value = value + 1 WHERE id = %s RETURNING value',
+                        [cls.SINGLETON_ID],
+                    )
+                    row = cursor.fetchone()
+                if row is not None:
+                    return row[0]
+            rows = manager.filter(pk=cls.SINGLETON_ID)
+            if not rows.update(value=models.F('value') + 1):
+                manager.get_or_create(pk=cls.SINGLETON_ID)
+                rows.update(value=models.F('value') + 1)
+            return rows.values_list('value', flat=True).get()
+    
+    def __str__(self):
+        return f"{self.value}"
+
+
+class TicketTombstone(models.Model):
+    """Ticket supprimé, signalé aux clients en synchronisation puis purgé"""
+    ticket_id = models.BigIntegerField(primary_key=True)
+    # Pas de clé étrangère : le propriétaire peut être supprimé lui aussi
+    owner_id = models.BigIntegerField(null=True)
+    change_seq = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = 'Ticket Tombstone'
+        verbose_name_plural = 'Ticket Tombstones'
+        indexes = [
+            models.Index(fields=['change_seq', 'ticket_id']),
+            models.Index(fields=['owner_id', 'change_seq', 'ticket_id']),
+            models.Index(fields=['deleted_at']),
+        ]
+    
+    def __str__(self):
+        return f"Ticket #{self.ticket_id} deleted ({self.change_seq})"
+
+
+# ============ PIÈCES JOINTES DÉDUPLIQUÉES ============
+class AttachmentBlob(models.Model):
+    """
+    Fichier stocké une seule fois, identifié par son SHA-256, partagé par
+    tous les tickets qui ont joint le même contenu. `ref_count` compte ces
+    tickets ; le blob et le fichier distant sont supprimés au dernier
+    (voir tickets/blobs.py).
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.BigIntegerField(default=0)
+    # Valeurs des champs attachment* retournées par le stockage
+    fields = models.JSONField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = 'Attachment Blob'
+        verbose_name_plural = 'Attachment Blobs'
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} refs)"
+
+
+# ============ SLA ============
+class TicketSlaScan(models.Model):
+    """
+    Ligne unique : échéance jusqu'à laquelle les retards ont déjà été
+    signalés. Chaque passage de `manage.py scan_sla_breaches` ne lit que les
+    tickets dont l'échéance tombe entre ce repère et maintenant (tickets/sla.py).
+    """
+    scanned_through = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Ticket SLA Scan'
+    
+    SINGLETON_ID = 1
+    
+    def __str__(self):
+        return f"{self.scanned_through}"
+
+# ============ REPRISE DES IMPORTS ============
+class TicketImportCheckpoint(models.Model):
+    """
+    Avancement d'un import (`manage.py import_tickets`) par source : mis à
+    jour dans la transaction de chaque lot inséré, un import interrompu
+    reprend donc exactement après le dernier lot validé.
+    """
+    source = models.CharField(max_length=255, unique=True)
+    rows_read = models.BigIntegerField(default=0)
+    imported = models.BigIntegerField(default=0)
+    rejected = models.BigIntegerField(default=0)
+    # Taille du fichier des rejets après le dernier lot validé
+    rejects_offset = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Ticket Import Checkpoint'
     
     def __str__(self):
-        return f"Ticket #{self.ticket.id}: {self.old_status} → {self.new_status}"
\ No newline at end of file
+        return f"{self.source}: {self.rows_read} rows"
@@ -0,0 +1,264 @@
+import base64
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class TicketCursorPagination(BasePagination):
+    """
+    Pagination par curseur (keyset) pour les tickets.
+
+    Le curseur encode la position du dernier ticket de la page, la requête
+    suivante filtre donc directement à partir de cette position au lieu de
+    faire un OFFSET : le coût reste O(page) quelle que soit la profondeur.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    search_query_param = 'search'
+    default_ordering = '-created_at'
+    relevance_ordering = 'relevance'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # Tris autorisés : chacun se termine par `id` pour garantir un ordre total
+    # (plusieurs tickets peuvent partager un timestamp) et est couvert par un
+    # index (échéance : avec ?sla=open, voir TicketViewSet.get_filtered_queryset)
+    orderings = {
+        '-created_at': ('-created_at', '-id'),
+        'created_at': ('created_at', 'id'),
+        '-updated_at': ('-updated_at', '-id'),
+        'updated_at': ('updated_at', 'id'),
+        # Âge (maintenant - created_at) : mêmes index que created_at, sens inverse
+        'age': ('-created_at', '-id'),
+        '-age': ('created_at', 'id'),
+        # Échéance, tickets sans échéance en dernier (nullable_fields) ; le plus
+        # en retard d'abord avec 'due_date'. Simple tri : avec ?sla=open (tickets
+        # ouverts avec échéance), lu dans les index partiels SLA
+        'due_date': ('due_date', 'id'),
+        '-due_date': ('-due_date', '-id'),
+        # Pertinence de la recherche plein texte (annotation search_rank)
+        'relevance': ('search_rank', '-id'),
+    }
+
+    # Colonnes de tri qui peuvent être NULL : NULL après les valeurs (NULLS LAST)
+    nullable_fields = {'due_date'}
+
+    def get_ordering_key(self, request):
+        """Tri demandé, validé contre la liste blanche"""
+        searching = bool(request.query_params.get(self.search_query_param))
+        default = self.relevance_ordering if searching else self.default_ordering
+        key = request.query_params.get(self.ordering_query_param) or default
+        if key == self.relevance_ordering and not searching:
+            raise ValidationError({
+                self.ordering_query_param: [f"Ordering '{key}' requires a search query"]
+            })
+        if key not in self.orderings:
+            raise ValidationError({
+                self.ordering_query_param: [
+                    f"Unsupported ordering '{key}'. Allowed values: {', '.join(self.orderings)}"
+                ]
+            })
+        return key
+
+    def get_ordering(self, request):
+        return self.orderings[self.get_ordering_key(request)]
+
+    def get_nullable_fields(self, view=None):
+        """Colonnes NULL possibles, sauf celles que les filtres de la vue excluent (non_null_fields)"""
+        return self.nullable_fields - set(getattr(view, 'non_null_fields', ()))
+
+    def order_by(self, queryset, ordering, reverse=False, nullable=None):
+        """
+        Trie selon `ordering` ; NULL en dernier pour les colonnes `nullable`
+        (nullable_fields par défaut), en premier pour un tri inversé (page
+        précédente). Sans NULL possible, tri simple : parcours d'index.
+        """
+        nullable = self.nullable_fields if nullable is None else nullable
+        expressions = []
+        for name in ordering:
+            field = name.lstrip('-')
+            if field not in nullable:
+                expressions.append(name)
+                continue
+            column = models.F(field)
+            nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            expressions.append(column.desc(**nulls) if name.startswith('-') else column.asc(**nulls))
+        return queryset.order_by(*expressions)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    # ============ PAGINATION ============
+    def paginate_queryset(self, queryset, request, view=None):
+        page, cursor = self.page_queryset(queryset, request, view)
+        return self.set_page(list(page), cursor)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Variante async (ORM async de Django) de paginate_queryset"""
+        page, cursor = self.page_queryset(queryset, request, view)
+        return self.set_page([row async for row in page], cursor)
+
+    def page_queryset(self, queryset, request, view=None):
+        """Requête de la page demandée (page_size + 1 lignes) et curseur décodé"""
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering_key = self.get_ordering_key(request)
+        self.ordering = self.orderings[self.ordering_key]
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor['reverse'])
+        ordering = self._reverse(self.ordering) if reverse else self.ordering
+
+        nullable = self.get_nullable_fields(view)
+        queryset = self.order_by(queryset, ordering, reverse, nullable)
+        if cursor:
+            queryset = queryset.filter(self._after(ordering, cursor['position'], reverse, nullable))
+        return queryset[:self.page_size + 1], cursor
+
+    def set_page(self, rows, cursor):
+        """Calcule les liens à partir des lignes lues, retourne la page"""
+        reverse = bool(cursor and cursor['reverse'])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.first_position = self._position(rows[0]) if rows else None
+        self.last_position = self._position(rows[-1]) if rows else None
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return self._link(self.last_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_position is None:
+            return None
+        return self._link(self.first_position, reverse=True)
+
+    # ============ CURSEURS ============
+    def encode_cursor(self, position, reverse=False):
+        payload = {
+            'o': self.ordering_key,
+            'p': [value.isoformat() if isinstance(value, datetime) else value for value in position],
+            'r': int(reverse),
+        }
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            ordering_key = payload['o']
+            values = payload['p']
+            reverse = bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # Un curseur n'est valable que pour le tri qui l'a produit
+        if ordering_key != self.ordering_key or not isinstance(values, list) \
+                or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        position = []
+        for name, value in zip(self.ordering, values):
+            try:
+                field = model._meta.get_field(name.lstrip('-'))
+            except FieldDoesNotExist:
+                # Annotation (ex. search_rank) : valeur JSON telle quelle
+                field = None
+            if value is None and name.lstrip('-') in self.nullable_fields:
+                pass
+            elif isinstance(field, models.DateTimeField):
+                value = parse_datetime(value) if isinstance(value, str) else None
+                if value is None:
+                    raise NotFound(self.invalid_cursor_message)
+            position.append(value)
+
+        return {'position': position, 'reverse': reverse}
+
+    def _link(self, position, reverse):
+        url = remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position, reverse))
+
+    def _position(self, row):
+        names = [name.lstrip('-') for name in self.ordering]
+        if isinstance(row, dict):
+            return [row[name] for name in names]
+        return [getattr(row, name) for name in names]
+
+    @staticmethod
+    def _reverse(ordering):
+        return tuple(name[1:] if name.startswith('-') else f'-{name}' for name in ordering)
+
+    def _after(self, ordering, position, reverse=False, nullable=None):
+        """
+        Condition keyset « strictement après `position` » pour `ordering` :
+        (a > x) OR (a = x AND b > y) OR ... Pour une colonne `nullable`,
+        NULL vient après toutes les valeurs (avant si `reverse`, voir order_by).
+        """
+        nullable = self.nullable_fields if nullable is None else nullable
+        condition = models.Q()
+        equal = models.Q()
+        for name, value in zip(ordering, position):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            can_be_null = field in nullable
+            if value is None:
+                same = models.Q(**{f'{field}__isnull': True})
+                # Valeurs après les NULL seulement dans le tri inversé
+                beyond = models.Q(**{f'{field}__isnull': False}) if reverse else None
+            else:
+                same = models.Q(**{field: value})
+                beyond = models.Q(**{f'{field}__{lookup}': value})
+                if can_be_null and not reverse:
+                    beyond |= models.Q(**{f'{field}__isnull': True})
+            if beyond is not None:
+                condition |= equal & beyond
+            equal &= same
+        return condition
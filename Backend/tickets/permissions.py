@@ -4,7 +4,7 @@ class IsAdminOrSelf(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user.is_superuser:
             return True
-        return obj == request.user
+        return obj.pk == request.user.id
 
 class IsAdminUser(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -17,4 +17,4 @@ class IsOwnerOrAdmin(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.user.role == 'admin':
             return True
-        return obj.created_by == request.user
\ No newline at end of file
+        return obj.created_by_id == request.user.id
\ No newline at end of file
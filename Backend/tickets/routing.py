@@ -0,0 +1,174 @@
+"""
+Lectures sur réplicas, écritures sur la base principale.
+
+Les lectures ne partent vers un réplica (TICKET_DATABASE_REPLICAS)
+qu'entre start_replica_reads() et end_replica_reads() (ou dans
+read_from_replica()), appelés par TicketViewSet pour ses actions de
+lecture (liste, détail, statistiques, export) : toute autre lecture, et
+toute lecture d'une requête d'écriture, reste sur `default`.
+
+Lecture de ses propres écritures : après une écriture réussie,
+ReadYourWritesMiddleware épingle l'utilisateur à la base principale pendant
+TICKET_REPLICA_PIN_SECONDS (au-delà du retard de réplication attendu),
+par un marqueur dans le cache partagé ('user', tous ses appareils) ou par
+un cookie ('cookie', ce navigateur seulement), selon TICKET_REPLICA_PIN.
+"""
+import contextlib
+import contextvars
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+
+PRIMARY = 'default'
+PIN_KEY_PREFIX = 'tickets:pin'
+PIN_COOKIE = 'ticketflow_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_read_alias = contextvars.ContextVar('ticket_read_alias', default=None)
+
+
+def get_replicas():
+    return list(getattr(settings, 'TICKET_DATABASE_REPLICAS', []))
+
+
+def get_pin_seconds():
+    return getattr(settings, 'TICKET_REPLICA_PIN_SECONDS', 5)
+
+
+def get_pin_mode():
+    return getattr(settings, 'TICKET_REPLICA_PIN', 'user')
+
+
+def _cache():
+    return caches[getattr(settings, 'TICKET_CACHE_ALIAS', 'default')]
+
+
+def _pin_key(user_id):
+    return f'{PIN_KEY_PREFIX}:{user_id}'
+
+
+# ============ ROUTEUR ============
+class PrimaryReplicaRouter:
+    """Lectures vers le réplica choisi par start_replica_reads(), le reste vers default"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mêmes données partout : réplicas et base principale
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Schéma des réplicas recopié par la réplication
+        return False if db in get_replicas() else None
+
+
+def current_alias():
+    """Base des lectures en cours (default hors lectures sur réplica)"""
+    return _read_alias.get() or PRIMARY
+
+
+def is_replica_read():
+    return _read_alias.get() is not None
+
+
+def start_replica_reads(request=None):
+    """
+    Lectures suivantes sur un réplica tiré au hasard, sauf sans réplica
+    configuré ou si l'utilisateur de `request` est épinglé. Retourne le
+    jeton à passer à end_replica_reads() (None : lectures sur default).
+    """
+    replicas = get_replicas()
+    if not replicas or (request is not None and is_pinned(request)):
+        return None
+    return _read_alias.set(random.choice(replicas))
+
+
+def end_replica_reads(token):
+    if token is not None:
+        _read_alias.reset(token)
+
+
+@contextlib.contextmanager
+def read_from_replica(request=None):
+    token = start_replica_reads(request)
+    try:
+        yield current_alias()
+    finally:
+        end_replica_reads(token)
+
+
+# ============ ÉPINGLAGE ============
+def is_pinned(request):
+    if get_pin_mode() == 'cookie':
+        try:
+            return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return False
+    return _cache().get(_pin_key(user.id)) is not None
+
+
+def _should_pin(request, response):
+    if not get_replicas() or request.method in SAFE_METHODS or response.status_code >= 400:
+        return False
+    user = getattr(request, 'user', None)
+    return user is not None and user.is_authenticated
+
+
+def _set_cookie(response, until):
+    response.set_cookie(PIN_COOKIE, f'{until:.3f}', max_age=get_pin_seconds(), httponly=True, samesite='Lax')
+
+
+def pin(request, response):
+    """Épingle l'auteur d'une écriture réussie à la base principale"""
+    if not _should_pin(request, response):
+        return
+    if get_pin_mode() == 'cookie':
+        _set_cookie(response, time.time() + get_pin_seconds())
+    else:
+        _cache().set(_pin_key(request.user.id), 1, get_pin_seconds())
+
+
+async def apin(request, response):
+    if not _should_pin(request, response):
+        return
+    if get_pin_mode() == 'cookie':
+        _set_cookie(response, time.time() + get_pin_seconds())
+    else:
+        await _cache().aset(_pin_key(request.user.id), 1, get_pin_seconds())
+
+
+class ReadYourWritesMiddleware:
+    """
+    Épingle l'utilisateur après une requête d'écriture réussie. Placé après
+    l'authentification : request.user est l'utilisateur du jeton, posé par
+    DRF (ou les vues async) pendant la vue.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        await apin(request, response)
+        return response
@@ -0,0 +1,228 @@
+import re
+
+from django.db import connections, models
+from django.utils.html import escape
+from django.db.models.expressions import RawSQL
+
+from .models import Ticket
+
+# Table virtuelle FTS5 (SQLite) et configuration tsvector (Postgres)
+FTS_TABLE = 'tickets_ticket_fts'
+POSTGRES_SEARCH_CONFIG = 'simple'
+POSTGRES_SEARCH_INDEX = 'tickets_ticket_search_idx'
+
+# Extrait : délimiteurs privés (zone Unicode à usage privé) posés par SQL,
+# remplacés par les balises après échappement HTML du texte du ticket
+SNIPPET_START = '\ue000'
+SNIPPET_END = '\ue001'
+SNIPPET_MARKUP = {SNIPPET_START: '<mark>', SNIPPET_END: '</mark>'}
+SNIPPET_ELLIPSIS = '…'
+SNIPPET_TOKENS = 16
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Table et triggers FTS5 (identiques à la migration 0005). SQLite supprime les
+# triggers quand une migration reconstruit tickets_ticket : ils sont recréés
+# après chaque migrate (voir SQLiteSearchBackend.install)
+SQLITE_FTS_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, description,
+        content='tickets_ticket', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )
+"""
+
+SQLITE_FTS_TRIGGERS = {
+    'tickets_ticket_fts_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_ticket_fts_ai AFTER INSERT ON tickets_ticket BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """,
+    'tickets_ticket_fts_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_ticket_fts_ad AFTER DELETE ON tickets_ticket BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+    """,
+    'tickets_ticket_fts_au': f"""
+        CREATE TRIGGER IF NOT EXISTS tickets_ticket_fts_au AFTER UPDATE OF title, description ON tickets_ticket BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+    """,
+}
+
+
+def render_snippet(snippet):
+    """HTML de l'extrait : texte échappé, mots trouvés entre <mark> et </mark>"""
+    if snippet is None:
+        return None
+    html = escape(snippet)
+    for sentinel, markup in SNIPPET_MARKUP.items():
+        html = html.replace(sentinel, markup)
+    return html
+
+
+def search_terms(query):
+    """Mots de la recherche, sans opérateurs ni ponctuation"""
+    return _TOKEN_RE.findall(query or '')
+
+
+class BaseSearchBackend:
+    """
+    Moteur de recherche de tickets.
+
+    `search()` filtre le queryset et ajoute deux annotations :
+    - search_rank : pertinence, croissante (la plus petite valeur est la meilleure)
+    - search_snippet : extrait de la description, mots trouvés entre
+      SNIPPET_START et SNIPPET_END (texte brut : HTML par render_snippet())
+    """
+    vendor = None
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def empty(self, queryset):
+        """Recherche sans mot exploitable : aucun résultat, mêmes annotations"""
+        return queryset.none().annotate(
+            search_rank=models.Value(0.0, output_field=models.FloatField()),
+            search_snippet=models.Value(None, output_field=models.TextField()),
+        )
+
+    def rebuild(self, connection):
+        """Reconstruit l'index de recherche (no-op si l'index est calculé)"""
+
+    def install(self, connection):
+        """Vérifie que l'index et sa synchronisation existent, retourne True si réparé"""
+        return False
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """FTS5 en mode external content, synchronisé par des triggers SQL"""
+    vendor = 'sqlite'
+
+    def match_expression(self, terms):
+        # Chaque mot est cité (pas d'opérateurs FTS injectables) et préfixé
+        return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return self.empty(queryset)
+
+        match = self.match_expression(terms)
+        table = Ticket._meta.db_table
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", (match,))
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT bm25({FTS_TABLE}, 10.0, 1.0) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                (match,),
+                output_field=models.FloatField(),
+            ),
+            search_snippet=RawSQL(
+                f"SELECT snippet({FTS_TABLE}, -1, %s, %s, %s, %s) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                (SNIPPET_START, SNIPPET_END, SNIPPET_ELLIPSIS, SNIPPET_TOKENS, match),
+                output_field=models.TextField(),
+            ),
+        )
+
+    def rebuild(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+    def install(self, connection):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s",
+                [Ticket._meta.db_table],
+            )
+            existing = {row[0] for row in cursor.fetchall()}
+            missing = [name for name in SQLITE_FTS_TRIGGERS if name not in existing]
+            if not missing:
+                return False
+
+            cursor.execute(SQLITE_FTS_TABLE_SQL)
+            for name in missing:
+                cursor.execute(SQLITE_FTS_TRIGGERS[name])
+
+        # Des écritures ont pu échapper à l'index pendant l'absence des triggers
+        self.rebuild(connection)
+        return True
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """tsvector calculé sur (title, description), couvert par un index GIN"""
+    vendor = 'postgresql'
+
+    # Doit rester identique à l'expression de l'index GIN (migration 0005)
+    document = (
+        f"to_tsvector('{POSTGRES_SEARCH_CONFIG}', "
+        "coalesce({table}.title, '') || ' ' || coalesce({table}.description, ''))"
+    )
+
+    def tsquery(self, terms):
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    def search(self, queryset, query):
+        terms = search_terms(query)
+        if not terms:
+            return self.empty(queryset)
+
+        table = Ticket._meta.db_table
+        document = self.document.format(table=table)
+        tsquery = f"to_tsquery('{POSTGRES_SEARCH_CONFIG}', %s)"
+        params = (self.tsquery(terms),)
+        headline_options = (
+            f'StartSel={SNIPPET_START}, StopSel={SNIPPET_END}, '
+            f'MaxWords={SNIPPET_TOKENS}, MinWords=5, MaxFragments=1, '
+            f'FragmentDelimiter={SNIPPET_ELLIPSIS}'
+        )
+        return queryset.filter(
+            RawSQL(f"{document} @@ {tsquery}", params, output_field=models.BooleanField())
+        ).annotate(
+            # ts_rank est décroissant : on l'inverse pour trier comme bm25
+            search_rank=RawSQL(
+                f"-ts_rank({document}, {tsquery})", params, output_field=models.FloatField()
+            ),
+            search_snippet=RawSQL(
+                f"ts_headline('{POSTGRES_SEARCH_CONFIG}', {table}.description, {tsquery}, %s)",
+                params + (headline_options,),
+                output_field=models.TextField(),
+            ),
+        )
+
+
+class FallbackSearchBackend(BaseSearchBackend):
+    """Autres bases : recherche par sous-chaîne, sans classement"""
+
+    def search(self, queryset, query):
+        condition = models.Q()
+        for term in search_terms(query):
+            condition &= models.Q(title__icontains=term) | models.Q(description__icontains=term)
+        if not condition:
+            return self.empty(queryset)
+        return queryset.filter(condition).annotate(
+            search_rank=models.Value(0.0, output_field=models.FloatField()),
+            search_snippet=models.Value(None, output_field=models.TextField()),
+        )
+
+
+SEARCH_BACKENDS = {
+    backend.vendor: backend
+    for backend in (SQLiteSearchBackend(), PostgresSearchBackend())
+}
+
+
+def get_search_backend(using='default'):
+    return SEARCH_BACKENDS.get(connections[using].vendor, FallbackSearchBackend())
+
+
+def search_tickets(queryset, query):
+    """Recherche plein texte classée, combinable avec les autres filtres"""
+    return get_search_backend(queryset.db).search(queryset, query)
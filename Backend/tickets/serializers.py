@@ -1,10 +1,12 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.db import models
+from django.db.models.functions import Substr
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import User, Ticket
-import cloudinary
-from cloudinary.utils import cloudinary_url
+from .bulk import MAX_TICKETS as BULK_MAX_TICKETS
+from .search import render_snippet
 
 User = get_user_model()
 
@@ -16,6 +18,11 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['role'] = user.role
         token['email'] = user.email
         token['username'] = user.username
+        token['is_superuser'] = user.is_superuser
+        # Lu par TokenUser.is_staff (permission IsAdminUser de DRF)
+        token['is_staff'] = user.is_staff
+        # Version comparée à chaque requête (tickets.authentication)
+        token['ver'] = user.auth_version
         return token
 
 
@@ -73,13 +80,13 @@ class TicketSerializer(serializers.ModelSerializer):
         model = Ticket
         fields = [
             'id', 'title', 'description', 'category', 'status', 'priority',
-            'attachment', 'attachment_name',
+            'attachment', 'attachment_name', 'attachment_state',
             'attachment_url', 'attachment_view_url', 'attachment_download_url',
             'created_by', 'created_by_email', 'created_by_id',
-            'created_at', 'updated_at'
+            'created_at', 'updated_at', 'due_date'
         ]
         read_only_fields = [
-            'id', 'created_by', 'created_at', 'updated_at',
+            'id', 'created_by', 'created_at', 'updated_at', 'due_date', 'attachment_state',
             'attachment_url', 'attachment_view_url', 'attachment_download_url',
             'created_by_id'
         ]
@@ -93,63 +100,100 @@ class TicketSerializer(serializers.ModelSerializer):
     def get_created_by_id(self, obj):
         return obj.created_by.id if obj.created_by else None
 
-    # --- Base Cloudinary URL ---
+    # --- URLs précalculées à l'upload (voir Ticket.refresh_attachment_fields) ---
     def get_attachment_url(self, obj):
-        if obj.attachment:
-            try:
-                return obj.attachment.url
-            except:
-                return None
-        return None
-
-    # --- View (inline) ---
+        return obj.attachment_url or None
+
     def get_attachment_view_url(self, obj):
-        if not obj.attachment:
-            return None
-
-        try:
-            public_id = obj.attachment.public_id
-            format = obj.attachment.format
-
-            # Force PDF → raw
-            if format == "pdf":
-                resource_type = "raw"
-            else:
-                resource_type = obj.attachment.resource_type or "image"
-
-            url, options = cloudinary_url(
-                public_id,
-                format=format,
-                resource_type=resource_type
-            )
-            return url
-
-        except Exception as e:
-            print("VIEW URL ERROR:", e)
-            return None
+        return obj.attachment_view_url or None
 
     def get_attachment_download_url(self, obj):
-        if obj.attachment:
-            import cloudinary
-            from cloudinary.utils import cloudinary_url
-            
-            try:
-                url, options = cloudinary_url(
-                    obj.attachment.public_id,
-                    format=obj.attachment.format,
-                    flags=['attachment'],
-                    resource_type=obj.attachment.resource_type
-                )
-                return url
-            except Exception:
-                return obj.attachment.url
-        return None
+        return obj.attachment_download_url or None
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Extrait surligné (HTML échappé), présent seulement pour les résultats de recherche
+        snippet = getattr(instance, 'search_snippet', None)
+        if snippet is not None:
+            data['search_snippet'] = render_snippet(snippet)
+        return data
 
     def create(self, validated_data):
-        validated_data['created_by'] = self.context['request'].user
+        validated_data['created_by_id'] = self.context['request'].user.id
         return super().create(validated_data)
 
 
+class TicketListSerializer(serializers.BaseSerializer):
+    """
+    Représentation liste construite depuis une projection `.values()` :
+    pas d'instance Ticket, description tronquée et propriétaire joint à plat.
+    Le détail (retrieve) garde TicketSerializer.
+    """
+    description_length = 200
+
+    # Colonnes lues telles quelles dans la projection
+    columns = (
+        'id', 'title', 'category', 'status', 'priority',
+        'attachment', 'attachment_name', 'attachment_state',
+        'attachment_url', 'attachment_view_url', 'attachment_download_url',
+        'created_by_id', 'created_at', 'updated_at', 'due_date',
+    )
+
+    _datetime = serializers.DateTimeField()
+
+    @classmethod
+    def project(cls, queryset):
+        """Projection SQL de la liste (annotations de recherche incluses si présentes)"""
+        extra = [name for name in ('search_rank', 'search_snippet') if name in queryset.query.annotations]
+        return queryset.values(
+            *cls.columns,
+            *extra,
+            created_by_username=models.F('created_by__username'),
+            created_by_email=models.F('created_by__email'),
+            # Un caractère de plus pour savoir si la description a été coupée
+            description_excerpt=Substr('description', 1, cls.description_length + 1),
+        )
+
+    def to_representation(self, row):
+        excerpt = row['description_excerpt'] or ''
+        truncated = len(excerpt) > self.description_length
+        attachment = row['attachment']
+        data = {
+            'id': row['id'],
+            'title': row['title'],
+            'description': excerpt[:self.description_length] if truncated else excerpt,
+            'description_truncated': truncated,
+            'category': row['category'],
+            'status': row['status'],
+            'priority': row['priority'],
+            'attachment': attachment.get_prep_value() if attachment else None,
+            'attachment_name': row['attachment_name'],
+            'attachment_state': row['attachment_state'],
+            'attachment_url': row['attachment_url'] or None,
+            'attachment_view_url': row['attachment_view_url'] or None,
+            'attachment_download_url': row['attachment_download_url'] or None,
+            'created_by': row['created_by_username'],
+            'created_by_email': row['created_by_email'],
+            'created_by_id': row['created_by_id'],
+            'created_at': self._datetime.to_representation(row['created_at']),
+            'updated_at': self._datetime.to_representation(row['updated_at']),
+            'due_date': self._datetime.to_representation(row['due_date']) if row['due_date'] else None,
+        }
+        if row.get('search_snippet') is not None:
+            data['search_snippet'] = render_snippet(row['search_snippet'])
+        return data
+
+
+class TicketChangeSerializer(TicketListSerializer):
+    """Représentation liste + numéro de changement (synchronisation incrémentale)"""
+    columns = TicketListSerializer.columns + ('change_seq',)
+
+    def to_representation(self, row):
+        data = super().to_representation(row)
+        data['change_seq'] = row['change_seq']
+        return data
+
+
 class TicketCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
@@ -166,3 +210,44 @@ class TicketUpdateSerializer(serializers.ModelSerializer):
         model = Ticket
         fields = ['status']
         extra_kwargs = {'status': {'required': True}}
+
+
+class TicketBulkFilterSerializer(serializers.Serializer):
+    """Expression de filtre d'une opération groupée (tous les critères combinés)"""
+    status = serializers.ChoiceField(choices=Ticket.STATUS_CHOICES, required=False)
+    category = serializers.ChoiceField(choices=Ticket.CATEGORY_CHOICES, required=False)
+    priority = serializers.ChoiceField(choices=Ticket.PRIORITY_CHOICES, required=False)
+    created_by = serializers.IntegerField(required=False, source='created_by_id')
+    assigned_to = serializers.IntegerField(required=False, allow_null=True, source='assigned_to_id')
+    search = serializers.CharField(required=False, allow_blank=False)
+
+    def validate(self, attrs):
+        if not attrs:
+            raise serializers.ValidationError("Filter must contain at least one criterion")
+        return attrs
+
+
+class TicketBulkSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=BULK_MAX_TICKETS
+    )
+    filter = TicketBulkFilterSerializer(required=False)
+
+    status = serializers.ChoiceField(choices=Ticket.STATUS_CHOICES, required=False)
+    priority = serializers.ChoiceField(choices=Ticket.PRIORITY_CHOICES, required=False)
+    assigned_to = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.all(), required=False, allow_null=True
+    )
+    note = serializers.CharField(required=False, allow_blank=True, default='')
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filter' in attrs):
+            raise serializers.ValidationError("Provide either 'ids' or 'filter'")
+
+        changes = {name: attrs.pop(name) for name in ('status', 'priority', 'assigned_to') if name in attrs}
+        if not changes:
+            raise serializers.ValidationError("Nothing to change: set status, priority or assigned_to")
+        if 'assigned_to' in changes:
+            changes['assigned_to'] = changes['assigned_to'].pk if changes['assigned_to'] else None
+        attrs['changes'] = changes
+        return attrs
@@ -0,0 +1,180 @@
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_save
+from django.dispatch import receiver
+
+from . import authentication, blobs, cache, counters, events, history, sqlite, storage, sync
+from .models import Ticket, User
+from .search import get_search_backend
+
+
+def _loaded_scope(instance):
+    """Scope du ticket tel qu'il est en base (None pour un nouveau ticket)"""
+    if instance._state.adding or instance.pk is None:
+        return None
+    loaded = getattr(instance, '_loaded_values', None)
+    if loaded is not None and all(name in loaded for name in counters.SCOPE_FIELDS):
+        return counters.ticket_scope(loaded)
+    row = (
+        Ticket._base_manager.filter(pk=instance.pk)
+        .values(*counters.SCOPE_FIELDS)
+        .first()
+    )
+    return counters.ticket_scope(row) if row else None
+
+
+def _remember_loaded(instance):
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    for name in counters.SCOPE_FIELDS:
+        loaded[name] = getattr(instance, name)
+    instance._loaded_values = loaded
+
+
+# ============ COMPTEURS ============
+@receiver(pre_save, sender=Ticket)
+def capture_ticket_scope(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    instance._scope_before_save = _loaded_scope(instance)
+
+
+@receiver(post_save, sender=Ticket)
+def update_ticket_counters(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_scope = None if created else getattr(instance, '_scope_before_save', None)
+    counters.record_change(old_scope, counters.ticket_scope(instance))
+    _remember_loaded(instance)
+
+
+def _soft_deleted(instance):
+    # Ticket purgé après une suppression logique : compteurs, cache, tombstone
+    # et événement ont été traités à ce moment-là (tickets/deletion.py)
+    return instance.deleted_at is not None
+
+
+@receiver(post_delete, sender=Ticket)
+def release_ticket_counters(sender, instance, **kwargs):
+    if _soft_deleted(instance):
+        return
+    counters.record_change(counters.ticket_scope(instance), None)
+
+
+# ============ HISTORIQUE DES STATUTS ============
+STATUS_INDEX = counters.SCOPE_FIELDS.index('status')
+
+
+@receiver(post_save, sender=Ticket)
+def record_status_transition(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw or created:
+        return
+    old_scope = getattr(instance, '_scope_before_save', None)
+    if old_scope is None or old_scope[STATUS_INDEX] == instance.status:
+        return
+    # Auteur posé par Ticket.set_status, valable pour ce save uniquement
+    changed_by_id = instance.__dict__.pop('_status_changed_by_id', None)
+    # Dans la transaction de Ticket.save : annulée avec lui
+    history.writer.record(instance.id, old_scope[STATUS_INDEX], instance.status, changed_by_id, using=using)
+
+
+# ============ CACHE DES RÉPONSES ============
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def invalidate_ticket_responses(sender, instance, raw=False, signal=None, **kwargs):
+    if raw or (signal is post_delete and _soft_deleted(instance)):
+        return
+    owner_ids = {instance.created_by_id}
+    old_scope = getattr(instance, '_scope_before_save', None)
+    if old_scope is not None:
+        owner_ids.add(old_scope[0])
+    # Après le commit : une lecture concurrente ne peut pas remettre en cache
+    # l'état d'avant sous la nouvelle génération
+    transaction.on_commit(lambda: cache.bump_generations(owner_ids))
+
+
+# ============ VERSIONS DES JETONS ============
+@receiver(post_save, sender=User)
+def publish_auth_version(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    user_id = instance.pk
+    version = instance.auth_version if instance.is_active else authentication.REVOKED_VERSION
+
+    def publish():
+        authentication.set_auth_version(user_id, version)
+        authentication.user_cache.discard(user_id)
+
+    transaction.on_commit(publish)
+
+
+@receiver(post_delete, sender=User)
+def revoke_auth_version(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: (
+        authentication.set_auth_version(user_id, authentication.REVOKED_VERSION),
+        authentication.user_cache.discard(user_id),
+    ))
+
+
+# ============ PIÈCES JOINTES ============
+@receiver(post_delete, sender=Ticket)
+def discard_staged_attachment(sender, instance, **kwargs):
+    # Ticket supprimé avant la fin de son upload (tickets/uploads.py)
+    path = instance.attachment_staged_path
+    if path:
+        transaction.on_commit(lambda: storage.discard_staged(path))
+
+
+@receiver(post_delete, sender=Ticket)
+def release_attachment_blob(sender, instance, **kwargs):
+    # Dernière référence : blob et fichier stocké supprimés (tickets/blobs.py)
+    if instance.attachment_blob_id:
+        blobs.release(instance.attachment_blob_id)
+
+
+# ============ SYNCHRONISATION INCRÉMENTALE ============
+@receiver(post_delete, sender=Ticket)
+def record_ticket_tombstone(sender, instance, **kwargs):
+    if _soft_deleted(instance):
+        return
+    # Même transaction que la suppression ; numéro repris par l'événement ci-dessous
+    instance.change_seq = sync.record_deletion(instance)
+
+
+# ============ ÉVÉNEMENTS (SSE) ============
+@receiver(post_save, sender=Ticket)
+def publish_ticket_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    events.publish_on_commit(
+        events.CREATED if created else events.UPDATED,
+        instance.created_by_id,
+        events.ticket_payload(instance),
+    )
+
+
+@receiver(post_delete, sender=Ticket)
+def publish_ticket_deleted(sender, instance, **kwargs):
+    if _soft_deleted(instance):
+        return
+    events.publish_on_commit(
+        events.DELETED, instance.created_by_id, events.ticket_payload(instance, deleted=True)
+    )
+
+
+# ============ INDEX DE RECHERCHE ============
+@receiver(post_migrate)
+def install_search_index(sender, using='default', **kwargs):
+    """Recrée les triggers FTS supprimés par une reconstruction de table SQLite"""
+    if sender.name != 'tickets':
+        return
+    connection = connections[using]
+    if Ticket._meta.db_table not in connection.introspection.table_names():
+        return
+    get_search_backend(using).install(connection)
+
+
+# ============ PROFIL SQLITE ============
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs):
+    sqlite.apply_profile(connection)
@@ -0,0 +1,51 @@
+"""
+Retards (SLA) calculés en SQL.
+
+L'état « en retard » et l'âge d'un ticket sont des expressions de requête
+(TicketQuerySet.overdue / aged / with_sla) : filtres et tris sans charger
+les tickets. Les tickets ouverts avec échéance sont couverts par des index
+partiels sur due_date.
+
+`scan_breaches()` signale les tickets devenus en retard depuis son dernier
+passage : lecture par plage [repère, maintenant) de l'index partiel, au lieu
+de parcourir tous les tickets.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from . import events
+from .models import Ticket, TicketSlaScan
+
+# Colonnes des tickets signalés
+BREACH_FIELDS = (
+    'id', 'title', 'status', 'priority', 'category', 'created_by_id', 'assigned_to_id',
+    'updated_at', 'change_seq', 'due_date',
+)
+
+
+def scan_breaches(now=None):
+    """
+    Tickets dont l'échéance est passée depuis le dernier passage (tous les
+    retards actuels au premier passage) : événement ticket.overdue pour
+    chacun, puis repère avancé à `now`. Retourne les lignes signalées.
+
+    Une échéance reculée avant le repère après coup n'est pas signalée.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        scan, _ = TicketSlaScan.objects.select_for_update().get_or_create(pk=TicketSlaScan.SINGLETON_ID)
+        tickets = Ticket.objects.overdue(now)
+        if scan.scanned_through is not None:
+            if scan.scanned_through >= now:
+                return []
+            tickets = tickets.filter(due_date__gte=scan.scanned_through)
+        rows = list(tickets.with_sla(now).order_by('due_date', 'id').values(*BREACH_FIELDS, 'age'))
+
+        for row in rows:
+            age = row.pop('age')
+            data = {**events.ticket_payload(row), 'due_date': row['due_date'], 'age': int(age.total_seconds())}
+            events.publish_on_commit(events.OVERDUE, row['created_by_id'], data)
+
+        scan.scanned_through = now
+        scan.save(update_fields=['scanned_through'])
+    return rows
@@ -0,0 +1,64 @@
+"""
+Profil de performance SQLite, optionnel (TICKET_SQLITE_TUNING).
+
+Appliqué à chaque connexion (signal connection_created) : journal WAL (les
+lectures ne bloquent plus l'écrivain et inversement), synchronous=NORMAL
+(sûr en WAL, un fsync par checkpoint au lieu d'un par commit),
+busy_timeout, mmap, cache de pages et tables temporaires en mémoire. Le
+profil active aussi les transactions IMMEDIATE (tickets.sqlite_backend),
+voir backend/settings.py.
+
+Le fichier WAL grossit entre deux checkpoints : `manage.py sqlite_maintenance`
+le vide (wal_checkpoint) et met à jour les statistiques du planificateur
+(PRAGMA optimize), à lancer périodiquement.
+"""
+from django.conf import settings
+
+# Pragmas par défaut du profil (surchargés par TICKET_SQLITE_PRAGMAS)
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 1024 * 1024,
+    # Négatif : en Kio (64 Mio)
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+
+def is_enabled():
+    return getattr(settings, 'TICKET_SQLITE_TUNING', False)
+
+
+def get_pragmas():
+    return {**PRAGMAS, **getattr(settings, 'TICKET_SQLITE_PRAGMAS', {})}
+
+
+def apply_profile(connection):
+    """Pragmas du profil sur une nouvelle connexion SQLite (sans effet sinon)"""
+    if connection.vendor != 'sqlite' or not is_enabled():
+        return
+    with connection.cursor() as cursor:
+        for name, value in get_pragmas().items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+# ============ MAINTENANCE ============
+def checkpoint(connection, mode='TRUNCATE'):
+    """
+    Recopie le WAL dans la base. Retourne (bloqué, pages du WAL, pages
+    recopiées) ; (0, -1, -1) hors mode WAL.
+    """
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f"Checkpoint mode must be one of {', '.join(CHECKPOINT_MODES)}")
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA wal_checkpoint({mode})')
+        return tuple(cursor.fetchone())
+
+
+def optimize(connection):
+    """Statistiques du planificateur (ANALYZE ciblé) mises à jour si utile"""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA optimize')
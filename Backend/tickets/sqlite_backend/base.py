@@ -0,0 +1,33 @@
+"""
+Moteur SQLite avec OPTIONS['transaction_mode'] (DEFERRED, IMMEDIATE ou
+EXCLUSIVE), comme Django 5.1. En IMMEDIATE, le verrou d'écriture est pris
+au BEGIN : une transaction qui lit puis écrit attend son tour (busy_timeout)
+au lieu d'échouer en « database is locked » quand un autre écrivain la
+devance. Utilisé par le profil SQLite (tickets/sqlite.py).
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    @property
+    def transaction_mode(self):
+        mode = self.settings_dict['OPTIONS'].get('transaction_mode')
+        if mode is not None and mode.upper() not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(
+                f"settings.DATABASES transaction_mode must be one of {', '.join(TRANSACTION_MODES)}"
+            )
+        return mode and mode.upper()
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        # Option du moteur, inconnue de sqlite3.connect()
+        kwargs.pop('transaction_mode', None)
+        return kwargs
+
+    def _start_transaction_under_autocommit(self):
+        mode = self.transaction_mode
+        self.cursor().execute(f"BEGIN {mode}" if mode else "BEGIN")
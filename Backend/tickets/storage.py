@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from cloudinary import CloudinaryResource, api, uploader
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .models import Ticket
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Pool de threads réservé aux appels bloquants du stockage. Le pool par
+    défaut de la boucle (min(32, CPU + 4) threads) est partagé et trop petit
+    pour des uploads lents sur une machine avec peu de cœurs.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'TICKET_STORAGE_MAX_WORKERS', 32),
+                thread_name_prefix='ticket-storage',
+            )
+    return _executor
+
+
+def upload_attachment(file):
+    """
+    Envoie un fichier vers Cloudinary avec les options du champ
+    Ticket.attachment et retourne la CloudinaryResource (appel réseau bloquant).
+    Une fois la ressource affectée au ticket, save() ne refait pas l'upload.
+    """
+    field = Ticket._meta.get_field('attachment')
+    options = {'type': field.type, 'resource_type': field.resource_type}
+    options.update(field.options)
+    if hasattr(file, 'seekable') and file.seekable():
+        file.seek(0)
+    return uploader.upload_resource(file, **options)
+
+
+# ============ STAGING LOCAL ============
+def get_staging_dir():
+    return Path(getattr(settings, 'TICKET_ATTACHMENT_STAGING_DIR', settings.BASE_DIR / 'var' / 'attachment_staging'))
+
+
+def stage_attachment(file):
+    """
+    Copie un fichier reçu dans le répertoire de staging, retourne son chemin
+    et son SHA-256 (calculé pendant la copie, sans relire le fichier).
+    L'upload vers le stockage se fait ensuite hors requête (tickets/uploads.py).
+    """
+    directory = get_staging_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    suffix = Path(file.name or '').suffix.lower()[:20]
+    path = directory / f'{uuid.uuid4().hex}{suffix}'
+    digest = hashlib.sha256()
+    with open(path, 'wb') as destination:
+        for chunk in file.chunks():
+            digest.update(chunk)
+            destination.write(chunk)
+    return str(path), digest.hexdigest()
+
+
+async def astage_attachment(file):
+    # Hors de la boucle d'événements et hors du thread de l'ORM
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), stage_attachment, file)
+
+
+def discard_staged(path):
+    if path:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# ============ STOCKAGES DES PIÈCES JOINTES ============
+class CloudinaryAttachmentStorage:
+    """Upload vers Cloudinary avec les options du champ Ticket.attachment"""
+
+    def upload(self, path, name):
+        """Retourne les valeurs des champs attachment* du ticket"""
+        with open(path, 'rb') as file:
+            resource = upload_attachment(file)
+        fields = Ticket.build_attachment_fields(resource)
+        fields['attachment'] = resource
+        return fields
+
+    def local_path(self, ticket):
+        """Fichier sur disque de la pièce jointe (aucun : servie par Cloudinary)"""
+        return None
+
+    def delete(self, fields):
+        """Supprime le fichier stocké décrit par `fields` (résultat de upload())"""
+        resource = Ticket._meta.get_field('attachment').to_python(fields['attachment'])
+        uploader.destroy(
+            resource.public_id,
+            resource_type=resource.resource_type or 'image',
+            type=resource.type or 'upload',
+            invalidate=True,
+        )
+
+    # Nombre maximal de public_ids par appel à l'Admin API
+    delete_batch_size = 100
+
+    def delete_many(self, fields_list):
+        """Suppression groupée : un appel delete_resources par type de ressource"""
+        groups = defaultdict(list)
+        for fields in fields_list:
+            resource = Ticket._meta.get_field('attachment').to_python(fields['attachment'])
+            groups[(resource.resource_type or 'image', resource.type or 'upload')].append(resource.public_id)
+        for (resource_type, delivery_type), public_ids in groups.items():
+            for start in range(0, len(public_ids), self.delete_batch_size):
+                api.delete_resources(
+                    public_ids[start:start + self.delete_batch_size],
+                    resource_type=resource_type,
+                    type=delivery_type,
+                    invalidate=True,
+                )
+
+
+class LocalAttachmentStorage:
+    """
+    Stockage sur disque local, servi sous MEDIA_URL : remplace Cloudinary
+    hors ligne (développement, tests de charge).
+    """
+    folder = 'ticket_attachments'
+
+    def __init__(self, location=None, base_url=None):
+        self.location = Path(location or settings.MEDIA_ROOT) / self.folder
+        self.base_url = (base_url or settings.MEDIA_URL).rstrip('/') + f'/{self.folder}/'
+
+    def upload(self, path, name):
+        self.location.mkdir(parents=True, exist_ok=True)
+        fmt = Path(name or path).suffix.lstrip('.').lower()
+        file_name = uuid.uuid4().hex + (f'.{fmt}' if fmt else '')
+        shutil.copyfile(path, self.location / file_name)
+
+        url = self.base_url + file_name
+        public_id = f'{self.folder}/{Path(file_name).stem}'
+        return {
+            'attachment': CloudinaryResource(public_id, format=fmt or None, version=1, type='upload', resource_type='raw'),
+            'attachment_public_id': public_id,
+            'attachment_format': fmt,
+            'attachment_resource_type': 'raw',
+            'attachment_url': url,
+            'attachment_view_url': url,
+            'attachment_download_url': url,
+        }
+
+    def local_path(self, ticket):
+        return self._path(ticket.attachment_url)
+
+    def delete(self, fields):
+        path = self._path(fields['attachment_url'])
+        if path is not None:
+            discard_staged(path)
+
+    delete_batch_size = 1000
+
+    def delete_many(self, fields_list):
+        for fields in fields_list:
+            self.delete(fields)
+
+    def _path(self, url):
+        url = url or ''
+        if not url.startswith(self.base_url):
+            return None
+        path = (self.location / url[len(self.base_url):]).resolve()
+        # Jamais en dehors du répertoire du stockage
+        if self.location.resolve() not in path.parents:
+            return None
+        return path
+
+
+_attachment_storage = None
+
+
+def get_attachment_storage():
+    """Stockage choisi par TICKET_ATTACHMENT_STORAGE (Cloudinary par défaut)"""
+    global _attachment_storage
+    with _executor_lock:
+        if _attachment_storage is None:
+            backend = getattr(settings, 'TICKET_ATTACHMENT_STORAGE', 'tickets.storage.CloudinaryAttachmentStorage')
+            _attachment_storage = import_string(backend)()
+    return _attachment_storage
@@ -0,0 +1,184 @@
+"""
+Synchronisation incrémentale : `GET /tickets/changes/?since=<curseur>`.
+
+Chaque écriture de ticket prend un numéro de TicketChangeSequence (colonne
+change_seq) et chaque suppression laisse une tombstone numérotée. Un client
+garde le curseur de sa dernière synchronisation et ne reçoit ensuite que
+les tickets créés ou modifiés et les ids supprimés depuis.
+
+Sous PostgreSQL les numéros sont pris sans verrou : une transaction en
+cours peut valider un numéro plus petit qu'un numéro déjà visible. La
+lecture s'arrête donc à un horizon, juste avant le premier changement de
+moins de TICKET_SYNC_HORIZON_SECONDS (plus long que toute transaction
+d'écriture de tickets) ; le client les reçoit à la synchronisation suivante.
+"""
+import base64
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+
+from .models import Ticket, TicketChangeSequence, TicketTombstone
+from .serializers import TicketChangeSerializer
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+INVALID_CURSOR_MESSAGE = 'Invalid cursor'
+
+
+class CursorExpired(Exception):
+    """Des tombstones postérieures au curseur ont été purgées : resynchronisation complète"""
+
+
+# ============ CURSEURS ============
+def encode_cursor(change_seq, ticket_id):
+    raw = json.dumps([change_seq, ticket_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(encoded):
+    """(change_seq, id) depuis un curseur, (0, 0) sans curseur"""
+    if not encoded:
+        return 0, 0
+    try:
+        padded = encoded + '=' * (-len(encoded) % 4)
+        change_seq, ticket_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (TypeError, ValueError, UnicodeError):
+        raise NotFound(INVALID_CURSOR_MESSAGE)
+    if not isinstance(change_seq, int) or not isinstance(ticket_id, int):
+        raise NotFound(INVALID_CURSOR_MESSAGE)
+    return change_seq, ticket_id
+
+
+def _after(position, id_field):
+    change_seq, ticket_id = position
+    return models.Q(change_seq__gt=change_seq) | models.Q(
+        change_seq=change_seq, **{f'{id_field}__gt': ticket_id}
+    )
+
+
+# ============ LECTURE ============
+def changes(since=None, owner_id=None, limit=DEFAULT_LIMIT):
+    """
+    Changements postérieurs au curseur `since`, dans l'ordre (change_seq, id) :
+    tickets modifiés (représentation liste + change_seq) et ids supprimés,
+    au plus `limit` éléments. Sans curseur : tous les tickets, sans tombstones.
+    """
+    position = decode_cursor(since)
+    if since and position[0] < pruned_through():
+        raise CursorExpired()
+
+    tickets = Ticket.objects.filter(_after(position, 'id'))
+    tombstones = TicketTombstone.objects.filter(_after(position, 'ticket_id'))
+    limit_seq = horizon()
+    if limit_seq is not None:
+        tickets = tickets.filter(change_seq__lte=limit_seq)
+        tombstones = tombstones.filter(change_seq__lte=limit_seq)
+    if owner_id is not None:
+        tickets = tickets.filter(created_by_id=owner_id)
+        tombstones = tombstones.filter(owner_id=owner_id)
+
+    rows = list(TicketChangeSerializer.project(tickets.order_by('change_seq', 'id'))[:limit + 1])
+    items = [(row['change_seq'], row['id'], row) for row in rows]
+    if since:
+        deleted = tombstones.order_by('change_seq', 'ticket_id').values_list('change_seq', 'ticket_id')
+        items.extend((change_seq, ticket_id, None) for change_seq, ticket_id in deleted[:limit + 1])
+    items.sort(key=lambda item: item[:2])
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    if items:
+        position = items[-1][:2]
+
+    rows = [row for _, _, row in items if row is not None]
+    # Un ticket présent dans la page est plus récent que sa tombstone (id réutilisé)
+    changed_ids = {row['id'] for row in rows}
+    return {
+        'changes': TicketChangeSerializer(rows, many=True).data,
+        'deleted': [ticket_id for _, ticket_id, row in items if row is None and ticket_id not in changed_ids],
+        'cursor': encode_cursor(*position),
+        'has_more': has_more,
+    }
+
+
+def get_horizon_seconds():
+    return getattr(settings, 'TICKET_SYNC_HORIZON_SECONDS', 10)
+
+
+def horizon():
+    """
+    Plus grand numéro lisible sans risque de sauter un changement encore en
+    cours (None : pas de limite). Les numéros sont pris dans l'ordre : tout
+    numéro inférieur au premier changement récent a eu le temps d'être validé.
+    """
+    if TicketChangeSequence.commits_in_order():
+        return None
+    cutoff = timezone.now() - timedelta(seconds=get_horizon_seconds())
+    recent = [
+        Ticket._base_manager.filter(changed_at__gt=cutoff).aggregate(first=models.Min('change_seq'))['first'],
+        TicketTombstone.objects.filter(deleted_at__gt=cutoff).aggregate(first=models.Min('change_seq'))['first'],
+    ]
+    recent = [change_seq for change_seq in recent if change_seq is not None]
+    return min(recent) - 1 if recent else None
+
+
+def pruned_through():
+    return (
+        TicketChangeSequence.objects.filter(pk=TicketChangeSequence.SINGLETON_ID)
+        .values_list('pruned_through', flat=True)
+        .first()
+    ) or 0
+
+
+# ============ TOMBSTONES ============
+def record_deletion(ticket):
+    """Tombstone d'un ticket supprimé (dans la transaction de la suppression)"""
+    return record_deletions([(ticket.pk, ticket.created_by_id)])
+
+
+def record_deletions(tickets):
+    """
+    Tombstones de tickets supprimés [(id, owner_id)] en un INSERT, sous un
+    seul numéro de changement (retourné). Un id réutilisé remplace l'ancienne.
+    """
+    change_seq = TicketChangeSequence.next_value()
+    now = timezone.now()
+    TicketTombstone.objects.bulk_create(
+        [
+            TicketTombstone(ticket_id=ticket_id, owner_id=owner_id, change_seq=change_seq, deleted_at=now)
+            for ticket_id, owner_id in tickets
+        ],
+        update_conflicts=True,
+        unique_fields=['ticket_id'],
+        update_fields=['owner_id', 'change_seq', 'deleted_at'],
+    )
+    return change_seq
+
+
+def get_retention():
+    return timedelta(days=getattr(settings, 'TICKET_TOMBSTONE_RETENTION_DAYS', 30))
+
+
+def prune_tombstones(older_than=None):
+    """
+    Supprime les tombstones plus anciennes que `older_than` et retient le plus
+    grand numéro supprimé : les curseurs antérieurs reçoivent CursorExpired.
+    Retourne le nombre de lignes supprimées.
+    """
+    cutoff = timezone.now() - (older_than if older_than is not None else get_retention())
+    with transaction.atomic():
+        expired = TicketTombstone.objects.filter(deleted_at__lt=cutoff)
+        highest = expired.aggregate(highest=models.Max('change_seq'))['highest']
+        if highest is None:
+            return 0
+        deleted, _ = TicketTombstone.objects.filter(change_seq__lte=highest).delete()
+        sequence, _ = TicketChangeSequence.objects.select_for_update().get_or_create(
+            pk=TicketChangeSequence.SINGLETON_ID
+        )
+        if highest > sequence.pruned_through:
+            sequence.pruned_through = highest
+            sequence.save(update_fields=['pruned_through'])
+    return deleted
@@ -0,0 +1,240 @@
+"""
+Upload des pièces jointes en arrière-plan.
+
+La création d'un ticket copie le fichier en staging local et enregistre le
+ticket avec attachment_state='pending' : la requête ne dépend plus du temps
+d'upload. Après le commit, un pool de threads borné (TICKET_UPLOAD_WORKERS)
+envoie le fichier au stockage (tickets/storage.py), avec nouvelles
+tentatives espacées en cas d'échec, puis passe le ticket à 'ready' (ou
+'failed' après TICKET_UPLOAD_MAX_ATTEMPTS essais). Un contenu déjà stocké
+(même SHA-256, voir tickets/blobs.py) n'est pas uploadé de nouveau.
+
+Un ticket resté 'pending' (processus arrêté pendant l'upload) est repris par
+`manage.py process_attachment_uploads`.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+
+from . import blobs, storage
+from .models import Ticket
+
+logger = logging.getLogger(__name__)
+
+# Champs écrits par le worker à la fin de l'upload
+RESULT_FIELDS = (
+    'attachment', 'attachment_state', 'attachment_staged_path', 'attachment_blob_id', 'updated_at',
+) + Ticket.ATTACHMENT_URL_FIELDS
+
+LOADED_FIELDS = (
+    'id', 'title', 'status', 'priority', 'category', 'created_by_id', 'assigned_to_id',
+    'attachment_name', 'attachment_size', 'attachment_staged_path', 'attachment_sha256',
+    'updated_at', 'change_seq',
+)
+
+
+def staged_fields(upload, staged):
+    path, sha256 = staged
+    return {
+        'attachment': None,
+        'attachment_name': upload.name,
+        'attachment_size': upload.size or 0,
+        'attachment_state': 'pending',
+        'attachment_staged_path': path,
+        'attachment_sha256': sha256,
+    }
+
+
+def stage(upload):
+    """Champs du ticket pour une pièce jointe reçue, fichier copié en staging"""
+    return staged_fields(upload, storage.stage_attachment(upload))
+
+
+async def astage(upload):
+    return staged_fields(upload, await storage.astage_attachment(upload))
+
+
+def deduplicate(data):
+    """
+    Pièce jointe au contenu déjà stocké : les champs `data` du nouveau ticket
+    pointent vers le blob existant, prêt tout de suite et sans upload. À
+    appeler dans la transaction qui crée le ticket (référence prise sur le blob).
+    """
+    if data.get('attachment_state') != 'pending' or not data.get('attachment_sha256'):
+        return
+    blob = blobs.claim(data['attachment_sha256'])
+    if blob is None:
+        return
+    staged_path = data['attachment_staged_path']
+    data.update(blobs.ticket_fields(blob), attachment_state='ready', attachment_staged_path='')
+    transaction.on_commit(lambda: storage.discard_staged(staged_path))
+
+
+def create_ticket(data):
+    """Crée un ticket avec sa pièce jointe en staging (déduplication, puis upload en arrière-plan)"""
+    with transaction.atomic():
+        deduplicate(data)
+        ticket = Ticket.objects.create(**data)
+        if ticket.attachment_state == 'pending':
+            uploader.enqueue_on_commit(ticket.pk)
+    return ticket
+
+
+class AttachmentUploader:
+    """Pool d'upload : concurrence bornée, tentatives avec délai exponentiel"""
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+        self._active = 0
+        self._idle = threading.Condition(self._lock)
+
+    @property
+    def max_workers(self):
+        return getattr(settings, 'TICKET_UPLOAD_WORKERS', 4)
+
+    @property
+    def max_attempts(self):
+        return getattr(settings, 'TICKET_UPLOAD_MAX_ATTEMPTS', 5)
+
+    @property
+    def retry_delay(self):
+        return getattr(settings, 'TICKET_UPLOAD_RETRY_DELAY', 2.0)
+
+    def get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='ticket-upload',
+                )
+            return self._executor
+
+    # ============ FILE D'ATTENTE ============
+    def enqueue(self, ticket_id, attempt=1):
+        with self._lock:
+            self._active += 1
+        self.get_executor().submit(self._run, ticket_id, attempt)
+
+    def enqueue_on_commit(self, ticket_id, using=None):
+        transaction.on_commit(lambda: self.enqueue(ticket_id), using=using)
+
+    def _retry_later(self, ticket_id, attempt):
+        # Timer plutôt que sleep : le thread du pool reste disponible
+        delay = self.retry_delay * 2 ** (attempt - 1)
+        with self._lock:
+            self._active += 1
+        timer = threading.Timer(delay, self._resubmit, (ticket_id, attempt + 1))
+        timer.daemon = True
+        timer.start()
+
+    def _resubmit(self, ticket_id, attempt):
+        self.get_executor().submit(self._run, ticket_id, attempt)
+
+    def _done(self):
+        with self._lock:
+            self._active -= 1
+            if not self._active:
+                self._idle.notify_all()
+
+    def wait(self, timeout=None):
+        """Attend la fin des uploads en cours et planifiés, retourne False si timeout"""
+        with self._lock:
+            return self._idle.wait_for(lambda: not self._active, timeout)
+
+    # ============ TRAITEMENT ============
+    def _run(self, ticket_id, attempt):
+        close_old_connections()
+        try:
+            self.process(ticket_id, attempt)
+        except Exception:
+            logger.exception("Attachment upload for ticket %s crashed", ticket_id)
+        finally:
+            close_old_connections()
+            self._done()
+
+    def process(self, ticket_id, attempt=1):
+        """Upload du fichier en staging d'un ticket ; retourne le nouvel état"""
+        ticket = (
+            Ticket.objects.filter(pk=ticket_id, attachment_state__in=('pending', 'failed'))
+            .exclude(attachment_staged_path='')
+            # Colonnes lues par les signaux (compteurs, événements) : pas de requête en plus
+            .only(*LOADED_FIELDS)
+            .first()
+        )
+        if ticket is None:
+            # Supprimé ou déjà traité
+            return None
+
+        if ticket.attachment_sha256:
+            # Même contenu uploadé entre-temps pour un autre ticket : pas de transfert
+            with transaction.atomic():
+                blob = blobs.claim(ticket.attachment_sha256)
+                if blob is not None:
+                    state = self._finish(ticket, {**blobs.ticket_fields(blob), 'attachment_state': 'ready', 'attachment_staged_path': ''})
+                    if state is None:
+                        # Ticket supprimé pendant l'upload : référence rendue
+                        transaction.set_rollback(True)
+                    return state
+
+        try:
+            fields = storage.get_attachment_storage().upload(ticket.attachment_staged_path, ticket.attachment_name)
+        except FileNotFoundError:
+            logger.error("Staged attachment of ticket %s is missing", ticket_id)
+            return self._finish(ticket, {'attachment_state': 'failed', 'attachment_staged_path': ''})
+        except Exception:
+            if attempt < self.max_attempts:
+                logger.warning("Attachment upload for ticket %s failed (attempt %s), retrying", ticket_id, attempt, exc_info=True)
+                self._retry_later(ticket_id, attempt)
+                return 'pending'
+            logger.exception("Attachment upload for ticket %s failed after %s attempts", ticket_id, attempt)
+            # Fichier gardé en staging pour `process_attachment_uploads --retry-failed`
+            return self._finish(ticket, {'attachment_state': 'failed'})
+
+        uploaded = fields
+        with transaction.atomic():
+            created = None
+            if ticket.attachment_sha256:
+                blob, created = blobs.register(ticket.attachment_sha256, ticket.attachment_size, uploaded)
+                fields = blobs.ticket_fields(blob)
+            state = self._finish(ticket, {**fields, 'attachment_state': 'ready', 'attachment_staged_path': ''})
+            if state is None:
+                # Ticket supprimé pendant l'upload : pas de blob pour lui
+                transaction.set_rollback(True)
+        if state is None or created is False:
+            # Copie inutile : contenu déjà stocké par un autre upload
+            blobs.delete_stored(uploaded)
+        return state
+
+    def _finish(self, ticket, fields):
+        """Enregistre le résultat par save() : signaux (cache, événements, change_seq)"""
+        staged_path = ticket.attachment_staged_path
+        for name, value in fields.items():
+            setattr(ticket, name, value)
+        try:
+            ticket.save(update_fields=[name for name in RESULT_FIELDS if name in fields or name == 'updated_at'])
+        except DatabaseError:
+            # Ticket supprimé pendant l'upload
+            logger.info("Ticket %s was deleted during its attachment upload", ticket.pk)
+            storage.discard_staged(staged_path)
+            return None
+        if not ticket.attachment_staged_path:
+            transaction.on_commit(lambda: storage.discard_staged(staged_path))
+        return fields['attachment_state']
+
+    def requeue(self, states=('pending',)):
+        """Remet en file les tickets dans `states` (reprise après arrêt), retourne leur nombre"""
+        ticket_ids = list(
+            Ticket.objects.filter(attachment_state__in=states)
+            .exclude(attachment_staged_path='')
+            .values_list('id', flat=True)
+        )
+        for ticket_id in ticket_ids:
+            self.enqueue(ticket_id)
+        return len(ticket_ids)
+
+
+uploader = AttachmentUploader()
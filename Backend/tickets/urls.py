@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
-from .views import download_ticket_attachment  
+from .views import download_ticket_attachment, view_ticket_attachment
 
 router = DefaultRouter()
 router.register(r'users', views.UserViewSet, basename='user')
@@ -17,5 +17,6 @@ urlpatterns = [
     path('users/logout/', views.UserViewSet.as_view({'post': 'logout'}), name='user-logout'),
     
     path('tickets/<int:ticket_id>/download/', download_ticket_attachment, name='download-attachment'),
+    path('tickets/<int:ticket_id>/view/', view_ticket_attachment, name='view-attachment'),
     
 ]
\ No newline at end of file
@@ -1,4 +1,3 @@
-from django.db import models
 from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -9,11 +8,16 @@ from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
 from rest_framework.views import APIView 
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser  
-from django.http import HttpResponse, FileResponse
+from datetime import timedelta
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.utils import timezone
+from django.utils.dateparse import parse_duration
+from django.utils.http import content_disposition_header
+from rest_framework.exceptions import ValidationError
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-import os
-import mimetypes
 
 from .models import Ticket, User
 from .serializers import (
@@ -22,10 +26,16 @@ from .serializers import (
     UserLoginSerializer,
     CustomTokenObtainPairSerializer,
     TicketSerializer,
+    TicketListSerializer,
     TicketCreateSerializer,
-    TicketUpdateSerializer
+    TicketUpdateSerializer,
+    TicketBulkSerializer
 )
 from .permissions import IsAdminOrSelf, IsOwnerOrAdmin
+from .authentication import get_full_user
+from .pagination import TicketCursorPagination
+from . import attachments, bulk, cache, conditional, counters, deletion, export, history, routing, sync, uploads
+from .search import search_tickets
 
 User = get_user_model()
 
@@ -67,7 +77,7 @@ class CustomLoginView(APIView):
                 status=status.HTTP_401_UNAUTHORIZED
             )
         
-        refresh = RefreshToken.for_user(user)
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
         user_data = UserSerializer(user).data
         
         return Response({
@@ -75,31 +85,6 @@ class CustomLoginView(APIView):
             'refresh': str(refresh),
             'access': str(refresh.access_token),
         })
-    def destroy(self, request, *args, **kwargs):
-        ticket = self.get_object()
-        
-        # Vérifier les permissions
-        if not (request.user.role == 'admin' or 
-                (ticket.created_by == request.user and ticket.status == 'New')):
-            return Response(
-                {'error': 'You do not have permission to delete this ticket'},
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
-        if ticket.attachment:
-            try:
-                import cloudinary.uploader
-                cloudinary.uploader.destroy(ticket.attachment.public_id)
-            except Exception as e:
-                print(f"Error deleting Cloudinary file: {e}")
-        
-        # Supprimer le ticket
-        self.perform_destroy(ticket)
-        
-        return Response(
-            {'message': 'Ticket deleted successfully'},
-            status=status.HTTP_200_OK
-        )
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -117,7 +102,7 @@ class UserViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def me(self, request):
-        serializer = self.get_serializer(request.user)
+        serializer = self.get_serializer(get_full_user(request.user))
         return Response(serializer.data)
     
     @action(detail=False, methods=['post'], permission_classes=[AllowAny])
@@ -130,7 +115,7 @@ class UserViewSet(viewsets.ModelViewSet):
             user = authenticate(request, username=email, password=password)
             
             if user:
-                refresh = RefreshToken.for_user(user)
+                refresh = CustomTokenObtainPairSerializer.get_token(user)
                 return Response({
                     'refresh': str(refresh),
                     'access': str(refresh.access_token),
@@ -174,13 +159,47 @@ class TicketViewSet(viewsets.ModelViewSet):
     serializer_class = TicketSerializer
     permission_classes = [IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]  
+    pagination_class = TicketCursorPagination
+    history_max_ids = 100
+    # Filtres relatifs à l'heure courante (retard, âge)
+    TIME_PARAMS = ('overdue', 'min_age', 'max_age')
+    BOOLEAN_PARAMS = {'true': True, '1': True, 'false': False, '0': False}
+    # Colonnes de tri jamais NULL après les filtres (?sla=open, ?overdue=true) :
+    # tri sans NULLS LAST, voir TicketCursorPagination.order_by
+    non_null_fields = frozenset()
+    # Actions lues sur un réplica (tickets/routing.py)
+    replica_actions = ('list', 'retrieve', 'stats', 'export')
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Après l'authentification : un utilisateur épinglé lit la base principale
+        if self.action in self.replica_actions:
+            self.replica_token = routing.start_replica_reads(request)
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        routing.end_replica_reads(self.__dict__.pop('replica_token', None))
+        return super().finalize_response(request, response, *args, **kwargs)
     
     def get_queryset(self):
+        queryset = self.get_filtered_queryset()
+        
+        # Tri (liste blanche adossée aux index, voir TicketCursorPagination)
+        ordering = self.paginator.get_ordering(self.request)
+        queryset = self.paginator.order_by(queryset, ordering, nullable=self.paginator.get_nullable_fields(self))
+        
+        # Listes : projection .values() au lieu d'instances complètes
+        if self.action in ['list', 'my_tickets']:
+            queryset = TicketListSerializer.project(queryset)
+        
+        return queryset
+    
+    def get_filtered_queryset(self):
+        """Tickets visibles par l'utilisateur après filtres et recherche, sans tri"""
         user = self.request.user
         queryset = Ticket.objects.all().select_related('created_by')
         
         if user.role != 'admin':
-            queryset = queryset.filter(created_by=user)
+            queryset = queryset.filter(created_by_id=user.id)
         
         category = self.request.query_params.get('category')
         if category:
@@ -190,25 +209,121 @@ class TicketViewSet(viewsets.ModelViewSet):
         if status:
             queryset = queryset.filter(status=status)
         
+        # File SLA (?sla=open) : tickets non résolus avec échéance, index partiels
+        # sur due_date (tri ?ordering=due_date sans tri complet)
+        sla = self.request.query_params.get('sla')
+        if sla:
+            if sla != 'open':
+                raise ValidationError({'sla': ["Must be 'open'"]})
+            queryset = queryset.sla_open()
+            self.non_null_fields = {'due_date'}
+        
+        # Retard et âge évalués en SQL (index partiels sur due_date, index created_at)
+        overdue = self.request.query_params.get('overdue')
+        if overdue:
+            if overdue.lower() not in self.BOOLEAN_PARAMS:
+                raise ValidationError({'overdue': ["Must be 'true' or 'false'"]})
+            now = timezone.now()
+            if self.BOOLEAN_PARAMS[overdue.lower()]:
+                queryset = queryset.overdue(now)
+                self.non_null_fields = {'due_date'}
+            else:
+                queryset = queryset.not_overdue(now)
+        
+        min_age, max_age = self.get_age_param('min_age'), self.get_age_param('max_age')
+        if min_age is not None or max_age is not None:
+            queryset = queryset.aged(min_age, max_age)
+        
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                models.Q(title__icontains=search) | 
-                models.Q(description__icontains=search)
-            )
-        
-        # Tri
-        ordering = self.request.query_params.get('ordering', '-created_at')
-        if ordering:
-            queryset = queryset.order_by(ordering)
+            # Index plein texte (FTS5 / tsvector) : filtre + pertinence + extrait
+            queryset = search_tickets(queryset, search)
         
         return queryset
     
+    def get_age_param(self, name):
+        """Durée d'un paramètre d'âge : secondes, [DD] HH:MM:SS ou ISO 8601 (P2D)"""
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        duration = parse_duration(value)
+        if duration is None or duration < timedelta(0):
+            raise ValidationError({name: ['Invalid duration']})
+        return duration
+    
+    # ============ GET CONDITIONNELS (ETag / Last-Modified) ET CACHE ============
+    def has_time_filters(self, request):
+        return any(request.query_params.get(name) for name in self.TIME_PARAMS)
+    
+    def list(self, request, *args, **kwargs):
+        if self.has_time_filters(request):
+            # Résultat qui change avec l'heure, sans écriture : ni validateurs
+            # (un 304 serait périmé) ni cache
+            return conditional.set_private(super().list(request, *args, **kwargs))
+        
+        etag, last_modified = conditional.list_validators(self.get_filtered_queryset(), request)
+        not_modified = conditional.not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        render = lambda: super(TicketViewSet, self).list(request, *args, **kwargs)
+        response = self.cached_response(request, 'list', render)
+        return conditional.set_validators(response, etag, last_modified)
+    
+    def retrieve(self, request, *args, **kwargs):
+        ticket_id = kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        try:
+            updated_at = (
+                self.get_filtered_queryset()
+                .filter(pk=ticket_id)
+                .values_list('updated_at', flat=True)
+                .first()
+            )
+        except (TypeError, ValueError):
+            updated_at = None
+        if updated_at is None:
+            # Ticket absent ou hors de la portée de l'utilisateur : chemin normal (404)
+            return super().retrieve(request, *args, **kwargs)
+        
+        etag, last_modified = conditional.detail_validators(ticket_id, updated_at)
+        not_modified = conditional.not_modified_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        response = self.cached_response(
+            request, 'retrieve', lambda: super(TicketViewSet, self).retrieve(request, *args, **kwargs),
+            lookup=ticket_id,
+        )
+        return conditional.set_validators(response, etag, last_modified)
+    
+    def cached_response(self, request, action, render, lookup=None):
+        """
+        Sert le corps depuis le cache versionné de l'utilisateur, sinon le calcule
+        via `render()` et le stocke. Les signaux de Ticket incrémentent la
+        génération de la portée, ce qui invalide toutes ses entrées.
+        """
+        key = cache.response_key(request, action, lookup)
+        data = cache.get_response_data(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        
+        response = render()
+        if response.status_code == status.HTTP_200_OK:
+            # Lu sur un réplica (peut-être en retard) : gardé le temps de l'épinglage seulement
+            timeout = routing.get_pin_seconds() if routing.is_replica_read() else None
+            cache.set_response_data(key, response.data, timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return TicketCreateSerializer
         elif self.action in ['update', 'partial_update']:
             return TicketUpdateSerializer
+        elif self.action in ['list', 'my_tickets']:
+            return TicketListSerializer
         return TicketSerializer
     
     def get_permissions(self):
@@ -222,15 +337,42 @@ class TicketViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
+        # Fichier copié en staging local, uploadé après le commit (tickets/uploads.py)
+        serializer.validated_data.pop('attachment', None)
         if 'attachment' in request.FILES:
-            serializer.validated_data['attachment_name'] = request.FILES['attachment'].name
+            serializer.validated_data.update(uploads.stage(request.FILES['attachment']))
         
-        serializer.validated_data['created_by'] = request.user
+        serializer.validated_data['created_by_id'] = request.user.id
         
-        self.perform_create(serializer)
+        with transaction.atomic():
+            # Contenu déjà stocké (même SHA-256) : pointeur vers le blob, sans upload
+            uploads.deduplicate(serializer.validated_data)
+            self.perform_create(serializer)
+        if serializer.instance.attachment_state == 'pending':
+            uploads.uploader.enqueue_on_commit(serializer.instance.pk)
         response_serializer = TicketSerializer(serializer.instance)
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
     
+    def destroy(self, request, *args, **kwargs):
+        ticket = self.get_object()
+    
+        # Vérifier les permissions
+        if not (request.user.role == 'admin' or
+                (ticket.created_by_id == request.user.id and ticket.status == 'New')):
+            return Response(
+                {'error': 'You do not have permission to delete this ticket'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+    
+        # Suppression logique : ligne, historique et fichier purgés plus tard
+        # par lots (tickets/deletion.py), sans appel au stockage ici
+        deletion.soft_delete([ticket.pk])
+    
+        return Response(
+            {'message': 'Ticket deleted successfully'},
+            status=status.HTTP_200_OK
+        )
+    
     @action(detail=True, methods=['patch'])
     def update_status(self, request, pk=None):
         ticket = self.get_object()
@@ -244,94 +386,175 @@ class TicketViewSet(viewsets.ModelViewSet):
         serializer = TicketUpdateSerializer(ticket, data=request.data, partial=True)
         
         if serializer.is_valid():
-            serializer.save()
+            # resolved_at / resolved_by et auteur de la transition (historique)
+            ticket.update_status(serializer.validated_data['status'], request.user)
             return Response(TicketSerializer(ticket).data)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
-    @action(detail=False, methods=['get'])
-    def my_tickets(self, request):
-        tickets = self.get_queryset().filter(created_by=request.user)
-        serializer = self.get_serializer(tickets, many=True)
-        return Response(serializer.data)
-
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def download_ticket_attachment(request, ticket_id):
-    """Vue pour télécharger directement l'attachement d'un ticket"""
-    try:
-        ticket = Ticket.objects.get(id=ticket_id)
-        
-        if request.user.role != 'admin' and ticket.created_by != request.user:
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Modification groupée (statut, priorité, assignation) de tickets
+        désignés par `ids` ou par `filter`, en quelques UPDATE ensemblistes.
+        """
+        if request.user.role != 'admin':
             return Response(
-                {'error': 'You do not have permission to access this ticket'},
+                {'error': 'Only admin can update tickets in bulk'},
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        if not ticket.attachment:
-            return Response(
-                {'error': 'No attachment for this ticket'},
-                status=status.HTTP_404_NOT_FOUND
-            )
+        serializer = TicketBulkSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
         
-        download_url = ticket.get_attachment_download_url()
+        try:
+            result = bulk.apply(
+                request.user,
+                data['changes'],
+                ids=data.get('ids'),
+                filters=data.get('filter'),
+                note=data['note'],
+            )
+        except bulk.TooManyTickets as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        from django.shortcuts import redirect
-        return redirect(download_url)
+        return Response(result)
+    
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """Historique des statuts de plusieurs tickets : ?ids=1,2,3 (une requête)"""
+        try:
+            ids = [int(value) for value in request.query_params.get('ids', '').split(',') if value]
+        except ValueError:
+            return Response({'ids': ['Expected a comma-separated list of ids']}, status=status.HTTP_400_BAD_REQUEST)
+        if not ids or len(ids) > self.history_max_ids:
+            return Response(
+                {'ids': [f'Provide between 1 and {self.history_max_ids} ids']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-    except Ticket.DoesNotExist:
-        return Response(
-            {'error': 'Ticket not found'},
-            status=status.HTTP_404_NOT_FOUND
-        )
-
-@api_view(['GET'])
-@permission_classes([IsAuthenticated])
-def view_ticket_attachment(request, ticket_id):
-    """Vue pour visualiser l'attachement (sans forcer le téléchargement)"""
-    try:
-        ticket = Ticket.objects.get(id=ticket_id)
+        owner_id = None if request.user.role == 'admin' else request.user.id
+        return Response(history.timelines(ids, owner_id))
+    
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Synchronisation incrémentale : tickets créés ou modifiés et ids supprimés
+        depuis le curseur `since` (renvoyé par l'appel précédent).
+        """
+        try:
+            limit = int(request.query_params.get('limit', sync.DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'limit': ['Expected an integer']}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(max(limit, 1), sync.MAX_LIMIT)
         
-        if request.user.role != 'admin' and ticket.created_by != request.user:
+        owner_id = None if request.user.role == 'admin' else request.user.id
+        try:
+            return Response(sync.changes(request.query_params.get('since'), owner_id, limit))
+        except sync.CursorExpired:
             return Response(
-                {'error': 'You do not have permission to access this ticket'},
+                {'error': 'Cursor has expired, a full resync is required', 'code': 'cursor_expired'},
+                status=status.HTTP_410_GONE
+            )
+    
+    @action(detail=False, methods=['get'])
+    def stats(self, request):
+        """Statistiques du tableau de bord, lues depuis les compteurs matérialisés"""
+        owner_id = None if request.user.role == 'admin' else request.user.id
+        return Response(counters.get_stats(owner_id))
+    
+    @action(detail=False, methods=['get'])
+    def cache_stats(self, request):
+        """Compteurs hits/misses du cache des réponses"""
+        if request.user.role != 'admin':
+            return Response(
+                {'error': 'Only admin can view cache statistics'},
                 status=status.HTTP_403_FORBIDDEN
             )
-        
-        if not ticket.attachment:
+        return Response(cache.get_stats())
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Export complet en flux : ?export_format=csv|ndjson&gzip=true, mêmes
+        filtres que la liste (`format` est réservé par DRF)
+        """
+        fmt = request.query_params.get('export_format', 'csv')
+        if fmt not in export.FORMATS:
             return Response(
-                {'error': 'No attachment for this ticket'},
-                status=status.HTTP_404_NOT_FOUND
+                {'export_format': [f"Must be one of: {', '.join(export.FORMATS)}"]},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        
-        if hasattr(ticket.attachment, 'url'):
-            view_url = ticket.attachment.url
-            from django.shortcuts import redirect
-            return redirect(view_url)
-        
-        else:
-            file_path = ticket.attachment.path
-            if os.path.exists(file_path):
-                content_type, encoding = mimetypes.guess_type(file_path)
-                content_type = content_type or 'application/octet-stream'
-                
-                with open(file_path, 'rb') as f:
-                    response = HttpResponse(f.read(), content_type=content_type)
-                    response['Content-Disposition'] = f'inline; filename="{os.path.basename(file_path)}"'
-                    return response
-            else:
-                return Response(
-                    {'error': 'File not found on server'},
-                    status=status.HTTP_404_NOT_FOUND
-                )
-        
-    except Ticket.DoesNotExist:
+        compress = request.query_params.get('gzip', 'false').lower()
+        if compress not in self.BOOLEAN_PARAMS:
+            return Response({'gzip': ["Must be 'true' or 'false'"]}, status=status.HTTP_400_BAD_REQUEST)
+        compress = self.BOOLEAN_PARAMS[compress]
+        
+        # Base fixée maintenant : le flux est lu après la fin de la vue
+        queryset = self.get_filtered_queryset()
+        queryset = queryset.using(queryset.db)
+        response = StreamingHttpResponse(
+            export.stream(queryset, fmt, compress),
+            content_type=export.content_type(fmt, compress),
+        )
+        response['Content-Disposition'] = content_disposition_header(True, export.filename(fmt, compress))
+        # Pas de mise en tampon par nginx : les morceaux partent au fil de la lecture
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def my_tickets(self, request):
+        tickets = self.get_queryset().filter(created_by_id=request.user.id)
+        page = self.paginate_queryset(tickets)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+# ============ PIÈCES JOINTES ============
+ATTACHMENT_FIELDS = (
+    'id', 'created_by_id', 'attachment', 'attachment_name', 'attachment_state',
+    'attachment_staged_path', 'attachment_url', 'attachment_view_url', 'attachment_download_url',
+)
+
+
+def serve_ticket_attachment(request, ticket_id, as_attachment):
+    """
+    Fichier local envoyé en streaming (Range, ETag, X-Accel-Redirect) ou
+    redirection vers l'URL du stockage. Le ticket est cherché dans la portée
+    de l'utilisateur : un ticket d'un autre utilisateur répond 404.
+    """
+    tickets = Ticket.objects.filter(pk=ticket_id).only(*ATTACHMENT_FIELDS)
+    if request.user.role != 'admin':
+        tickets = tickets.filter(created_by_id=request.user.id)
+    ticket = tickets.first()
+    if ticket is None:
         return Response(
             {'error': 'Ticket not found'},
             status=status.HTTP_404_NOT_FOUND
         )
-    except Exception as e:
+    
+    path = attachments.local_file(ticket)
+    if path is not None:
+        return attachments.serve_file(request, path, ticket.attachment_name or None, as_attachment)
+    
+    url = ticket.get_attachment_download_url() if as_attachment else ticket.get_attachment_view_url()
+    if not url:
         return Response(
-            {'error': str(e)},
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+            {'error': 'No attachment for this ticket'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    return redirect(url)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def download_ticket_attachment(request, ticket_id):
+    """Vue pour télécharger directement l'attachement d'un ticket"""
+    return serve_ticket_attachment(request, ticket_id, as_attachment=True)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def view_ticket_attachment(request, ticket_id):
+    """Vue pour visualiser l'attachement (sans forcer le téléchargement)"""
+    return serve_ticket_attachment(request, ticket_id, as_attachment=False)
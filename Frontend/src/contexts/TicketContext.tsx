@@ -1,13 +1,15 @@
 import React, { createContext, useContext, useState, useEffect } from 'react';
-import { Ticket, TicketCategory, TicketStatus } from '@/types/ticket';
+import { Ticket, TicketCategory, TicketStats, TicketStatus } from '@/types/ticket';
 import { useAuth } from './AuthContext';
 
 interface TicketContextType {
   tickets: Ticket[];
+  stats: TicketStats | null;
   loading: boolean;
   createTicket: (ticketData: FormData) => Promise<{ success: boolean; error?: string }>;
   updateTicketStatus: (ticketId: number, newStatus: TicketStatus) => Promise<{ success: boolean; error?: string }>;
   fetchTickets: () => Promise<void>;
+  fetchStats: () => Promise<void>;
   getTicketById: (id: number) => Ticket | undefined;
   getUserTickets: () => Ticket[];
 }
@@ -16,10 +18,12 @@ const TicketContext = createContext<TicketContextType | undefined>(undefined);
 
 export function TicketProvider({ children }: { children: React.ReactNode }) {
   const [tickets, setTickets] = useState<Ticket[]>([]);
+  const [stats, setStats] = useState<TicketStats | null>(null);
   const [loading, setLoading] = useState(true);
   const { user, isAdmin } = useAuth();
 
   const API_URL = 'http://localhost:8000/api/auth';
+  const EVENTS_URL = 'http://localhost:8000/api/tickets/events/';
 
   
   const fetchTickets = async () => {
@@ -33,17 +37,29 @@ export function TicketProvider({ children }: { children: React.ReactNode }) {
         return;
       }
 
-      const response = await fetch(`${API_URL}/tickets/`, {
-        headers: {
-          'Authorization': `Bearer ${token}`,
-          'Content-Type': 'application/json'
-        }
-      });
+      // La liste est paginée par curseur : on suit les liens `next`
+      let nextUrl: string | null = `${API_URL}/tickets/?page_size=100`;
+      let response: Response | null = null;
+      const data: any[] = [];
 
-      console.log('Fetch tickets response:', response.status);
+      while (nextUrl) {
+        response = await fetch(nextUrl, {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+          }
+        });
 
-      if (response.ok) {
-        const data = await response.json();
+        console.log('Fetch tickets response:', response.status);
+
+        if (!response.ok) break;
+
+        const page = await response.json();
+        data.push(...page.results);
+        nextUrl = page.next;
+      }
+
+      if (response && response.ok) {
         console.log('Tickets data received (RAW):', data);
 
         const formattedTickets: Ticket[] = data.map((ticket: any) => {
@@ -97,6 +113,7 @@ export function TicketProvider({ children }: { children: React.ReactNode }) {
             id: ticket.id,
             title: ticket.title,
             description: ticket.description,
+            descriptionTruncated: ticket.description_truncated || false,
             category: ticket.category,
             status: ticket.status,
             priority: ticket.priority || 'Medium',
@@ -119,7 +136,7 @@ export function TicketProvider({ children }: { children: React.ReactNode }) {
 
         console.log('Formatted tickets:', formattedTickets);
         setTickets(formattedTickets);
-      } else {
+      } else if (response) {
         const errorText = await response.text();
         console.error('Failed to fetch tickets:', errorText);
       }
@@ -130,6 +147,28 @@ export function TicketProvider({ children }: { children: React.ReactNode }) {
     }
   };
   
+  const fetchStats = async () => {
+    try {
+      const token = localStorage.getItem('access_token');
+      if (!token) return;
+
+      const response = await fetch(`${API_URL}/tickets/stats/`, {
+        headers: {
+          'Authorization': `Bearer ${token}`,
+          'Content-Type': 'application/json'
+        }
+      });
+
+      if (response.ok) {
+        setStats(await response.json());
+      } else {
+        console.error('Failed to fetch ticket stats:', await response.text());
+      }
+    } catch (error) {
+      console.error('Error fetching ticket stats:', error);
+    }
+  };
+
   const createTicket = async (formData: FormData): Promise<{ success: boolean; error?: string }> => {
     try {
       const token = localStorage.getItem('access_token');
@@ -176,6 +215,7 @@ export function TicketProvider({ children }: { children: React.ReactNode }) {
         };
 
         setTickets(prev => [formattedTicket, ...prev]);
+        fetchStats();
         return { success: true };
       } else {
         const errorText = await response.text();
@@ -228,6 +268,7 @@ export function TicketProvider({ children }: { children: React.ReactNode }) {
           }
           return ticket;
         }));
+        fetchStats();
 
         return { success: true };
       } else {
@@ -296,20 +337,70 @@ export function TicketProvider({ children }: { children: React.ReactNode }) {
     if (user) {
       console.log('User logged in, fetching tickets...');
       fetchTickets();
+      fetchStats();
     } else {
       console.log('No user, clearing tickets');
       setTickets([]);
+      setStats(null);
       setLoading(false);
     }
   }, [user]);
 
+  // Mises à jour en direct (SSE, servi par le serveur ASGI)
+  useEffect(() => {
+    const token = localStorage.getItem('access_token');
+    if (!user || !token || typeof EventSource === 'undefined') return;
+
+    // EventSource n'envoie pas d'en-têtes : jeton dans l'URL
+    const source = new EventSource(`${EVENTS_URL}?token=${encodeURIComponent(token)}`);
+
+    source.addEventListener('ticket.created', () => {
+      fetchTickets();
+      fetchStats();
+    });
+
+    source.addEventListener('ticket.updated', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      setTickets(prev => prev.map(ticket => {
+        if (ticket.id !== data.id) return ticket;
+        const statusChanged = ticket.status !== data.status;
+        return {
+          ...ticket,
+          title: data.title,
+          status: data.status,
+          priority: data.priority,
+          statusHistory: statusChanged
+            ? [...ticket.statusHistory, { status: data.status, changedAt: data.updated_at, changedBy: 'System' }]
+            : ticket.statusHistory
+        };
+      }));
+      fetchStats();
+    });
+
+    source.addEventListener('ticket.deleted', (event) => {
+      const data = JSON.parse((event as MessageEvent).data);
+      setTickets(prev => prev.filter(ticket => ticket.id !== data.id));
+      fetchStats();
+    });
+
+    // Événements manqués : rechargement complet
+    source.addEventListener('reset', () => {
+      fetchTickets();
+      fetchStats();
+    });
+
+    return () => source.close();
+  }, [user]);
+
   return (
     <TicketContext.Provider value={{
       tickets,
+      stats,
       loading,
       createTicket,
       updateTicketStatus,
       fetchTickets,
+      fetchStats,
       getTicketById,
       getUserTickets
     }}>
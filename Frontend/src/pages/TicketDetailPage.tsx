@@ -187,6 +187,32 @@ export default function TicketDetailPage() {
     }
   }, [id, getTicketById, fetchTickets, user]);
 
+  // The list endpoint only returns a description excerpt: load the full ticket
+  useEffect(() => {
+    if (!ticket || !ticket.descriptionTruncated) return;
+
+    const loadFullDescription = async () => {
+      try {
+        const token = localStorage.getItem('access_token');
+        const response = await fetch(`${API_URL}/tickets/${ticket.id}/`, {
+          headers: {
+            'Authorization': `Bearer ${token}`,
+          },
+        });
+        if (response.ok) {
+          const fullTicket = await response.json();
+          setTicket(prev => prev && prev.id === fullTicket.id
+            ? { ...prev, description: fullTicket.description, descriptionTruncated: false }
+            : prev);
+        }
+      } catch (error) {
+        console.error('Error loading ticket details:', error);
+      }
+    };
+
+    loadFullDescription();
+  }, [ticket?.id, ticket?.descriptionTruncated]);
+
   const handleStatusChange = async (newStatus: TicketStatus) => {
     if (!ticket) return;
 
@@ -33,7 +33,7 @@ import {
 const ITEMS_PER_PAGE = 6;
 
 export default function TicketListPage() {
-  const { getUserTickets, loading, fetchTickets } = useTickets();
+  const { getUserTickets, loading, fetchTickets, stats, fetchStats } = useTickets();
   const { user, isAdmin } = useAuth();
   const tickets = getUserTickets();
 
@@ -47,12 +47,13 @@ export default function TicketListPage() {
   const adminStats = useMemo(() => {
     if (!isAdmin) return null;
     
-    const total = tickets.length;
-    const newTickets = tickets.filter(t => t.status === 'New').length;
-    const underReview = tickets.filter(t => t.status === 'Under Review').length;
-    const resolved = tickets.filter(t => t.status === 'Resolved').length;
+    // Counts come from the server-side counters (/tickets/stats/)
+    const total = stats?.total ?? tickets.length;
+    const newTickets = stats?.by_status['New'] ?? 0;
+    const underReview = stats?.by_status['Under Review'] ?? 0;
+    const resolved = stats?.by_status['Resolved'] ?? 0;
     
-    const highPriority = tickets.filter(t => t.priority === 'High' || t.priority === 'Urgent').length;
+    const highPriority = stats?.high_priority ?? 0;
     
     // Calculate average days since creation
     const avgDaysOpen = tickets.length > 0 
@@ -75,16 +76,15 @@ export default function TicketListPage() {
       avgDaysOpen,
       uniqueUsers
     };
-  }, [tickets, isAdmin]);
+  }, [tickets, stats, isAdmin]);
 
   const userStats = useMemo(() => {
     if (isAdmin) return null;
     
-    const userTickets = tickets;
-    const total = userTickets.length;
-    const newTickets = userTickets.filter(t => t.status === 'New').length;
-    const underReview = userTickets.filter(t => t.status === 'Under Review').length;
-    const resolved = userTickets.filter(t => t.status === 'Resolved').length;
+    const total = stats?.total ?? tickets.length;
+    const newTickets = stats?.by_status['New'] ?? 0;
+    const underReview = stats?.by_status['Under Review'] ?? 0;
+    const resolved = stats?.by_status['Resolved'] ?? 0;
 
     return { 
       total, 
@@ -92,7 +92,7 @@ export default function TicketListPage() {
       underReview, 
       resolved 
     };
-  }, [tickets, isAdmin]);
+  }, [tickets, stats, isAdmin]);
 
   const filteredTickets = useMemo(() => {
     return tickets.filter(ticket => {
@@ -123,7 +123,7 @@ export default function TicketListPage() {
 
   const handleRefresh = async () => {
     setRefreshing(true);
-    await fetchTickets();
+    await Promise.all([fetchTickets(), fetchStats()]);
     setRefreshing(false);
   };
 
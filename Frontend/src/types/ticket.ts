@@ -21,6 +21,7 @@ export interface Ticket {
   id: number;
   title: string;
   description: string;
+  descriptionTruncated?: boolean;
   category: TicketCategory;
   status: TicketStatus;
   priority: TicketPriority;
@@ -33,6 +34,14 @@ export interface Ticket {
   statusHistory: StatusHistory[];
 }
 
+export interface TicketStats {
+  total: number;
+  by_status: Record<TicketStatus, number>;
+  by_category: Record<TicketCategory, number>;
+  by_priority: Record<TicketPriority, number>;
+  high_priority: number;
+}
+
 export interface ApiResponse<T> {
   data: T;
   status: number;